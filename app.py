@@ -1,7 +1,9 @@
 import os
-from flask import Flask, request, render_template, jsonify, send_file
+from flask import Flask, Response, request, render_template, jsonify, send_file
 from werkzeug.utils import secure_filename
 from utils.mistral_extractor import MistralExtractor
+from utils.job_queue import JobQueue, STATUS_SUCCESS, STATUS_ERROR
+from utils.instrumentation import timings
 import logging
 
 # Configure logging
@@ -17,11 +19,23 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Uploads are streamed to disk and encoded from a memory map, so the limit
+# only guards disk usage rather than worker memory
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', '200')) * 1024 * 1024
+app.config['RESULTS_FOLDER'] = os.path.join('uploads', 'results')
+app.config['EXTRACTION_WORKERS'] = int(os.getenv('EXTRACTION_WORKERS', '2'))
+# Pipeline timing histograms and traces are exported here after every job
+app.config['METRICS_FOLDER'] = os.getenv('METRICS_FOLDER', 'logs')
 
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Background extraction jobs; results are kept on disk so they survive a restart
+job_queue = JobQueue(
+    max_workers=app.config['EXTRACTION_WORKERS'],
+    results_dir=app.config['RESULTS_FOLDER']
+)
+
 def allowed_file(filename):
     """Check if the file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
@@ -31,9 +45,47 @@ def home():
     """Render the home page."""
     return render_template('index.html')
 
+def process_uploaded_file(filepath, progress_callback=None):
+    """Extract content from an uploaded file in a background worker."""
+    # Uploads are saved as <random prefix>_<original name>
+    document = os.path.basename(filepath).split('_', 1)[-1]
+    try:
+        with timings.trace(document):
+            logger.info(f"Starting file processing: {filepath}")
+            extractor = MistralExtractor()
+            content = extractor.extract_all_content(filepath, progress_callback=progress_callback)
+        
+        if content is None:
+            logger.error("Failed to extract content from file")
+            return None
+        
+        logger.info("Successfully extracted content")
+        logger.info(f"Extracted {len(content.get('tables', []))} tables")
+        logger.info(f"Extracted {len(content.get('transactions', []))} transactions")
+        return content
+    finally:
+        # Clean up uploaded file
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            logger.info("Cleaned up uploaded file")
+        export_metrics()
+
+def export_metrics():
+    """Write pipeline timings to the metrics folder as JSON and Prometheus text."""
+    try:
+        timings.export_json(os.path.join(app.config['METRICS_FOLDER'], 'pipeline_timings.json'))
+        timings.export_prometheus(os.path.join(app.config['METRICS_FOLDER'], 'pipeline_timings.prom'))
+    except Exception as e:
+        logger.error(f"Error exporting pipeline metrics: {str(e)}")
+
+@app.route('/metrics')
+def metrics():
+    """Expose pipeline timing histograms in Prometheus text format."""
+    return Response(timings.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    """Handle file upload and processing."""
+    """Handle file upload and queue it for processing."""
     logger.info("Received file upload request")
     
     if 'file' not in request.files:
@@ -49,55 +101,29 @@ def upload_file():
         logger.error(f"Invalid file type: {file.filename}")
         return jsonify({"error": "Invalid file type"}), 400
     
+    filepath = None
     try:
-        # Save uploaded file
+        # Save uploaded file under a unique name so concurrent uploads don't collide
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{os.urandom(8).hex()}_{filename}")
         logger.info(f"Saving file to: {filepath}")
         file.save(filepath)
         logger.info(f"Saved uploaded file to: {filepath}")
         logger.info(f"File size: {os.path.getsize(filepath)} bytes")
         
-        # Process file
-        logger.info("Starting file processing")
-        extractor = MistralExtractor()
-        
-        # Extract content
-        logger.info("Extracting content from file")
-        try:
-            content = extractor.extract_all_content(filepath)
-            logger.info("Content extraction completed")
-        except Exception as e:
-            logger.error(f"Error during content extraction: {str(e)}", exc_info=True)
-            raise
-        
-        if content is None:
-            logger.error("Failed to extract content from file")
-            return jsonify({
-                "status": "error",
-                "error": "Failed to process file",
-                "progress": 0
-            }), 500
-            
-        logger.info("Successfully extracted content")
-        logger.info(f"Extracted {len(content.get('tables', []))} tables")
-        logger.info(f"Extracted {len(content.get('transactions', []))} transactions")
-        
-        # Clean up uploaded file
-        os.remove(filepath)
-        logger.info("Cleaned up uploaded file")
+        job_id = job_queue.submit(process_uploaded_file, filepath)
         
         return jsonify({
-            "status": "success",
-            "message": "File processed successfully",
-            "content": content,
-            "progress": 100
-        })
+            "status": "queued",
+            "job_id": job_id,
+            "message": "File queued for processing",
+            "progress": 0
+        }), 202
         
     except Exception as e:
-        logger.error(f"Error processing file: {str(e)}", exc_info=True)
+        logger.error(f"Error queueing file: {str(e)}", exc_info=True)
         # Clean up on error
-        if os.path.exists(filepath):
+        if filepath and os.path.exists(filepath):
             os.remove(filepath)
         return jsonify({
             "status": "error",
@@ -105,13 +131,36 @@ def upload_file():
             "progress": 0
         }), 500
 
-@app.route('/progress')
-def get_progress():
-    """Get current processing progress."""
+@app.route('/progress/<job_id>')
+def get_progress(job_id):
+    """Get processing progress for a job."""
+    job = job_queue.get_status(job_id)
+    if job is None:
+        return jsonify({"status": "error", "error": "Unknown job"}), 404
+    
+    return jsonify(job)
+
+@app.route('/result/<job_id>')
+def get_result(job_id):
+    """Get the extracted content of a finished job."""
+    job = job_queue.get_status(job_id)
+    if job is None:
+        return jsonify({"status": "error", "error": "Unknown job"}), 404
+    
+    if job['status'] != STATUS_SUCCESS:
+        # Still running is a conflict; a failed job is a server error
+        status_code = 500 if job['status'] == STATUS_ERROR else 409
+        return jsonify({
+            "status": job['status'],
+            "error": job.get('error'),
+            "progress": job['progress']
+        }), status_code
+    
     return jsonify({
-        "status": "processing",
-        "progress": 50,  # This should be updated based on actual progress
-        "message": "Processing file..."
+        "status": "success",
+        "message": "File processed successfully",
+        "content": job_queue.get_result(job_id),
+        "progress": 100
     })
 
 if __name__ == '__main__':
@@ -1,12 +1,17 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import os
 import sys
 from dotenv import load_dotenv
-from utils.pdf_integration import pdf_processor
-from utils.securities_pdf_processor import SecuritiesPDFProcessor
-from utils.mistral_extractor import MistralExtractor
+from utils.lazy_loader import lazy_import
+from utils.transaction_dedup import add_transactions
+from utils.streamlit_cache import (
+    file_hash,
+    get_mistral_extractor,
+    cached_detect_document_type,
+    cached_process_document,
+    cached_securities_pdf,
+    cached_mistral_extraction
+)
 
 # הוספת התיקיות הנוכחיות לנתיב החיפוש של Python
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -16,6 +21,9 @@ from components.header import render_header
 from components.sidebar import render_sidebar
 from components.metrics import render_metric_cards
 
+# pandas is only needed once a tab renders tables or charts
+pd = lazy_import('pandas')
+
 # Load environment variables
 load_dotenv()
 
@@ -55,7 +63,7 @@ def main():
     
     # אתחול מחלץ Mistral
     try:
-        mistral_extractor = MistralExtractor()
+        get_mistral_extractor()
     except Exception as e:
         st.error(f"שגיאה באתחול Mistral OCR: {str(e)}")
         return
@@ -82,12 +90,8 @@ def main():
     uploaded_file = st.file_uploader("העלה קובץ PDF", type=["pdf"])
     
     if uploaded_file is not None:
-        # שמירת הקובץ
-        with open("temp.pdf", "wb") as f:
-            f.write(uploaded_file.getvalue())
-        
-        # עיבוד הקובץ
-        text, data = process_pdf_file("temp.pdf", use_mistral)
+        # עיבוד הקובץ (תוצאות נשמרות במטמון לפי תוכן הקובץ)
+        text, data = process_pdf_file(uploaded_file, use_mistral)
         
         if text and data:
             # הצגת תוצאות
@@ -111,9 +115,6 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize processors
-securities_processor = SecuritiesPDFProcessor()
-
 def render_upload_tab():
     """הצגת לשונית העלאת מסמכים."""
     st.markdown('<div class="startup-card">', unsafe_allow_html=True)
@@ -169,16 +170,21 @@ def process_uploaded_files(files, doc_type):
                 elif doc_type == "דוחות ניירות ערך":
                     document_type = "securities"
                 
+                content = file.getvalue()
+                content_hash = file_hash(content)
+                
                 # Auto-detect if needed
                 if not document_type:
-                    document_type = pdf_processor.auto_detect_document_type(
-                        file.getvalue(),
+                    document_type = cached_detect_document_type(
+                        content_hash,
+                        content,
                         filename=file.name
                     )
                 
                 # Process file
-                results, result_type = pdf_processor.process_financial_document(
-                    file.getvalue(),
+                results, result_type = cached_process_document(
+                    content_hash,
+                    content,
                     document_type=document_type
                 )
                 
@@ -198,9 +204,9 @@ def process_uploaded_files(files, doc_type):
                     st.session_state.securities_data = []
                 st.session_state.securities_data.extend(all_results)
             else:
-                if 'transactions' not in st.session_state:
-                    st.session_state.transactions = []
-                st.session_state.transactions.extend(all_results)
+                added = add_transactions(st.session_state, all_results)
+                if len(added) < len(all_results):
+                    st.info(f"{len(all_results) - len(added)} עסקאות כבר קיימות מדפי חשבון קודמים ולא נוספו שוב")
             
             st.success(f"סה\"כ עובדו {len(all_results)} רשומות")
 
@@ -240,10 +246,9 @@ def handle_transaction_results(filename, results):
         st.warning(f"המסמך {filename} עובד, אך לא נמצאו עסקאות.")
         return
         
-    if 'transactions' not in st.session_state:
-        st.session_state.transactions = []
-    
-    st.session_state.transactions.extend(results)
+    added = add_transactions(st.session_state, results)
+    if len(added) < len(results):
+        st.info(f"{len(results) - len(added)} עסקאות כבר קיימות מדפי חשבון קודמים ולא נוספו שוב")
     
     # Try AI analysis if available
     if 'agent_runner' in st.session_state and st.session_state.agent_runner:
@@ -490,27 +495,29 @@ def render_reports_tab():
     
     st.markdown('</div>', unsafe_allow_html=True)
 
-def process_pdf_file(pdf_path, use_mistral=True):
+def process_pdf_file(uploaded_file, use_mistral=True):
     """
     עיבוד קובץ PDF והחזרת הטקסט והנתונים המובנים.
     
     Args:
-        pdf_path (str): נתיב לקובץ PDF
+        uploaded_file: קובץ PDF שהועלה
         use_mistral (bool): האם להשתמש ב-Mistral OCR (ברירת מחדל: True)
         
     Returns:
         tuple: (טקסט שחולץ, נתונים מובנים)
     """
     try:
+        content = uploaded_file.getvalue()
+        content_hash = file_hash(content)
+        
         if use_mistral:
             # שימוש ב-Mistral OCR
-            ocr_text = mistral_extractor.process_pdf_file(pdf_path)
-            financial_data = mistral_extractor.extract_financial_data(ocr_text, os.path.basename(pdf_path))
-            return ocr_text, financial_data
+            return cached_mistral_extraction(content_hash, content, uploaded_file.name)
         else:
             # שימוש במעבד PDF הקיים
-            text = pdf_processor.extract_text(pdf_path)
-            data = SecuritiesPDFProcessor().process_pdf(pdf_path)
+            extracted, _ = cached_process_document(content_hash, content)
+            text = "\n".join(str(item) for item in extracted) if isinstance(extracted, list) else str(extracted)
+            data = cached_securities_pdf(content_hash, content)
             return text, data
     except Exception as e:
         st.error(f"שגיאה בעיבוד הקובץ: {str(e)}")
@@ -1,6 +1,7 @@
 import streamlit as st
 from utils.ocr_processor import extract_text_from_pdf, extract_transactions_from_text
 from utils.data_storage import DataStorage
+from utils.transaction_dedup import add_transactions
 from components.header import render_header
 from utils.agent_runner import FinancialAgentRunner
 import tempfile
@@ -56,9 +57,9 @@ def documents_page():
                                     transactions = st.session_state.agent_runner.process_document(text_results)
                                     
                                     if transactions:
-                                        if 'transactions' not in st.session_state:
-                                            st.session_state.transactions = []
-                                        st.session_state.transactions.extend(transactions)
+                                        added = add_transactions(st.session_state, transactions)
+                                        if len(added) < len(transactions):
+                                            st.info(f"{len(transactions) - len(added)} עסקאות כבר קיימות מדפי חשבון קודמים ולא נוספו שוב")
                                         
                                         # Also do financial analysis
                                         analysis = st.session_state.agent_runner.analyze_finances(transactions)
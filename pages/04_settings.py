@@ -1,5 +1,6 @@
 import streamlit as st
 from components.header import render_header
+from utils.streamlit_cache import clear_data_caches, clear_resource_caches
 
 def settings_page():
     render_header("הגדרות מערכת", "התאמה אישית של המערכת לצרכים שלך")
@@ -54,6 +55,18 @@ def settings_page():
         if st.button("איפוס מערכת", type="secondary", help="יאפס את כל ההגדרות והנתונים"):
             st.warning("פעולה זו תמחק את כל הנתונים והמסמכים במערכת. האם אתה בטוח?")
     
+    # ניהול מטמון
+    st.write("#### מטמון עיבוד")
+    cache_col1, cache_col2 = st.columns(2)
+    with cache_col1:
+        if st.button("נקה תוצאות שמורות", help="מסמכים שכבר עובדו יעובדו מחדש בהעלאה הבאה"):
+            clear_data_caches()
+            st.success("תוצאות העיבוד השמורות נמחקו")
+    with cache_col2:
+        if st.button("אתחל מעבדים ומודלים", help="יוצר מחדש את מעבדי ה-PDF, המנתחים והמודלים המשותפים"):
+            clear_resource_caches()
+            st.success("המעבדים והמודלים יאותחלו מחדש בשימוש הבא")
+    
     st.markdown('</div>', unsafe_allow_html=True)
 
 if __name__ == "__main__":
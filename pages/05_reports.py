@@ -4,6 +4,7 @@ from components.sidebar import render_sidebar
 import pandas as pd
 import altair as alt
 import markdown
+from utils.spending_cube import get_spending_cube, SIGN_INCOME, SIGN_EXPENSE
 
 def render_reports_page():
     render_header("דוחות פיננסיים", "יצירה והצגה של דוחות פיננסיים מקיפים")
@@ -52,15 +53,15 @@ def render_reports_page():
                 else:
                     st.error("שגיאה ביצירת הדוח")
             else:
-                # Generate basic reports
-                transactions_df = pd.DataFrame(st.session_state.transactions)
+                # Generate basic reports from the shared aggregation of the transactions
+                cube = get_spending_cube(st.session_state.transactions)
                 
                 if report_options == "סיכום חודשי":
-                    generate_monthly_summary(transactions_df)
+                    generate_monthly_summary(cube)
                 elif report_options == "ניתוח קטגוריות":
-                    generate_category_analysis(transactions_df)
+                    generate_category_analysis(cube)
                 elif report_options == "ניתוח מגמות":
-                    generate_trend_analysis(transactions_df)
+                    generate_trend_analysis(cube)
     
     # Display current report if available
     if 'current_report' in st.session_state and st.session_state.current_report:
@@ -90,27 +91,12 @@ def render_reports_page():
     
     st.markdown('</div>', unsafe_allow_html=True)
 
-def generate_monthly_summary(transactions_df):
+def generate_monthly_summary(cube):
     """Generate a monthly summary report."""
-    if 'date' in transactions_df.columns:
-        # Convert date to datetime
-        transactions_df['date'] = pd.to_datetime(transactions_df['date'], errors='coerce')
-        transactions_df['month'] = transactions_df['date'].dt.strftime('%Y-%m')
-        
-        # Group by month
-        monthly = transactions_df.groupby('month').agg({
-            'amount': [
-                ('income', lambda x: x[x > 0].sum()),
-                ('expenses', lambda x: x[x < 0].sum()),
-                ('net', 'sum'),
-                ('count', 'count')
-            ]
-        })
-        
-        # Flatten multi-level columns
-        monthly.columns = ['income', 'expenses', 'net', 'count']
-        monthly = monthly.reset_index()
-        
+    # Income, expenses, net and count by month
+    monthly = cube.monthly_summary()
+    
+    if not monthly.empty:
         # Create report in markdown
         report = "# סיכום חודשי\n\n"
         report += "## הכנסות והוצאות לפי חודש\n\n"
@@ -145,16 +131,18 @@ def generate_monthly_summary(transactions_df):
     else:
         st.error("הנתונים חסרים שדה תאריך")
 
-def generate_category_analysis(transactions_df):
+def category_totals(cube, sign):
+    """Sum and count per category of income or expense transactions."""
+    by_category = cube.by_category(sign)
+    by_category = by_category[by_category.index.notna()]
+    return by_category.rename(columns={'total': 'sum'})[['sum', 'count']].rename_axis('category').reset_index()
+
+def generate_category_analysis(cube):
     """Generate a category analysis report."""
-    if 'category' in transactions_df.columns and 'amount' in transactions_df.columns:
-        # Split into income and expenses
-        income_df = transactions_df[transactions_df['amount'] > 0]
-        expense_df = transactions_df[transactions_df['amount'] < 0]
-        
-        # Group by category
-        income_by_cat = income_df.groupby('category')['amount'].agg(['sum', 'count']).reset_index()
-        expense_by_cat = expense_df.groupby('category')['amount'].agg(['sum', 'count']).reset_index()
+    if cube.by_category().index.notna().any():
+        # Split into income and expenses, grouped by category
+        income_by_cat = category_totals(cube, SIGN_INCOME)
+        expense_by_cat = category_totals(cube, SIGN_EXPENSE)
         
         # Calculate percentages
         income_total = income_by_cat['sum'].sum()
@@ -206,26 +194,12 @@ def generate_category_analysis(transactions_df):
     else:
         st.error("הנתונים חסרים שדות קטגוריה או סכום")
 
-def generate_trend_analysis(transactions_df):
+def generate_trend_analysis(cube):
     """Generate a trend analysis report."""
-    if 'date' in transactions_df.columns and 'amount' in transactions_df.columns:
-        # Convert date to datetime
-        transactions_df['date'] = pd.to_datetime(transactions_df['date'], errors='coerce')
-        transactions_df['month'] = transactions_df['date'].dt.strftime('%Y-%m')
-        
-        # Group by month
-        monthly = transactions_df.groupby('month').agg({
-            'amount': [
-                ('income', lambda x: x[x > 0].sum()),
-                ('expenses', lambda x: x[x < 0].sum()),
-                ('net', 'sum')
-            ]
-        })
-        
-        # Flatten multi-level columns
-        monthly.columns = ['income', 'expenses', 'net']
-        monthly = monthly.reset_index()
-        
+    # Income, expenses and net by month
+    monthly = cube.monthly_summary()[['month', 'income', 'expenses', 'net']]
+    
+    if not monthly.empty:
         # Calculate cumulative balance
         monthly['cumulative'] = monthly['net'].cumsum()
         
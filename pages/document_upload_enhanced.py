@@ -3,7 +3,12 @@ import pandas as pd
 import time
 import os
 import tempfile
-from utils.pdf_integration import pdf_processor
+from utils.streamlit_cache import (
+    file_hash,
+    cached_detect_document_type,
+    cached_process_document,
+    cached_process_document_in_chunks
+)
 import logging
 import io
 import base64
@@ -53,49 +58,44 @@ def process_uploaded_file(uploaded_file, document_type=None, use_chunking=True):
     """
     start_time = time.time()
     
-    # Create a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-        temp_file.write(uploaded_file.getvalue())
-        temp_path = temp_file.name
+    # Results are cached by file content, so re-running the page or pressing
+    # the button again for the same file does not reprocess it
+    content = uploaded_file.getvalue()
+    content_hash = file_hash(content)
     
-    try:
-        # Auto-detect document type if not provided
-        if not document_type:
-            st.info("Detecting document type...")
-            document_type = pdf_processor.auto_detect_document_type(
-                temp_path, 
-                filename=uploaded_file.name
-            )
-            st.info(f"Detected document type: {document_type}")
-        
-        # Process the document
-        if use_chunking:
-            st.info("Using chunked processing for optimal memory usage...")
-            result, result_type = pdf_processor.process_document_in_chunks(
-                temp_path,
-                chunk_size=5,
-                document_type=document_type,
-                callback=display_progress
-            )
-        else:
-            st.info("Processing document...")
-            result, result_type = pdf_processor.process_financial_document(
-                temp_path,
-                document_type=document_type,
-                callback=display_progress
-            )
-        
-        elapsed_time = time.time() - start_time
-        
-        # Return the results
-        return result, result_type, elapsed_time
+    # Auto-detect document type if not provided
+    if not document_type:
+        st.info("Detecting document type...")
+        document_type = cached_detect_document_type(
+            content_hash,
+            content,
+            filename=uploaded_file.name
+        )
+        st.info(f"Detected document type: {document_type}")
+    
+    # Process the document
+    if use_chunking:
+        st.info("Using chunked processing for optimal memory usage...")
+        result, result_type = cached_process_document_in_chunks(
+            content_hash,
+            content,
+            chunk_size=5,
+            document_type=document_type,
+            _callback=display_progress
+        )
+    else:
+        st.info("Processing document...")
+        result, result_type = cached_process_document(
+            content_hash,
+            content,
+            document_type=document_type,
+            _callback=display_progress
+        )
+    
+    elapsed_time = time.time() - start_time
     
-    finally:
-        # Clean up the temporary file
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
+    # Return the results
+    return result, result_type, elapsed_time
 
 def main():
     """Main function for the document upload page."""
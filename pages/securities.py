@@ -11,7 +11,9 @@ import tempfile
 from datetime import datetime
 
 # Import our new PDF processor
-from utils.securities_pdf_processor import SecuritiesPDFProcessor
+from utils.streamlit_cache import file_hash, cached_securities_pdf
+from utils.holdings_reconciliation import HoldingsReconciler, BREAK_PRICE
+from utils.security_master import get_security_master
 
 def get_saved_report_list():
     """Get list of saved securities reports."""
@@ -93,14 +95,8 @@ def securities_page():
                                 st.success(f"Processed JSON: {uploaded_file.name}")
                                 
                             elif file_extension == 'pdf':
-                                # Use our new PDF processor
-                                # First save to temp file
-                                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                                    tmp_file.write(uploaded_file.getvalue())
-                                    temp_path = tmp_file.name
-                                
-                                # Create PDF processor and process file
-                                pdf_processor = SecuritiesPDFProcessor()
+                                # Use our new PDF processor; results are cached by file content
+                                content = uploaded_file.getvalue()
                                 
                                 # Try to identify bank name from filename
                                 file_basename = uploaded_file.name.lower()
@@ -115,18 +111,12 @@ def securities_page():
                                         bank_name = bank
                                         break
                                 
-                                securities_data = pdf_processor.process_pdf(temp_path, bank_name)
+                                securities_data = cached_securities_pdf(file_hash(content), content, bank_name)
                                 
                                 if securities_data and len(securities_data) > 0:
                                     st.success(f"Processed PDF: {uploaded_file.name}, found {len(securities_data)} securities")
                                 else:
                                     st.warning(f"No securities found in PDF: {uploaded_file.name}")
-                                    
-                                # Clean up temp file
-                                try:
-                                    os.unlink(temp_path)
-                                except:
-                                    pass
                             else:
                                 st.warning(f"Unsupported file type: {file_extension}")
                                 continue
@@ -752,10 +742,13 @@ def perform_manual_securities_analysis(securities_data):
         securities_by_isin[isin]['total_value'] += security.get('market_value', 0)
         securities_by_isin[isin]['banks'].add(security.get('bank', 'Unknown'))
     
-    # Check for price discrepancies
+    # Check for price discrepancies; each bank is its own account, so only prices are compared across banks
+    reconciliation = HoldingsReconciler(security_master=get_security_master()).reconcile(
+        securities_data, account_field='bank')
+    price_breaks = {item['isin'] for item in reconciliation['breaks'] if item['type'] == BREAK_PRICE}
     for isin, data in securities_by_isin.items():
         prices = [h.get('price', 0) for h in data['holdings'] if h.get('price', 0) > 0]
-        if len(prices) > 1 and max(prices) - min(prices) > 0.01:  # Allow for small rounding differences
+        if len(prices) > 1 and isin in price_breaks:
             data['price_discrepancies'] = True
             data['min_price'] = min(prices)
             data['max_price'] = max(prices)
@@ -773,7 +766,8 @@ def perform_manual_securities_analysis(securities_data):
         'report_date': datetime.now().strftime('%Y-%m-%d'),
         'total_isins': len(securities_by_isin),
         'total_portfolio_value': total_portfolio_value,
-        'securities': securities_by_isin
+        'securities': securities_by_isin,
+        'breaks': reconciliation['breaks']
     }
 
 def generate_basic_securities_report(securities_analysis):
@@ -810,6 +804,20 @@ def generate_basic_securities_report(securities_analysis):
         
         report += "\n"
     
+    # Reconciliation breaks, largest monetary impact first
+    breaks = securities_analysis.get('breaks', [])
+    if breaks:
+        report += "## הפרשי התאמה\n\n"
+        report += "| סוג | ISIN | שם נייר | מקור | צפוי | בפועל | השפעה |\n"
+        report += "| --- | ---- | ------- | ---- | ---- | ----- | ----- |\n"
+        
+        for item in breaks[:20]:
+            report += (f"| {item['type']} | {item['isin'] or '-'} | {item['security_name']} | "
+                       f"{item['source'] or item['account'] or '-'} | {item['expected']:,.2f} | "
+                       f"{item['actual']:,.2f} | ${item['impact']:,.2f} |\n")
+        
+        report += "\n"
+    
     # Holdings by value section
     report += "## החזקות לפי שווי\n\n"
     
@@ -8,8 +8,12 @@ import matplotlib.pyplot as plt
 import io
 from datetime import datetime
 import base64
-from utils.securities_analyzer import SecuritiesAnalyzer
-from utils.agent_runner import FinancialAgentRunner
+from utils.streamlit_cache import (
+    get_securities_analyzer,
+    get_agent_runner,
+    cached_analyze_securities_by_isin,
+    cached_analyze_performance
+)
 import logging
 from dotenv import load_dotenv
 
@@ -18,14 +22,14 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize securities analyzer
-securities_analyzer = SecuritiesAnalyzer()
+# Shared securities analyzer, created once per server process
+securities_analyzer = get_securities_analyzer()
 
 # Initialize agent runner if API key is available
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 agent_runner = None
 if GEMINI_API_KEY:
-    agent_runner = FinancialAgentRunner(api_key=GEMINI_API_KEY)
+    agent_runner = get_agent_runner(GEMINI_API_KEY)
 
 def get_download_link(content, filename, filetype="csv"):
     """Generate a download link for content."""
@@ -184,7 +188,7 @@ def main():
                     st.session_state.securities_analysis = None
                     
                     # Perform analysis
-                    analysis = securities_analyzer.analyze_securities_by_isin(st.session_state.securities)
+                    analysis = cached_analyze_securities_by_isin(st.session_state.securities)
                     
                     # Store results in session state
                     if analysis and analysis.get('status') == 'success':
@@ -214,7 +218,7 @@ def main():
                         historical_data.append(security_copy)
                     
                     # Perform performance analysis
-                    performance = securities_analyzer.analyze_performance_over_time(historical_data, 'monthly')
+                    performance = cached_analyze_performance(historical_data, 'monthly')
                     
                     # Store results in session state
                     if performance and performance.get('status') == 'success':
@@ -1,8 +1,9 @@
 import streamlit as st
 import tempfile
 import os
-from utils.pdf_integration import pdf_processor
+from utils.streamlit_cache import file_hash, cached_detect_document_type, cached_process_document
 from utils.samples import load_sample_document
+from utils.transaction_dedup import add_transactions
 
 def render_upload_tab():
     """Render the document upload tab interface."""
@@ -39,16 +40,21 @@ def process_uploaded_file(uploaded_file, doc_type):
             "דוח ניירות ערך": "securities"
         }.get(doc_type)
         
+        content = uploaded_file.getvalue()
+        content_hash = file_hash(content)
+        
         # Auto-detect if needed
         if doc_type == "אוטומטי":
-            document_type = pdf_processor.auto_detect_document_type(
-                uploaded_file.getvalue(),
+            document_type = cached_detect_document_type(
+                content_hash,
+                content,
                 filename=uploaded_file.name
             )
         
         # Process document
-        results, result_type = pdf_processor.process_financial_document(
-            uploaded_file.getvalue(),
+        results, result_type = cached_process_document(
+            content_hash,
+            content,
             document_type=document_type
         )
         
@@ -66,9 +72,9 @@ def handle_processing_results(filename, results, result_type):
 def handle_transaction_results(filename, results):
     """Handle transaction processing results."""
     if results:
-        if 'transactions' not in st.session_state:
-            st.session_state.transactions = []
-        st.session_state.transactions.extend(results)
+        added = add_transactions(st.session_state, results)
+        if len(added) < len(results):
+            st.info(f"{len(results) - len(added)} עסקאות כבר קיימות מדפי חשבון קודמים ולא נוספו שוב")
         
         try_ai_analysis(results)
         st.success(f"המסמך {filename} עובד בהצלחה! נמצאו {len(results)} עסקאות.")
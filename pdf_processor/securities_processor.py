@@ -1,10 +1,13 @@
 import pdfplumber
 import io
+import numpy as np
 import pandas as pd
 import re
 import os
 import tempfile
 from utils.ocr_processor import extract_text_from_pdf
+from utils.numeric_parser import detect_decimal, parse_amount, parse_amounts
+from utils.security_identifiers import extract_isins, is_valid_isin
 import logging
 import hashlib
 from typing import List, Dict, Any, Optional
@@ -57,11 +60,23 @@ class SecuritiesPDFProcessor:
             return securities
             
         headers = [str(h).lower() for h in table[0]]
+        rows = [row for row in table[1:] if row and not all(cell == '' for cell in row)]
         
-        for row in table[1:]:
-            if not row or all(cell == '' for cell in row):
+        # Numeric columns are converted whole, each with its own decimal separator
+        columns = {}
+        for idx, header in enumerate(headers):
+            if any(term in header for term in ['name', 'security', 'description']) or 'isin' in header:
                 continue
-                
+            if any(term in header for term in ['quantity', 'units', 'shares', 'price', 'value per share',
+                                               'market value', 'total value']):
+                columns[idx] = [row[idx] if idx < len(row) else None for row in rows]
+        default = detect_decimal(cell for column in columns.values() for cell in column)
+        numeric = {idx: parse_amounts(column, default=default) for idx, column in columns.items()}
+        # ISINs with a wrong check digit are dropped for the whole column at once
+        isins = {idx: extract_isins([row[idx] if idx < len(row) else None for row in rows])
+                 for idx, header in enumerate(headers) if 'isin' in header}
+        
+        for row_idx, row in enumerate(rows):
             security = {}
             for idx, cell in enumerate(row):
                 if idx >= len(headers):
@@ -71,22 +86,16 @@ class SecuritiesPDFProcessor:
                 if any(term in header for term in ['name', 'security', 'description']):
                     security['security_name'] = str(cell).strip()
                 elif 'isin' in header:
-                    security['isin'] = str(cell).strip()
+                    if isins[idx][row_idx]:
+                        security['isin'] = isins[idx][row_idx]
+                elif idx not in numeric or np.isnan(numeric[idx][row_idx]):
+                    continue
                 elif any(term in header for term in ['quantity', 'units', 'shares']):
-                    try:
-                        security['quantity'] = float(str(cell).replace(',', ''))
-                    except (ValueError, TypeError):
-                        continue
+                    security['quantity'] = float(numeric[idx][row_idx])
                 elif any(term in header for term in ['price', 'value per share']):
-                    try:
-                        security['price'] = float(str(cell).replace(',', ''))
-                    except (ValueError, TypeError):
-                        continue
+                    security['price'] = float(numeric[idx][row_idx])
                 elif any(term in header for term in ['market value', 'total value']):
-                    try:
-                        security['market_value'] = float(str(cell).replace(',', ''))
-                    except (ValueError, TypeError):
-                        continue
+                    security['market_value'] = float(numeric[idx][row_idx])
             
             if security.get('security_name') and security.get('quantity'):
                 securities.append(security)
@@ -117,24 +126,25 @@ class SecuritiesPDFProcessor:
                     groups = match.groups()
                     security = {'security_name': groups[0].strip()}
                     
-                    # Add ISIN if present
-                    if len(groups) > 1 and groups[1] and len(groups[1]) >= 10:
+                    # Add ISIN if present and its check digit is correct
+                    if len(groups) > 1 and groups[1] and is_valid_isin(groups[1].strip()):
                         security['isin'] = groups[1].strip()
                     
                     # Add quantity
                     try:
                         quantity_str = next(g for g in groups[1:] if g and any(c.isdigit() for c in g))
-                        security['quantity'] = float(quantity_str.replace(',', ''))
-                    except (StopIteration, ValueError):
+                        security['quantity'] = parse_amount(quantity_str)
+                    except StopIteration:
+                        continue
+                    if security['quantity'] is None:
                         continue
                     
                     # Add price if present
                     if len(groups) > 3:
-                        try:
-                            security['price'] = float(groups[-2].replace(',', ''))
-                            security['market_value'] = float(groups[-1].replace(',', ''))
-                        except (ValueError, IndexError):
-                            pass
+                        price, market_value = parse_amount(groups[-2]), parse_amount(groups[-1])
+                        if price is not None and market_value is not None:
+                            security['price'] = price
+                            security['market_value'] = market_value
                     
                     securities.append(security)
                     break
@@ -58,7 +58,7 @@ def setup_enhanced_system():
                     'field_type': 'string',
                     'required': True,
                     'patterns': [r'[A-Z]{2}[A-Z0-9]{10}'],
-                    'validation_rules': []
+                    'validation_rules': [{'type': 'isin'}]
                 }
             ],
             'layout_markers': {},
@@ -1,11 +1,14 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import os
 import sys
 from dotenv import load_dotenv
-from utils.pdf_integration import pdf_processor
-from utils.securities_pdf_processor import SecuritiesPDFProcessor
+from utils.lazy_loader import lazy_import
+from utils.transaction_dedup import add_transactions
+from utils.streamlit_cache import (
+    file_hash,
+    cached_detect_document_type,
+    cached_process_document
+)
 
 # הוספת התיקיות הנוכחיות לנתיב החיפוש של Python
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -15,6 +18,9 @@ from components.header import render_header
 from components.sidebar import render_sidebar
 from components.metrics import render_metric_cards
 
+# pandas is only needed once a tab renders tables or charts
+pd = lazy_import('pandas')
+
 # Load environment variables
 load_dotenv()
 
@@ -81,9 +87,6 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-# Initialize processors
-securities_processor = SecuritiesPDFProcessor()
-
 def render_upload_tab():
     """הצגת לשונית העלאת מסמכים."""
     st.markdown('<div class="startup-card">', unsafe_allow_html=True)
@@ -139,16 +142,21 @@ def process_uploaded_files(files, doc_type):
                 elif doc_type == "דוחות ניירות ערך":
                     document_type = "securities"
                 
+                content = file.getvalue()
+                content_hash = file_hash(content)
+                
                 # Auto-detect if needed
                 if not document_type:
-                    document_type = pdf_processor.auto_detect_document_type(
-                        file.getvalue(),
+                    document_type = cached_detect_document_type(
+                        content_hash,
+                        content,
                         filename=file.name
                     )
                 
                 # Process file
-                results, result_type = pdf_processor.process_financial_document(
-                    file.getvalue(),
+                results, result_type = cached_process_document(
+                    content_hash,
+                    content,
                     document_type=document_type
                 )
                 
@@ -168,9 +176,9 @@ def process_uploaded_files(files, doc_type):
                     st.session_state.securities_data = []
                 st.session_state.securities_data.extend(all_results)
             else:
-                if 'transactions' not in st.session_state:
-                    st.session_state.transactions = []
-                st.session_state.transactions.extend(all_results)
+                added = add_transactions(st.session_state, all_results)
+                if len(added) < len(all_results):
+                    st.info(f"{len(all_results) - len(added)} עסקאות כבר קיימות מדפי חשבון קודמים ולא נוספו שוב")
             
             st.success(f"סה\"כ עובדו {len(all_results)} רשומות")
 
@@ -210,10 +218,9 @@ def handle_transaction_results(filename, results):
         st.warning(f"המסמך {filename} עובד, אך לא נמצאו עסקאות.")
         return
         
-    if 'transactions' not in st.session_state:
-        st.session_state.transactions = []
-    
-    st.session_state.transactions.extend(results)
+    added = add_transactions(st.session_state, results)
+    if len(added) < len(results):
+        st.info(f"{len(results) - len(added)} עסקאות כבר קיימות מדפי חשבון קודמים ולא נוספו שוב")
     
     # Try AI analysis if available
     if 'agent_runner' in st.session_state and st.session_state.agent_runner:
@@ -0,0 +1,79 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import logging
+from reportlab.pdfgen import canvas
+from utils.data_storage import HoldingsStore
+from utils.batch_ingest import run_batch, ingest_file, STATUS_SUCCESS, STATUS_TIMEOUT
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def write_statement(path, holdings):
+    """Write a one-page securities statement."""
+    pdf = canvas.Canvas(path)
+    y = 750
+    pdf.drawString(50, y, "Securities Statement")
+    for name, isin, quantity, price, value in holdings:
+        y -= 15
+        pdf.drawString(50, y, f"{name} ({isin}) {quantity} {price} {value}")
+    pdf.save()
+
+class TestBatchIngest(unittest.TestCase):
+    """Test folder ingestion into the holdings store."""
+
+    def setUp(self):
+        """Create a folder tree of statements and an empty database."""
+        self.work_dir = tempfile.mkdtemp()
+        self.folder = os.path.join(self.work_dir, 'statements')
+        os.makedirs(os.path.join(self.folder, 'q1'))
+        write_statement(os.path.join(self.folder, 'q1', 'leumi.pdf'),
+                        [('Apple Inc', 'US0378331005', '100', '150.25', '15025.00')])
+        write_statement(os.path.join(self.folder, 'discount.pdf'),
+                        [('Microsoft', 'US5949181045', '50', '300.10', '15005.00'),
+                         ('Tesla', 'US88160R1014', '10', '250', '2500')])
+        # Same content under another name
+        shutil.copy(os.path.join(self.folder, 'discount.pdf'), os.path.join(self.folder, 'q1', 'copy.pdf'))
+        self.db_path = os.path.join(self.work_dir, 'holdings.db')
+        self.store = HoldingsStore(f"sqlite:///{self.db_path}")
+
+    def tearDown(self):
+        """Remove the folder and database."""
+        self.store.engine.dispose()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_batch_ingest_and_rerun(self):
+        """New files are ingested once; a rerun skips everything already stored."""
+        progress = []
+        stats = run_batch(self.folder, self.store, workers=2, bank='Test Bank',
+                          progress_callback=lambda current, total, message: progress.append((current, total)))
+
+        self.assertEqual(stats['files_found'], 3)
+        self.assertEqual(stats['ingested'], 2)
+        self.assertEqual(stats['skipped'], 1)
+        self.assertEqual(stats['securities'], 3)
+        self.assertEqual(progress[-1], (2, 2))
+
+        with sqlite3.connect(self.db_path) as connection:
+            rows = connection.execute("SELECT isin, quantity, bank FROM securities ORDER BY isin").fetchall()
+        self.assertEqual(rows, [('US0378331005', 100.0, 'Test Bank'), ('US5949181045', 50.0, 'Test Bank'),
+                                ('US88160R1014', 10.0, 'Test Bank')])
+
+        rerun = run_batch(self.folder, self.store, workers=2)
+        self.assertEqual(rerun['ingested'], 0)
+        self.assertEqual(rerun['skipped'], 3)
+
+    def test_per_file_timeout(self):
+        """A file that runs past its timeout is abandoned."""
+        path = os.path.join(self.folder, 'discount.pdf')
+        self.assertEqual(ingest_file(path, timeout=60)['status'], STATUS_SUCCESS)
+
+        result = ingest_file(path, timeout=0.000001)
+        self.assertEqual(result['status'], STATUS_TIMEOUT)
+        self.assertEqual(result['securities'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+import pdfplumber
+from utils.lazy_loader import register_backend
+from utils.offline_llm import use_offline_llm, parse_transaction_lines
+from utils.synthetic_statements import generate_statement, LAYOUT_TEXT
+from utils.benchmark import run_scenario
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestBenchmark(unittest.TestCase):
+    """Test the synthetic statement generator and the offline benchmark."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Route LLM calls to the offline stub."""
+        cls.online_backends = use_offline_llm()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Restore the real LLM backends for other tests."""
+        for name, module_name in cls.online_backends.items():
+            register_backend(name, module_name)
+
+    def setUp(self):
+        """Create a working directory."""
+        self.work_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove generated files."""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_generator_layout(self):
+        """Generated statements have the requested pages, tables and rows."""
+        pdf_path = os.path.join(self.work_dir, 'statement.pdf')
+        manifest = generate_statement(pdf_path, pages=2, tables_per_page=2, rows_per_table=5, seed=7)
+
+        self.assertEqual(manifest['expected_rows'], 20)
+        with pdfplumber.open(pdf_path) as pdf:
+            self.assertEqual(len(pdf.pages), 2)
+            tables = pdf.pages[0].extract_tables()
+        self.assertEqual(len(tables), 2)
+        self.assertEqual(tables[0][0], ['Date', 'Description', 'Amount', 'Balance'])
+        self.assertEqual(len(tables[0]), 6)
+
+    def test_generator_rejects_overfull_page(self):
+        """Rows that do not fit on a page are rejected."""
+        with self.assertRaises(ValueError):
+            generate_statement(os.path.join(self.work_dir, 'full.pdf'), pages=1, rows_per_table=500)
+
+    def test_text_layout_parsed_by_stub(self):
+        """The Gemini stub finds the transactions of text-only statements."""
+        pdf_path = os.path.join(self.work_dir, 'text.pdf')
+        manifest = generate_statement(pdf_path, pages=1, rows_per_table=8, layout=LAYOUT_TEXT)
+
+        with pdfplumber.open(pdf_path) as pdf:
+            self.assertEqual(pdf.pages[0].find_tables(), [])
+            transactions = parse_transaction_lines(pdf.pages[0].extract_text())
+        self.assertEqual([t['amount'] for t in transactions],
+                         [t['amount'] for t in manifest['transactions']])
+
+    def test_run_scenario(self):
+        """A small scenario runs end to end and reports every metric."""
+        params = {'pages': 2, 'tables_per_page': 1, 'rows_per_table': 10}
+        result = run_scenario('tiny', params, iterations=2, work_dir=self.work_dir)
+
+        self.assertEqual(result['pages'], 2)
+        self.assertEqual(result['rows_extracted'], result['rows_expected'])
+        self.assertGreater(result['throughput']['pages_per_second'], 0)
+        self.assertLessEqual(result['latency_seconds']['p50'], result['latency_seconds']['p95'])
+        self.assertIn('extraction', result['stages'])
+        self.assertIn('export', result['stages'])
+        self.assertGreater(result['peak_memory_mb']['traced'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import time
+import unittest
+import logging
+from datetime import date, timedelta
+from utils.budget_monitor import BudgetMonitor, WINDOW_MONTH_TO_DATE, WINDOW_TRAILING_30_DAYS
+from utils.financial_analyzer import FinancialAnalyzer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestBudgetMonitor(unittest.TestCase):
+    """Test streaming budget alerts."""
+
+    def test_alert_when_limit_crossed(self):
+        """The transaction that crosses a limit raises the alert; escalation raises one more."""
+        emitted = []
+        monitor = BudgetMonitor({'food': 500}, windows=[WINDOW_MONTH_TO_DATE], on_alert=emitted.append)
+
+        self.assertEqual(monitor.add({'date': '2024-03-01', 'amount': -300, 'category': 'food'}), [])
+        alerts = monitor.add({'date': '2024-03-10', 'amount': -250, 'category': 'food'})
+        self.assertEqual([(a['period'], a['spent'], a['severity']) for a in alerts], [('2024-03', 550, 'medium')])
+        self.assertEqual(monitor.add({'date': '2024-03-11', 'amount': -20, 'category': 'food'}), [])
+        self.assertEqual(monitor.add({'date': '2024-03-12', 'amount': -50, 'category': 'food'})[0]['severity'], 'high')
+        self.assertEqual(len(emitted), 2)
+
+        # A new month starts from zero
+        self.assertEqual(monitor.add({'date': '2024-04-01', 'amount': -450, 'category': 'food'}), [])
+        self.assertEqual(monitor.spending(WINDOW_MONTH_TO_DATE), {'food': 450})
+        self.assertEqual(monitor.spending(WINDOW_MONTH_TO_DATE, as_of=date(2024, 3, 31)), {'food': 620})
+
+    def test_trailing_window(self):
+        """Spending leaves a trailing window as days pass, and the alert re-arms."""
+        monitor = BudgetMonitor({'transportation': 100}, windows=[WINDOW_TRAILING_30_DAYS])
+        monitor.add({'date': '2024-01-01', 'amount': -80, 'category': 'transportation'})
+        self.assertEqual(len(monitor.add({'date': '2024-01-20', 'amount': -30, 'category': 'transportation'})), 1)
+
+        # The January 1st spending has left the window by February 5th
+        self.assertEqual(monitor.add({'date': '2024-02-05', 'amount': -30, 'category': 'transportation'}), [])
+        self.assertEqual(monitor.spending(WINDOW_TRAILING_30_DAYS), {'transportation': 60})
+        alerts = monitor.add({'date': '2024-02-06', 'amount': -50, 'category': 'transportation'})
+        self.assertEqual([(a['spent'], a['period']) for a in alerts], [(110, '2024-01-08..2024-02-06')])
+
+        # Too old for the window; uncategorized spending counts as 'other'
+        self.assertEqual(monitor.add({'date': '2023-12-01', 'amount': -500, 'category': 'transportation'}), [])
+        monitor.add({'date': '06/02/2024', 'amount': -5})
+        self.assertEqual(monitor.spending(WINDOW_TRAILING_30_DAYS)['other'], 5)
+        monitor.add({'date': 'unknown', 'amount': -5})
+        self.assertEqual(monitor.skipped, 1)
+
+    def test_matches_batch_check(self):
+        """Month-to-date totals agree with the batch budget check for a single month."""
+        transactions = [
+            {'date': f'2024-05-{day % 28 + 1:02d}', 'amount': -(day % 7 + 1) * 10.0,
+             'category': ['food', 'housing', 'shopping'][day % 3]}
+            for day in range(300)
+        ]
+        limits = {'food': 1000, 'housing': 5000, 'shopping': 100}
+        monitor = BudgetMonitor(limits)
+        monitor.add_many(transactions)
+
+        expected = {a['category']: a['spent'] for a in FinancialAnalyzer().check_budget_limits(transactions, limits)}
+        status = {row['category']: row['spent'] for row in monitor.status() if row['window'] == WINDOW_MONTH_TO_DATE
+                  and row['severity']}
+        self.assertEqual(status.keys(), expected.keys())
+        for category, spent in expected.items():
+            self.assertAlmostEqual(status[category], spent)
+
+    def test_constant_time_updates(self):
+        """Adding a transaction does not get slower as the history grows."""
+        monitor = BudgetMonitor({'food': 1e12})
+        start_day = date(2020, 1, 1)
+
+        def add(count, offset):
+            start = time.perf_counter()
+            for i in range(count):
+                monitor.add({'date': start_day + timedelta(days=(offset + i) // 50), 'amount': -1.0,
+                             'category': 'food'})
+            return time.perf_counter() - start
+
+        first = add(5000, 0)
+        add(40000, 5000)
+        later = add(5000, 45000)
+        self.assertLess(later, first * 5)
+
+    def test_unknown_window(self):
+        """Only month-to-date and trailing windows are supported."""
+        with self.assertRaises(ValueError):
+            BudgetMonitor({}, windows=['fortnightly'])
+
+if __name__ == '__main__':
+    unittest.main()
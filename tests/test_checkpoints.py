@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+from unittest.mock import patch
+import pdfplumber
+from reportlab.pdfgen import canvas
+from utils.ocr_processor import PDFChunkReader
+from utils.pdf_integration import PDFProcessingIntegration
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ISINS = ['US0378331005', 'US5949181045', 'US88160R1014', 'US0231351067', 'US02079K3059', 'US30303M1027']
+
+class TestChunkCheckpoints(unittest.TestCase):
+    """Test resumable chunked processing."""
+
+    def setUp(self):
+        """Write a six-page securities statement, one holding per page."""
+        self.work_dir = tempfile.mkdtemp()
+        self.checkpoint_dir = os.path.join(self.work_dir, 'checkpoints')
+        self.pdf_path = os.path.join(self.work_dir, 'statement.pdf')
+        pdf = canvas.Canvas(self.pdf_path)
+        for page, isin in enumerate(ISINS):
+            pdf.drawString(50, 750, "Securities Statement")
+            pdf.drawString(50, 735, f"Holding {page + 1} ({isin}) 10 100.00 1000.00")
+            pdf.showPage()
+        pdf.save()
+        self.integration = PDFProcessingIntegration()
+
+    def tearDown(self):
+        """Remove the statement and checkpoints."""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_resume_after_failure(self):
+        """A rerun after a failure only processes the pages not yet checkpointed."""
+        process_pages = self.integration.securities_processor.process_pages
+        calls = []
+
+        def failing_at_page_four(pages, start_page=0):
+            calls.append(start_page)
+            if start_page == 4:
+                raise RuntimeError("worker crashed")
+            return process_pages(pages, start_page)
+
+        with patch.object(self.integration.securities_processor, 'process_pages', side_effect=failing_at_page_four):
+            results, result_type = self.integration.process_document_in_chunks(
+                self.pdf_path, chunk_size=2, document_type='securities', checkpoint_dir=self.checkpoint_dir)
+        self.assertEqual((results, result_type), ([], 'error'))
+        self.assertEqual(calls, [0, 2, 4])
+
+        calls.clear()
+        with patch.object(self.integration.securities_processor, 'process_pages', side_effect=process_pages) as resumed:
+            results, result_type = self.integration.process_document_in_chunks(
+                self.pdf_path, chunk_size=2, document_type='securities', checkpoint_dir=self.checkpoint_dir)
+        self.assertEqual([call.args[1] for call in resumed.call_args_list], [4])
+        self.assertEqual(result_type, 'securities')
+        self.assertEqual([r['isin'] for r in results], ISINS)
+        # Completed documents leave no checkpoint behind
+        self.assertEqual(os.listdir(self.checkpoint_dir), [])
+
+    def test_changed_parameters_start_over(self):
+        """A checkpoint made with another chunk size is not reused."""
+        process_pages = self.integration.securities_processor.process_pages
+
+        def failing_at_page_two(pages, start_page=0):
+            if start_page == 2:
+                raise RuntimeError("worker crashed")
+            return process_pages(pages, start_page)
+
+        with patch.object(self.integration.securities_processor, 'process_pages', side_effect=failing_at_page_two):
+            self.integration.process_document_in_chunks(
+                self.pdf_path, chunk_size=2, document_type='securities', checkpoint_dir=self.checkpoint_dir)
+
+        with patch.object(self.integration.securities_processor, 'process_pages', side_effect=process_pages) as rerun:
+            results, _ = self.integration.process_document_in_chunks(
+                self.pdf_path, chunk_size=3, document_type='securities', checkpoint_dir=self.checkpoint_dir)
+        self.assertEqual([call.args[1] for call in rerun.call_args_list], [0, 3])
+        self.assertEqual(len(results), len(ISINS))
+
+    def test_document_opened_once(self):
+        """All chunks are read through one handle and pages are released after their chunk."""
+        with patch('pdfplumber.open', wraps=pdfplumber.open) as opened:
+            results, result_type = self.integration.process_document_in_chunks(
+                self.pdf_path, chunk_size=4, document_type='securities')
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual([r['isin'] for r in results], ISINS)
+
+        with PDFChunkReader(self.pdf_path, chunk_size=4) as reader:
+            chunks = reader.chunks()
+            _, _, first = next(chunks)
+            first[0].extract_text()
+            self.assertIn('_layout', first[0].__dict__)
+            self.assertEqual([(start, end) for start, end, _ in chunks], [(4, 6)])
+            self.assertNotIn('_layout', first[0].__dict__)
+
+if __name__ == '__main__':
+    unittest.main()
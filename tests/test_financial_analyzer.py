@@ -0,0 +1,173 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import logging
+from utils.financial_analyzer import FinancialAnalyzer
+from utils.spending_cube import get_spending_cube
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TRANSACTIONS = [
+    {'description': 'Monthly SALARY ACME Ltd', 'amount': 12000},
+    {'description': 'Shell gas station', 'amount': -250},
+    {'description': 'Uber trip to grocery', 'amount': -40},
+    {'description': 'Payment received, thanks', 'amount': 100},
+    {'description': 'Unknown merchant', 'amount': -80},
+    {'description': 'Unknown credit', 'amount': 80},
+    {'description': None, 'amount': 0}
+]
+
+class TestFinancialAnalyzer(unittest.TestCase):
+    """Test transaction categorization."""
+
+    def setUp(self):
+        """Create an untrained analyzer."""
+        self.analyzer = FinancialAnalyzer()
+
+    def test_batch_matches_single(self):
+        """Batch categorization gives the same categories as one transaction at a time."""
+        categories = self.analyzer.categorize_batch(TRANSACTIONS)
+
+        self.assertEqual(categories, ['income', 'transportation', 'food', 'income', 'other', 'income',
+                                      'unclassified'])
+        self.assertEqual(categories, [self.analyzer.categorize_transaction(t) for t in TRANSACTIONS])
+        self.assertEqual(self.analyzer.categorize_batch([]), [])
+
+    def test_hebrew_keywords(self):
+        """Keywords in any language are matched, and category changes are picked up."""
+        self.analyzer.categorize_batch(TRANSACTIONS)
+        self.analyzer.categories['food']['keywords'].append('סופר')
+        self.analyzer.categories['income']['keywords'].append('משכורת')
+
+        categories = self.analyzer.categorize_batch([
+            {'description': 'שופרסל סופר דיל', 'amount': -320},
+            {'description': 'משכורת חודש מרץ', 'amount': 15000}
+        ])
+        self.assertEqual(categories, ['food', 'income'])
+
+    def test_model_called_once_for_unmatched(self):
+        """Descriptions no keyword matches go to the model in a single call."""
+        self.analyzer.train_categorization_model([
+            {'description': 'acme widgets', 'category': 'shopping'},
+            {'description': 'city hall fee', 'category': 'utilities'}
+        ])
+        predict = self.analyzer.ml_pipeline.predict
+        calls = []
+        self.analyzer.ml_pipeline.predict = lambda descriptions: calls.append(descriptions) or predict(descriptions)
+
+        categories = self.analyzer.categorize_batch([
+            {'description': 'ACME widgets order', 'amount': -10},
+            {'description': 'Salary', 'amount': 10},
+            {'description': 'city hall fee', 'amount': -5}
+        ])
+        self.assertEqual(categories, ['shopping', 'income', 'utilities'])
+        self.assertEqual(calls, [['acme widgets order', 'city hall fee']])
+
+SPENDING = [
+    {'date': '2024-01-05', 'amount': 5000, 'category': 'income'},
+    {'date': '2024-01-07', 'amount': -120.5, 'category': 'food'},
+    {'date': '2024-01-20', 'amount': -300, 'category': 'housing'},
+    {'date': '2024-02-02', 'amount': -80, 'category': 'food'},
+    {'date': '2024-02-15', 'amount': 40, 'category': 'food'},
+    {'date': 'not a date', 'amount': -10, 'category': 'food'},
+    {'date': '2024-02-20', 'amount': -15}
+]
+
+class TestSpendingAnalysis(unittest.TestCase):
+    """Test trends, summaries and budget checks served from the spending cube."""
+
+    def setUp(self):
+        """Create an analyzer."""
+        self.analyzer = FinancialAnalyzer()
+
+    def test_trends(self):
+        """Period totals skip undated transactions; category totals include them."""
+        trends = self.analyzer.analyze_spending_trends(SPENDING, 'monthly')
+        self.assertEqual([str(period) for period in trends['total_spending']], ['2024-01', '2024-02'])
+        self.assertAlmostEqual(list(trends['total_spending'].values())[0], 4579.5)
+        self.assertEqual(list(trends['transaction_count'].values()), [3, 3])
+        self.assertAlmostEqual(list(trends['average_transaction'].values())[1], -55 / 3)
+        self.assertEqual(list(trends['category_breakdown']), ['income', 'housing', 'food'])
+        self.assertEqual(trends['category_breakdown']['food']['count'], 4)
+        self.assertAlmostEqual(trends['category_breakdown']['food']['total'], -170.5)
+
+        self.assertEqual(list(self.analyzer.analyze_spending_trends(SPENDING, 'yearly')['transaction_count'].values()), [6])
+
+    def test_summary_and_budget(self):
+        """Summaries and budget checks give the same figures as scanning the transactions."""
+        summary = self.analyzer.generate_financial_summary(SPENDING)
+        self.assertAlmostEqual(summary['total_income'], 5040)
+        self.assertAlmostEqual(summary['total_expenses'], 525.5)
+        self.assertEqual(summary['transaction_count'], 7)
+        self.assertEqual(summary['largest_expense'], 300)
+        self.assertEqual(summary['largest_income'], 5000)
+        self.assertEqual(summary['category_summary']['housing'], {'total': -300, 'count': 1, 'average': -300.0})
+
+        alerts = self.analyzer.check_budget_limits(SPENDING, {'food': 200, 'other': 10, 'housing': 1000})
+        self.assertEqual([(a['category'], a['spent'], a['severity']) for a in alerts],
+                         [('food', 250.5, 'high'), ('other', 15, 'high')])
+
+    def test_cube_shared_per_transaction_set(self):
+        """Analyses of the same transactions share one cube; changed transactions get a new one."""
+        transactions = [dict(t) for t in SPENDING]
+        cube = get_spending_cube(transactions)
+        self.assertIs(get_spending_cube([dict(t) for t in SPENDING]), cube)
+
+        transactions[0]['category'] = 'investments'
+        self.assertIsNot(get_spending_cube(transactions), cube)
+
+class TestCategorizationModel(unittest.TestCase):
+    """Test saving, warm loading and incremental updates of the categorization model."""
+
+    def setUp(self):
+        """Create an empty model directory."""
+        self.model_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the model directory."""
+        shutil.rmtree(self.model_dir, ignore_errors=True)
+
+    def test_warm_load(self):
+        """A trained model is available to a new analyzer without retraining."""
+        FinancialAnalyzer(model_dir=self.model_dir).train_categorization_model([
+            {'description': 'acme widgets', 'category': 'shopping'},
+            {'description': 'city hall fee', 'category': 'utilities'}
+        ])
+
+        analyzer = FinancialAnalyzer(model_dir=self.model_dir)
+        self.assertTrue(analyzer.is_trained)
+        self.assertEqual(analyzer.model_info['version'], 1)
+        self.assertEqual(analyzer.categorize_transaction({'description': 'city hall', 'amount': -5}), 'utilities')
+        self.assertFalse(FinancialAnalyzer(model_dir=os.path.join(self.model_dir, 'none')).is_trained)
+
+    def test_incremental_updates(self):
+        """Corrections update the saved model as new versions; old versions can be restored."""
+        analyzer = FinancialAnalyzer(model_dir=self.model_dir)
+        self.assertTrue(analyzer.update_categorization_model([
+            {'description': 'acme widgets', 'category': 'shopping'},
+            {'description': 'city hall fee', 'category': 'utilities'}
+        ]))
+        self.assertEqual(analyzer.categorize_transaction({'description': 'zumba club', 'amount': -30}), 'shopping')
+
+        self.assertTrue(analyzer.update_categorization_model([
+            {'description': 'zumba club monthly', 'category': 'healthcare'},
+            {'description': 'zumba club', 'category': 'healthcare'},
+            {'description': 'new thing', 'category': 'not a category'}
+        ]))
+        self.assertFalse(analyzer.update_categorization_model([{'description': 'x', 'category': 'not a category'}]))
+
+        reloaded = FinancialAnalyzer(model_dir=self.model_dir)
+        self.assertEqual(reloaded.categorize_transaction({'description': 'zumba club', 'amount': -30}), 'healthcare')
+        with open(os.path.join(self.model_dir, 'latest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.assertEqual((manifest['version'], manifest['parent_version'], manifest['total_samples']), (2, 1, 4))
+
+        self.assertTrue(reloaded.load_categorization_model(version=1))
+        self.assertEqual(reloaded.categorize_transaction({'description': 'zumba club', 'amount': -30}), 'shopping')
+
+if __name__ == '__main__':
+    unittest.main()
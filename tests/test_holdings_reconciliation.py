@@ -0,0 +1,114 @@
+import time
+import random
+import unittest
+import logging
+from utils.holdings_reconciliation import HoldingsReconciler, normalize_security_name
+from utils.securities_analyzer import SecuritiesAnalyzer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def position(isin, name, quantity, price, source, account='A1', date='2024-03-31', value=None):
+    return {'isin': isin, 'security_name': name, 'quantity': quantity, 'price': price,
+            'market_value': quantity * price if value is None else value,
+            'source': source, 'account': account, 'report_date': date}
+
+BOOK = [
+    position('US0378331005', 'Apple Inc.', 100, 150.25, 'custodian'),
+    position('US0378331005', 'Apple Inc.', 90, 150.25, 'internal', date='31/03/2024'),
+    position('US5949181045', 'Microsoft Corporation', 75, 280.5, 'internal'),
+    position('', 'MICROSOFT CORP', 75, 280.5, 'custodian'),
+    position('US88160R1014', 'Tesla Inc', 30, 225.3, 'custodian'),
+    position('US02079K3059', 'Alphabet Inc', 10, 140.0, 'internal', account='B2')
+]
+
+class TestHoldingsReconciliation(unittest.TestCase):
+    """Test reconciliation of holdings across sources and statement dates."""
+
+    def setUp(self):
+        """Create a reconciler with default tolerances."""
+        self.reconciler = HoldingsReconciler()
+
+    def test_breaks_ranked_by_impact(self):
+        """Missing positions, quantity and value breaks are found and ranked by monetary impact."""
+        report = self.reconciler.reconcile(BOOK, reference='custodian')
+        breaks = [(item['type'], item['isin'], item['source']) for item in report['breaks']]
+        self.assertEqual(breaks, [
+            ('missing', 'US88160R1014', 'internal'),
+            ('quantity', 'US0378331005', 'internal'),
+            ('value', 'US0378331005', 'internal')
+        ])
+        impacts = [item['impact'] for item in report['breaks']]
+        self.assertEqual(impacts, sorted(impacts, reverse=True))
+        self.assertAlmostEqual(report['breaks'][1]['impact'], 1502.5)
+        # Account B2 is only reported by one source, so nothing is missing from the custodian
+        self.assertEqual(report['summary']['breaks'], 3)
+
+    def test_name_fallback(self):
+        """A position without an ISIN is matched to the same security by name."""
+        self.assertEqual(normalize_security_name('Microsoft Corporation'), normalize_security_name('MICROSOFT CORP'))
+        report = self.reconciler.reconcile(BOOK)
+        self.assertEqual(report['summary']['securities'], 4)
+        self.assertEqual(report['summary']['matched_by_name'], 1)
+        self.assertNotIn('US5949181045', [item['isin'] for item in report['breaks']])
+
+    def test_tolerances(self):
+        """Differences within the configured tolerances are not breaks."""
+        book = [position('US0378331005', 'Apple', 100, 150.0, 'custodian'),
+                position('US0378331005', 'Apple', 100.0004, 152.0, 'internal')]
+        report = self.reconciler.reconcile(book)
+        self.assertEqual([item['type'] for item in report['breaks']], ['value', 'price', 'price'])
+
+        loose = HoldingsReconciler(price_tolerance=0.01, value_tolerance=0.02)
+        self.assertEqual(loose.reconcile(book)['breaks'], [])
+
+    def test_roll_forward(self):
+        """Quantities that change between consecutive statements are reported."""
+        history = [
+            position('US0378331005', 'Apple', 100, 145.0, 'bank', date='2023-01-31'),
+            position('US0378331005', 'Apple', 120, 148.0, 'bank', date='2023-02-28'),
+            position('US0378331005', 'Apple', 120, 152.5, 'bank', date='2023-03-31'),
+            position('US88160R1014', 'Tesla', 30, 200.0, 'bank', date='2023-01-31')
+        ]
+        report = self.reconciler.roll_forward(history)
+        breaks = [(item['type'], item['isin'], item['date'], item['difference']) for item in report['breaks']]
+        self.assertEqual(breaks, [('missing', 'US88160R1014', '2023-02-28', -30.0),
+                                  ('quantity', 'US0378331005', '2023-02-28', 20.0)])
+
+    def test_analyzer_price_discrepancies(self):
+        """The analyzer flags prices that differ between banks beyond the price tolerance."""
+        securities = [
+            {'isin': 'US0378331005', 'security_name': 'Apple Inc.', 'quantity': 100, 'price': 150.25,
+             'market_value': 15025.0, 'bank': 'Morgan Stanley'},
+            {'isin': 'US0378331005', 'security_name': 'Apple Inc.', 'quantity': 50, 'price': 152.5,
+             'market_value': 7625.0, 'bank': 'Schwab'},
+            {'isin': 'US5949181045', 'security_name': 'Microsoft Corp', 'quantity': 75, 'price': 280.5,
+             'market_value': 21037.5, 'bank': 'Morgan Stanley'},
+            {'isin': 'US5949181045', 'security_name': 'Microsoft Corp', 'quantity': 5, 'price': 280.5,
+             'market_value': 1402.5, 'bank': 'Schwab'}
+        ]
+        analysis = SecuritiesAnalyzer().analyze_securities_by_isin(securities)
+        self.assertEqual([item['isin'] for item in analysis['summary']['price_discrepancies']], ['US0378331005'])
+        # Different banks hold different quantities without a quantity break
+        self.assertEqual({item['type'] for item in analysis['breaks']}, {'price'})
+
+    def test_book_scales(self):
+        """A book of tens of thousands of positions is reconciled in one vectorized pass."""
+        rng = random.Random(5)
+        book = []
+        for number in range(20000):
+            isin = f"US{number:09d}{number % 10}"
+            quantity = rng.randint(1, 1000)
+            book.append(position(isin, f"Security {number}", quantity, 10.0, 'custodian', account=f"A{number % 50}"))
+            book.append(position(isin, f"Security {number}", quantity + (number % 100 == 0), 10.0, 'internal',
+                                 account=f"A{number % 50}"))
+        start = time.perf_counter()
+        report = self.reconciler.reconcile(book)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Reconciled {len(book)} positions in {elapsed:.2f}s")
+        self.assertEqual(report['summary']['breaks_by_type']['quantity'], 200)
+        self.assertLess(elapsed, 20)
+
+if __name__ == '__main__':
+    unittest.main()
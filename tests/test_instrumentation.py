@@ -0,0 +1,104 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from utils.instrumentation import TimingRegistry, Histogram
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestInstrumentation(unittest.TestCase):
+    """Test pipeline timing spans, traces and exports."""
+
+    def setUp(self):
+        """Set up a separate registry for each test."""
+        self.timings = TimingRegistry(buckets=(0.1, 1.0))
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove exported files."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Observations land in the first bucket whose bound they do not exceed."""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(seconds)
+
+        self.assertEqual(histogram.cumulative_counts(), [2, 3, 4])
+        self.assertEqual(histogram.to_dict()['count'], 4)
+        self.assertAlmostEqual(histogram.to_dict()['sum'], 3.65)
+
+    def test_spans_and_decorator_feed_histograms_and_trace(self):
+        """Spans inside a trace are recorded both in the trace and the histograms."""
+        @self.timings.timed('analysis', step='summary')
+        def analyze():
+            return 42
+
+        with self.timings.trace('statement.pdf') as trace:
+            with self.timings.span('page_parse', page=1):
+                pass
+            self.assertEqual(analyze(), 42)
+
+        histograms = self.timings.histograms()
+        self.assertEqual(histograms['page_parse']['count'], 1)
+        self.assertEqual(histograms['analysis']['count'], 1)
+
+        recorded = self.timings.recent_traces()
+        self.assertEqual(len(recorded), 1)
+        self.assertEqual(recorded[0]['document'], 'statement.pdf')
+        self.assertEqual([span['name'] for span in recorded[0]['spans']], ['page_parse', 'analysis'])
+        self.assertEqual(recorded[0]['spans'][1]['labels'], {'step': 'summary'})
+        self.assertIsNotNone(trace.duration)
+
+    def test_failed_span_counts_error_and_reraises(self):
+        """An exception inside a span is counted and propagated."""
+        with self.assertRaises(ValueError):
+            with self.timings.span('llm_call'):
+                raise ValueError("API error")
+
+        self.assertEqual(self.timings.histograms()['llm_call']['errors'], 1)
+
+    def test_worker_thread_spans_join_trace(self):
+        """Spans run through a copied context are added to the caller's trace."""
+        def ocr_batch(batch):
+            with self.timings.span('llm_call', batch=batch):
+                return batch
+
+        with self.timings.trace('large.pdf'):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, ocr_batch, batch) for batch in range(4)]
+                self.assertEqual(sorted(f.result() for f in futures), [0, 1, 2, 3])
+
+        spans = self.timings.recent_traces()[0]['spans']
+        self.assertEqual(sorted(span['labels']['batch'] for span in spans), [0, 1, 2, 3])
+
+    def test_exports(self):
+        """Timings export to JSON and Prometheus text files."""
+        with self.timings.trace('statement.pdf'):
+            with self.timings.span('tabula'):
+                pass
+
+        json_path = os.path.join(self.output_dir, 'timings.json')
+        prom_path = os.path.join(self.output_dir, 'timings.prom')
+        self.timings.export_json(json_path)
+        self.timings.export_prometheus(prom_path)
+
+        with open(json_path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['histograms']['tabula']['count'], 1)
+        self.assertEqual(report['traces'][0]['document'], 'statement.pdf')
+
+        with open(prom_path, encoding='utf-8') as f:
+            text = f.read()
+        self.assertIn('# TYPE pipeline_span_seconds histogram', text)
+        self.assertIn('pipeline_span_seconds_bucket{span="tabula",le="+Inf"} 1', text)
+        self.assertIn('pipeline_span_seconds_count{span="tabula"} 1', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import tempfile
+import shutil
+import threading
+import logging
+from utils.job_queue import JobQueue, STATUS_SUCCESS, STATUS_ERROR
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestJobQueue(unittest.TestCase):
+    """Test the background job queue."""
+    
+    def setUp(self):
+        """Set up the test environment."""
+        self.results_dir = tempfile.mkdtemp()
+        self.queue = JobQueue(max_workers=2, results_dir=self.results_dir)
+    
+    def tearDown(self):
+        """Clean up the test environment."""
+        self.queue.shutdown()
+        shutil.rmtree(self.results_dir, ignore_errors=True)
+    
+    def test_progress_and_result(self):
+        """Test per-page progress reporting and result retrieval."""
+        release = threading.Event()
+        reported = threading.Event()
+        
+        def job(pages, progress_callback=None):
+            for page in range(1, pages + 1):
+                progress_callback(page, pages, f"Processed page {page}/{pages}")
+                if page == 2:
+                    reported.set()
+                    release.wait(5)
+            return {'pages': pages}
+        
+        job_id = self.queue.submit(job, 4)
+        self.assertTrue(reported.wait(5))
+        
+        status = self.queue.get_status(job_id)
+        self.assertEqual(status['status'], 'processing')
+        self.assertEqual(status['current'], 2)
+        self.assertEqual(status['progress'], 50)
+        self.assertIsNone(self.queue.get_result(job_id))
+        
+        release.set()
+        self.queue.shutdown()
+        
+        status = self.queue.get_status(job_id)
+        self.assertEqual(status['status'], STATUS_SUCCESS)
+        self.assertEqual(status['progress'], 100)
+        self.assertEqual(self.queue.get_result(job_id), {'pages': 4})
+    
+    def test_failed_job(self):
+        """Test that job errors are recorded rather than raised."""
+        def job(progress_callback=None):
+            raise RuntimeError("OCR failed")
+        
+        job_id = self.queue.submit(job)
+        self.queue.shutdown()
+        
+        status = self.queue.get_status(job_id)
+        self.assertEqual(status['status'], STATUS_ERROR)
+        self.assertIn("OCR failed", status['error'])
+    
+    def test_file_backed_store(self):
+        """Test that finished jobs can be read back by a new queue."""
+        job_id = self.queue.submit(lambda progress_callback=None: {'text': 'שלום'})
+        self.queue.shutdown()
+        
+        reloaded = JobQueue(results_dir=self.results_dir)
+        try:
+            self.assertEqual(reloaded.get_status(job_id)['status'], STATUS_SUCCESS)
+            self.assertEqual(reloaded.get_result(job_id), {'text': 'שלום'})
+            self.assertIsNone(reloaded.get_status('../../etc/passwd'))
+        finally:
+            reloaded.shutdown()
+
+if __name__ == "__main__":
+    unittest.main()
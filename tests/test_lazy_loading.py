@@ -0,0 +1,29 @@
+import unittest
+import logging
+from utils.lazy_loader import LazyModule, lazy_import, loaded_backends, backend_available
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestLazyLoading(unittest.TestCase):
+    """Test lazy backend loading."""
+
+    def test_lazy_module_imports_on_first_use(self):
+        """A lazy module is only imported when an attribute is accessed."""
+        module = lazy_import('colorsys')
+        self.assertIsInstance(module, LazyModule)
+        self.assertNotIn('colorsys', loaded_backends())
+
+        self.assertEqual(module.rgb_to_hsv(0, 0, 0), (0.0, 0.0, 0.0))
+        self.assertIn('colorsys', loaded_backends())
+
+    def test_missing_backend_fails_on_use(self):
+        """A missing backend does not fail at import time, only when used."""
+        module = lazy_import('not_an_installed_module')
+        with self.assertRaises(ImportError):
+            module.anything
+        self.assertIsNone(backend_available('not_a_backend'))
+
+if __name__ == '__main__':
+    unittest.main()
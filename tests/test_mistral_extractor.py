@@ -0,0 +1,140 @@
+import os
+import base64
+import shutil
+import tempfile
+import unittest
+import logging
+from types import SimpleNamespace
+import threading
+from unittest.mock import Mock, patch
+from reportlab.pdfgen import canvas
+from utils.mistral_extractor import (
+    MistralExtractor, encode_pdf_data_url, iter_pdf_page_batches, clear_ocr_cache
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestMistralExtractor(unittest.TestCase):
+    """Test PDF encoding and page-batched OCR in the Mistral extractor."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Create a multi-page sample PDF."""
+        cls.test_dir = tempfile.mkdtemp()
+        cls.pdf_path = os.path.join(cls.test_dir, "statement.pdf")
+        
+        c = canvas.Canvas(cls.pdf_path)
+        for page in range(1, 8):
+            c.drawString(100, 750, f"Statement page {page}")
+            c.showPage()
+        c.save()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the sample files."""
+        shutil.rmtree(cls.test_dir, ignore_errors=True)
+    
+    def setUp(self):
+        """Create an extractor with a mocked Mistral client."""
+        self.extractor = MistralExtractor.__new__(MistralExtractor)
+        self.extractor.client = Mock()
+        self.extractor.model = "mistral-ocr-latest"
+        clear_ocr_cache()
+        
+        # Map each batch's data URL to its first page so fake OCR can label pages
+        self.batch_first_pages = {
+            url: first for first, _, url in iter_pdf_page_batches(self.pdf_path, batch_size=2)
+        }
+    
+    def _fake_ocr_response(self, document):
+        """Return one markdown page per page of the batch."""
+        first_page = self.batch_first_pages[document['document_url']]
+        pages = [f"## Page {first_page}", f"## Page {first_page + 1}\n\n| a | b |\n|---|---|\n| 1 | 2 |"]
+        if first_page == 7:
+            pages = pages[:1]
+        return SimpleNamespace(pages=[SimpleNamespace(markdown=page) for page in pages])
+    
+    def test_encode_pdf_data_url(self):
+        """Test that chunked encoding matches a one-shot encoding."""
+        with open(self.pdf_path, 'rb') as f:
+            content = f.read()
+        expected = "data:application/pdf;base64," + base64.b64encode(content).decode('utf-8')
+        
+        self.assertEqual(encode_pdf_data_url(self.pdf_path), expected)
+        self.assertEqual(encode_pdf_data_url(self.pdf_path, chunk_size=301), expected)
+        self.assertEqual(encode_pdf_data_url(content, chunk_size=30), expected)
+    
+    def test_iter_pdf_page_batches(self):
+        """Test splitting a PDF into page batches."""
+        batches = list(iter_pdf_page_batches(self.pdf_path, batch_size=3))
+        
+        self.assertEqual([(first, last) for first, last, _ in batches], [(1, 3), (4, 6), (7, 7)])
+        for _, _, data_url in batches:
+            self.assertTrue(data_url.startswith("data:application/pdf;base64,"))
+    
+    def test_process_pdf_file_in_page_batches(self):
+        """Test that page batches are sent separately and joined in order."""
+        self.extractor.client.ocr.process.side_effect = lambda model, document: self._fake_ocr_response(document)
+        
+        text = self.extractor.process_pdf_file(self.pdf_path, page_batch_size=2)
+        
+        self.assertEqual(self.extractor.client.ocr.process.call_count, 4)
+        headings = [line for line in text.split("\n") if line.startswith("## Page")]
+        self.assertEqual(headings, [f"## Page {page}" for page in range(1, 8)])
+    
+    def test_extract_all_content_preserves_page_order(self):
+        """Test that concurrent batches are reassembled in true page order."""
+        release_first = threading.Event()
+        
+        def ocr_process(model, document):
+            # Hold the first batch until the others finish so completion is out of order
+            if self.batch_first_pages[document['document_url']] == 1:
+                release_first.wait(5)
+            elif self.batch_first_pages[document['document_url']] == 7:
+                release_first.set()
+            return self._fake_ocr_response(document)
+        
+        self.extractor.client.ocr.process.side_effect = ocr_process
+        progress = []
+        
+        content = self.extractor.extract_all_content(
+            self.pdf_path,
+            progress_callback=lambda current, total, message: progress.append((current, total)),
+            page_batch_size=2,
+            max_concurrency=4
+        )
+        
+        self.assertEqual([page['page'] for page in content['text']], list(range(1, 8)))
+        self.assertEqual(content['text'][4]['content'], "## Page 5")
+        self.assertEqual(content['metadata']['total_pages'], 7)
+        self.assertEqual({table['page'] for table in content['tables']}, {2, 4, 6})
+        self.assertEqual(progress[-1], (7, 7))
+    
+    @patch('utils.mistral_extractor.time.sleep')
+    def test_failed_batch_is_retried_and_cached(self, mock_sleep):
+        """Test per-batch retries and that a rerun only redoes the failed batch."""
+        attempts = {}
+        
+        def ocr_process(model, document):
+            first_page = self.batch_first_pages[document['document_url']]
+            attempts[first_page] = attempts.get(first_page, 0) + 1
+            if first_page == 3 and attempts[first_page] <= 3:
+                raise RuntimeError("Service unavailable")
+            return self._fake_ocr_response(document)
+        
+        self.extractor.client.ocr.process.side_effect = ocr_process
+        
+        content = self.extractor.extract_all_content(self.pdf_path, page_batch_size=2)
+        self.assertEqual(content['metadata']['failed_pages'], [3, 4])
+        self.assertEqual(attempts, {1: 1, 3: 3, 5: 1, 7: 1})
+        
+        # Rerun: the fourth attempt on pages 3-4 succeeds, other batches come from cache
+        content = self.extractor.extract_all_content(self.pdf_path, page_batch_size=2)
+        self.assertEqual(content['metadata']['failed_pages'], [])
+        self.assertEqual(len(content['text']), 7)
+        self.assertEqual(attempts, {1: 1, 3: 4, 5: 1, 7: 1})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import logging
+import numpy as np
+import pandas as pd
+from utils.numeric_parser import (
+    detect_decimal, detect_document_decimal, normalize_number, parse_amount, parse_amounts,
+    parse_numeric_columns, parse_number
+)
+from utils.securities_pdf_processor import SecuritiesPDFProcessor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLES = ['1,234.56', '1.234,56', '(3.500,00)', '1,234.56-', '₪ 12,50', '1,234', '1.234', 'n/a', '',
+           '-0.5', "1'234'567.5", '1.234.567', 'USD 1,000,000', 12.5, None, float('nan'), '−7,00', '12.5%']
+
+class TestNumericParser(unittest.TestCase):
+    """Test locale-aware amount parsing."""
+
+    def test_number_formats(self):
+        """Hebrew, European and Swiss grouping are all read correctly."""
+        self.assertEqual(parse_number('1,234.56'), 1234.56)
+        self.assertEqual(parse_number('1.234,56'), 1234.56)
+        self.assertEqual(parse_number("1'234'567.5"), 1234567.5)
+        self.assertEqual(parse_number('1.234.567'), 1234567)
+        self.assertEqual(parse_number('12,50'), 12.5)
+        self.assertEqual(normalize_number('1,234'), '1234')
+        self.assertEqual(normalize_number('1,234', decimal=','), '1.234')
+        self.assertEqual(normalize_number('1.234', decimal=','), '1234')
+        # Only ambiguous numbers follow the given separator
+        self.assertEqual(normalize_number('12.5', decimal=','), '12.5')
+
+    def test_parse_amount(self):
+        """Currency, units and every negative notation are handled."""
+        self.assertEqual(parse_amount('(3.500,00)'), -3500.0)
+        self.assertEqual(parse_amount('1,234.56-'), -1234.56)
+        self.assertEqual(parse_amount('₪ 12,50'), 12.5)
+        self.assertEqual(parse_amount('−7,00'), -7.0)
+        self.assertEqual(parse_amount(42), 42.0)
+        self.assertIsNone(parse_amount('n/a'))
+        self.assertIsNone(parse_amount(None))
+
+    def test_column_matches_scalar(self):
+        """Column conversion gives the same result as parsing each value with the column's separator."""
+        for decimal in (None, ',', '.'):
+            column = parse_amounts(SAMPLES, decimal)
+            expected = [parse_amount(value, decimal or detect_decimal(SAMPLES)) for value in SAMPLES]
+            for got, want, value in zip(column, expected, SAMPLES):
+                if want is None:
+                    self.assertTrue(np.isnan(got), value)
+                else:
+                    self.assertEqual(got, want, value)
+
+    def test_locale_detection(self):
+        """Unambiguous numbers settle the separator of their column or document."""
+        self.assertEqual(detect_decimal(['1.000', '2.500,75']), ',')
+        self.assertEqual(detect_decimal(['1,000', '2,500.75']), '.')
+        self.assertIsNone(detect_decimal(['1,000', '20']))
+        self.assertEqual(list(parse_amounts(['1.000', '2.500,75'])), [1000.0, 2500.75])
+        # Dotted dates are not numbers
+        self.assertEqual(detect_document_decimal('03.01.2024 Miete 1.250 Stk 1.234,56'), ',')
+        self.assertIsNone(detect_document_decimal('03.01.2024 15.03.24 ref 1,250'))
+
+    def test_numeric_columns(self):
+        """Each column is detected on its own; ambiguous columns follow the table."""
+        table = pd.DataFrame({
+            'name': ['A', 'B'],
+            'quantity': ['1.000', '10'],
+            'price': ['150,25', '3,5'],
+            'value': ['1.234,50', '35,00']
+        })
+        converted = parse_numeric_columns(table, ['quantity', 'price', 'value'])
+        self.assertEqual(converted['quantity'].tolist(), [1000.0, 10.0])
+        self.assertEqual(converted['price'].tolist(), [150.25, 3.5])
+        self.assertEqual(converted['value'].tolist(), [1234.5, 35.0])
+        self.assertEqual(table['price'].tolist(), ['150,25', '3,5'])
+
+    def test_securities_table(self):
+        """Securities tables in European format are read correctly."""
+        processor = SecuritiesPDFProcessor.__new__(SecuritiesPDFProcessor)
+        securities = processor._process_table([
+            ['Security Name', 'ISIN', 'Quantity', 'Price', 'Market Value'],
+            ['Apple Inc', 'US0378331005', '1.000', '150,25', '150.250,00']
+        ])
+        self.assertEqual([(s['quantity'], s['price'], s['market_value']) for s in securities],
+                         [(1000.0, 150.25, 150250.0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import logging
+import numpy as np
+import pandas as pd
+from utils.returns_engine import ReturnsEngine, returns_covariance, covariance_to_correlation
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestReturnsEngine(unittest.TestCase):
+    """Test the returns and correlation engine."""
+    
+    def setUp(self):
+        """Set up the test environment."""
+        self.engine = ReturnsEngine(frequency='monthly')
+        
+        # Monthly snapshots for two securities; Tesla is only reported from February
+        self.historical = []
+        prices = {
+            'US0378331005': [145.0, 148.0, 155.0, 150.0],
+            'US5949181045': [250.0, 255.0, 270.0, 262.0],
+            'US88160R1014': [None, 200.0, 180.0, 190.0]
+        }
+        dates = ['2023-01-31', '2023-02-28', '2023-03-31', '2023-04-30']
+        for isin, series in prices.items():
+            for date, price in zip(dates, series):
+                if price is not None:
+                    self.historical.append({
+                        'date': date,
+                        'isin': isin,
+                        'price': price,
+                        'quantity': 10,
+                        'market_value': price * 10,
+                        'bank': 'Morgan Stanley'
+                    })
+    
+    def test_compute_returns(self):
+        """Test aligned period returns per ISIN."""
+        returns = self.engine.compute_returns(self.historical)
+        
+        self.assertEqual(list(returns.index), ['2023-02', '2023-03', '2023-04'])
+        self.assertAlmostEqual(returns.loc['2023-02', 'US0378331005'], 148.0 / 145.0 - 1)
+        self.assertTrue(np.isnan(returns.loc['2023-02', 'US88160R1014']))
+        self.assertAlmostEqual(returns.loc['2023-03', 'US88160R1014'], -0.1)
+    
+    def test_price_falls_back_to_market_value(self):
+        """Test that unit prices are implied from market value and quantity."""
+        snapshots = [
+            {'date': '2023-01-31', 'isin': 'IL0006625771', 'quantity': 100, 'market_value': 1000.0},
+            {'date': '2023-02-28', 'isin': 'IL0006625771', 'quantity': 100, 'market_value': 1100.0}
+        ]
+        returns = self.engine.compute_returns(snapshots)
+        self.assertAlmostEqual(returns.iloc[0]['IL0006625771'], 0.1)
+    
+    def test_correlation_matches_pandas(self):
+        """Test that the NumPy correlation matches pandas pairwise correlation."""
+        returns = self.engine.compute_returns(self.historical)
+        expected = returns.corr(min_periods=2)
+        
+        actual = self.engine.correlation_matrix(self.historical)
+        
+        pd.testing.assert_frame_equal(actual, expected, check_names=False, atol=1e-9)
+    
+    def test_date_window_and_cache(self):
+        """Test date window filtering and per-window caching."""
+        full = self.engine.compute_returns(self.historical)
+        windowed = self.engine.compute_returns(self.historical, start_date='2023-02-01')
+        
+        self.assertEqual(len(full), 3)
+        self.assertEqual(len(windowed), 2)
+        
+        # Same window returns the cached frame
+        self.assertIs(self.engine.compute_returns(self.historical, start_date='2023-02-01'), windowed)
+        
+        self.engine.clear_cache()
+        self.assertIsNot(self.engine.compute_returns(self.historical, start_date='2023-02-01'), windowed)
+    
+    def test_shrinkage(self):
+        """Test covariance shrinkage towards a scaled identity."""
+        returns = self.engine.compute_returns(self.historical)
+        sample = returns_covariance(returns)
+        
+        full_shrink = returns_covariance(returns, shrinkage=1.0)
+        off_diagonal = full_shrink.to_numpy()[~np.eye(3, dtype=bool)]
+        self.assertTrue(np.allclose(off_diagonal, 0.0))
+        
+        half_shrink = returns_covariance(returns, shrinkage=0.5)
+        self.assertAlmostEqual(
+            half_shrink.iloc[0, 1],
+            0.5 * sample.iloc[0, 1]
+        )
+        
+        lw = covariance_to_correlation(returns_covariance(returns, shrinkage='ledoit_wolf'))
+        self.assertTrue(np.allclose(np.diag(lw.to_numpy()), 1.0))
+        self.assertTrue((lw.abs().to_numpy() <= 1.0).all())
+        
+        with self.assertRaises(ValueError):
+            returns_covariance(returns, shrinkage=1.5)
+    
+    def test_large_universe(self):
+        """Test that thousands of securities are handled in one pass."""
+        rng = np.random.default_rng(42)
+        returns = pd.DataFrame(rng.normal(0, 0.05, size=(24, 2000)))
+        returns[returns.abs() > 0.1] = np.nan
+        
+        correlation = covariance_to_correlation(returns_covariance(returns, shrinkage='ledoit_wolf'))
+        
+        self.assertEqual(correlation.shape, (2000, 2000))
+        self.assertTrue(np.allclose(np.diag(correlation.to_numpy()), 1.0))
+
+if __name__ == "__main__":
+    unittest.main()
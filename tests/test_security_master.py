@@ -0,0 +1,87 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import logging
+import pandas as pd
+from unittest.mock import patch
+from utils.security_master import SecurityMaster
+from utils.securities_pdf_processor import SecuritiesPDFProcessor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+UPLOAD = [
+    {'isin': 'US0378331005', 'security_name': 'Apple Inc.', 'symbol': 'AAPL'},
+    {'isin': 'US5949181045', 'security_name': 'Microsoft Corporation', 'symbol': 'MSFT'},
+    {'isin': 'IL0006046119', 'security_name': 'Bank Leumi Le-Israel'},
+    {'isin': 'XX1234567890', 'security_name': 'Unknown Fund'}
+]
+
+class TestSecurityMaster(unittest.TestCase):
+    """Test resolving security names to ISINs from earlier uploads."""
+
+    def setUp(self):
+        """Create a master in a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'security_master.json')
+        self.master = SecurityMaster(self.path)
+        self.master.learn(UPLOAD)
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_resolve(self):
+        """Names, spelling variants and tickers resolve; placeholder ISINs are not learned."""
+        self.assertEqual(len(self.master), 3)
+        self.assertEqual(self.master.resolve('APPLE INC'), ('US0378331005', 1.0))
+        self.assertEqual(self.master.resolve('msft')[0], 'US5949181045')
+        self.assertEqual(self.master.resolve('Microsoft Corp. Common Stock')[0], 'US5949181045')
+        self.assertEqual(self.master.resolve('Bank Leumi Le Israel Ltd')[0], 'IL0006046119')
+        self.assertEqual(self.master.resolve('Leumi Bank')[0], 'IL0006046119')
+        self.assertIsNone(self.master.resolve('Tesla Inc'))
+        self.assertIsNone(self.master.resolve('Unknown Fund'))
+
+    def test_persisted(self):
+        """The master is saved to disk and loaded with its aliases."""
+        self.master.add('US0378331005', aliases=['Apple Computer'])
+        self.master.save()
+        loaded = SecurityMaster(self.path)
+        self.assertEqual(loaded.securities, self.master.securities)
+        self.assertEqual(loaded.resolve('Apple Computer Inc')[0], 'US0378331005')
+        self.assertEqual(loaded.resolve('AAPL')[0], 'US0378331005')
+
+    def test_processor_consolidates_banks(self):
+        """A name without an ISIN gets the ISIN another bank reported for it, not a placeholder."""
+        processor = SecuritiesPDFProcessor.__new__(SecuritiesPDFProcessor)
+        with patch('utils.securities_pdf_processor.get_security_master', return_value=self.master):
+            first = processor._resolve_isins(processor._process_table([
+                ['Security Name', 'ISIN', 'Quantity', 'Price', 'Market Value'],
+                ['Tesla Inc', 'US88160R1014', '30', '225.30', '6,759.00']
+            ]))
+            table = pd.DataFrame({'Security': ['TESLA INC.', 'Obscure Fund'], 'Quantity': ['10', '5'],
+                                  'Price': ['225.30', '12.00']})
+            second = processor._process_pdf_tables([table], bank_name='Leumi')
+        self.assertEqual(first[0]['isin'], 'US88160R1014')
+        self.assertEqual(second[0]['isin'], 'US88160R1014')
+        self.assertTrue(second[1]['isin'].startswith('XX'))
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_lookup_is_fast(self):
+        """Fuzzy lookups in a large master take well under a millisecond each."""
+        master = SecurityMaster()
+        for number in range(20000):
+            master.add(f"US{number:09d}{number % 10}", f"Company {number} Holdings Group")
+        names = [f"COMPANY {number} HOLDINGS GRP." for number in range(0, 20000, 20)]
+        start = time.perf_counter()
+        matches = [master.resolve(name) for name in names]
+        elapsed = time.perf_counter() - start
+        logger.info(f"Resolved {len(names)} names in {elapsed:.3f}s")
+        self.assertEqual([match[0] for match in matches[:3]], ['US0000000000', 'US0000000200', 'US0000000400'])
+        self.assertLess(elapsed / len(names), 0.005)
+
+if __name__ == '__main__':
+    unittest.main()
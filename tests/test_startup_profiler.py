@@ -0,0 +1,43 @@
+import os
+import unittest
+import logging
+from utils.startup_profiler import ENTRY_POINTS, DEFAULT_STARTUP_BUDGET, parse_importtime, profile_entry_point
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Cold start threshold per entry point; raise it on slow CI machines
+STARTUP_BUDGET_SECONDS = float(os.getenv('STARTUP_BUDGET_SECONDS', DEFAULT_STARTUP_BUDGET))
+
+class TestStartupProfiler(unittest.TestCase):
+    """Test the startup profiler and the cold start benchmark."""
+
+    def test_parse_importtime(self):
+        """Import time lines are parsed with their nesting depth."""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     _io\n"
+            "import time:      1500 |       2500 |   flask\n"
+            "import time:      1000 |       1000 | utils.job_queue\n"
+            "unrelated output\n"
+        )
+        modules = parse_importtime(stderr)
+
+        self.assertEqual([m['module'] for m in modules], ['_io', 'flask', 'utils.job_queue'])
+        self.assertEqual([m['depth'] for m in modules], [2, 1, 0])
+        self.assertEqual(modules[1]['self_ms'], 1.5)
+        self.assertEqual(modules[1]['cumulative_ms'], 2.5)
+
+    def test_cold_start_benchmark(self):
+        """Entry points start within the budget without loading heavy backends."""
+        for entry in ENTRY_POINTS:
+            with self.subTest(entry=entry):
+                report = profile_entry_point(entry, top=5)
+                self.assertNotIn('error', report)
+                logger.info(f"{entry} cold start: {report['wall_seconds']:.2f}s")
+                self.assertEqual(report['heavy_modules_loaded'], [])
+                self.assertLess(report['wall_seconds'], STARTUP_BUDGET_SECONDS)
+
+if __name__ == '__main__':
+    unittest.main()
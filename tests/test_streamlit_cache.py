@@ -0,0 +1,48 @@
+import unittest
+import logging
+from unittest.mock import Mock, patch
+from utils import streamlit_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestStreamlitCache(unittest.TestCase):
+    """Test the Streamlit caching layer."""
+
+    def setUp(self):
+        """Start every test with empty caches."""
+        streamlit_cache.clear_data_caches()
+        streamlit_cache.clear_resource_caches()
+
+        self.processor = Mock()
+        self.processor.process_financial_document.return_value = ([{'amount': 10.0}], 'transactions')
+
+    def test_file_hash_depends_on_content(self):
+        """Identical content gets the same key, different content a different one."""
+        self.assertEqual(streamlit_cache.file_hash(b'abc'), streamlit_cache.file_hash(b'abc'))
+        self.assertNotEqual(streamlit_cache.file_hash(b'abc'), streamlit_cache.file_hash(b'abd'))
+
+    def test_processing_is_cached_by_file_hash(self):
+        """The same file is processed once; a new file is processed again."""
+        with patch.object(streamlit_cache, 'get_pdf_processor', return_value=self.processor):
+            first = streamlit_cache.cached_process_document(streamlit_cache.file_hash(b'one'), b'one', 'statement')
+            second = streamlit_cache.cached_process_document(streamlit_cache.file_hash(b'one'), b'one', 'statement')
+            self.assertEqual(first, second)
+            self.assertEqual(self.processor.process_financial_document.call_count, 1)
+
+            streamlit_cache.cached_process_document(streamlit_cache.file_hash(b'two'), b'two', 'statement')
+            self.assertEqual(self.processor.process_financial_document.call_count, 2)
+
+    def test_clear_data_caches_forces_reprocessing(self):
+        """Clearing the data caches makes the next call reprocess the file."""
+        content_hash = streamlit_cache.file_hash(b'one')
+        with patch.object(streamlit_cache, 'get_pdf_processor', return_value=self.processor):
+            streamlit_cache.cached_process_document(content_hash, b'one', 'statement')
+            streamlit_cache.clear_data_caches()
+            streamlit_cache.cached_process_document(content_hash, b'one', 'statement')
+
+        self.assertEqual(self.processor.process_financial_document.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
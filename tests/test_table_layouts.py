@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+import pdfplumber
+import yaml
+from utils.synthetic_statements import generate_statement
+from utils.data_storage import init_db
+from utils.table_layouts import TableLayout, TableLayoutCache, extract_page_tables
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestTableLayouts(unittest.TestCase):
+    """Test per-institution table layouts."""
+
+    def setUp(self):
+        """Create a statement and an empty templates directory."""
+        self.work_dir = tempfile.mkdtemp()
+        self.templates_dir = os.path.join(self.work_dir, 'templates')
+        os.makedirs(self.templates_dir)
+        self.pdf_path = os.path.join(self.work_dir, 'statement.pdf')
+        generate_statement(self.pdf_path, pages=3, tables_per_page=2, rows_per_table=8, hebrew_ratio=0.3)
+
+    def tearDown(self):
+        """Remove generated files."""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_learned_layout_matches_full_search(self):
+        """A layout learned from the first page extracts the same tables on later pages."""
+        cache = TableLayoutCache(templates_dir=self.templates_dir)
+        with pdfplumber.open(self.pdf_path) as pdf:
+            expected = [page.extract_tables() for page in pdf.pages]
+
+            self.assertEqual(extract_page_tables(pdf.pages[0], 'Synthetic Bank', cache), expected[0])
+            layout = cache.get('synthetic_bank')
+            self.assertIsNotNone(layout)
+            self.assertEqual(layout.source, 'learned')
+            self.assertEqual(layout.row_strategy, 'lines')
+            self.assertEqual(len(layout.columns), 5)
+
+            for page, tables in zip(pdf.pages[1:], expected[1:]):
+                self.assertEqual(layout.extract(page), tables)
+
+    def test_unmatched_layout_falls_back_to_search(self):
+        """Pages without the layout's header are searched for tables."""
+        cache = TableLayoutCache(templates_dir=self.templates_dir)
+        cache.add(TableLayout('Other Bank', ['Security', 'ISIN'], [50, 300, 562]))
+
+        with pdfplumber.open(self.pdf_path) as pdf:
+            tables = extract_page_tables(pdf.pages[0], 'Other Bank', cache)
+        self.assertEqual(len(tables), 2)
+        self.assertEqual(cache.get('Other Bank').source, 'template')
+
+    def test_layouts_from_yaml_and_db(self):
+        """Layouts are read from template files and from the templates table."""
+        with open(os.path.join(self.templates_dir, 'synthetic.yaml'), 'w', encoding='utf-8') as f:
+            yaml.safe_dump({
+                'name': 'synthetic_template',
+                'institution': 'Synthetic Bank',
+                'table_layout': {
+                    'header_anchors': ['Date', 'Amount'],
+                    'columns': [50, 130, 380, 470, 562],
+                    'row_strategy': 'text'
+                }
+            }, f)
+
+        db_url = f"sqlite:///{os.path.join(self.work_dir, 'layouts.db')}"
+        init_db(db_url)
+        TableLayoutCache(db_url=db_url).save(TableLayout('Leumi', ['Date', 'Amount'], [40, 100, 200]))
+
+        cache = TableLayoutCache(templates_dir=self.templates_dir, db_url=db_url)
+        self.assertEqual(cache.get('synthetic_template').row_strategy, 'text')
+        self.assertEqual(cache.get('SYNTHETIC BANK').columns, [50, 130, 380, 470, 562])
+        self.assertEqual(cache.get('leumi').source, 'db')
+        self.assertIsNone(cache.get('Unknown Bank'))
+
+        with pdfplumber.open(self.pdf_path) as pdf:
+            tables = cache.get('Synthetic Bank').extract(pdf.pages[0])
+        self.assertEqual(len(tables), 2)
+        self.assertEqual(tables[0][0], ['Date', 'Description', 'Amount', 'Balance'])
+        self.assertEqual(len(tables[0]), 9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import unittest
+import logging
+from utils.processors.template_engine import CompiledTemplate
+from utils.processors.enhanced_securities_processor import EnhancedSecuritiesProcessor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'templates')
+
+STATEMENT_TEXT = """Securities Statement
+Portfolio Summary
+Apple Inc US0378331005 quantity: 100 price: 150.25 market value: 15,025.00
+Microsoft Corp US5949181045 quantity: 50 price: 300.10 market value: 15,005.00
+Tesla Inc US88160R1014
+shares: 10 rate: 250.00
+End of Statement
+"""
+
+class TestTemplateEngine(unittest.TestCase):
+    """Test compiled template extraction."""
+
+    def setUp(self):
+        """Load the repository templates."""
+        self.processor = EnhancedSecuritiesProcessor('sqlite://', TEMPLATES_DIR, 'unused.pkl')
+
+    def test_templates_compiled_at_load(self):
+        """Every template file is compiled into one combined pattern."""
+        self.assertIn('generic_bank_template', self.processor.templates)
+        template = self.processor.templates['generic_bank_template']
+        self.assertIsInstance(template, CompiledTemplate)
+        self.assertEqual(template.key_field, 'isin')
+
+    def test_whole_records(self):
+        """Name, ISIN and amounts of a holding end up in the same record."""
+        records = self.processor._process_with_template(
+            STATEMENT_TEXT, self.processor.templates['generic_bank_template'])
+
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0], {
+            'isin': 'US0378331005',
+            'security_name': 'Apple Inc',
+            'quantity': 100.0,
+            'price': 150.25,
+            'market_value': 15025.0
+        })
+        self.assertEqual(records[1]['security_name'], 'Microsoft Corp')
+        # Values on the following line join the record above
+        self.assertEqual(records[2]['quantity'], 10.0)
+        self.assertEqual(records[2]['price'], 250.0)
+
+    def test_process_document_chooses_template(self):
+        """Without an institution, the template is chosen from the first page."""
+        self.processor.model = None
+        records = self.processor.process_document(STATEMENT_TEXT)
+        self.assertEqual([r['isin'] for r in records], ['US0378331005', 'US5949181045', 'US88160R1014'])
+        self.assertEqual(len(self.processor.process_document(STATEMENT_TEXT, institution='Generic Bank')), 3)
+
+    def test_validation_and_required_fields(self):
+        """Values failing validation are dropped, as are records missing required fields."""
+        template = CompiledTemplate({
+            'name': 'test',
+            'fields': [
+                {'name': 'isin', 'required': True, 'patterns': [r'\b[A-Z]{2}[A-Z0-9]{10}\b']},
+                {'name': 'quantity', 'field_type': 'float', 'patterns': [r'qty (-?\d+)'],
+                 'validation_rules': [{'type': 'range', 'min': 0}]},
+                {'name': 'currency', 'required': True, 'ignore_case': True, 'patterns': [r'ccy (\w{3})']}
+            ]
+        })
+        records = template.extract("US0378331005 qty -5 CCY USD\nUS5949181045 qty 7\n\n\n\nIL0011111111")
+
+        self.assertEqual(records, [{'isin': 'US0378331005', 'currency': 'USD'}])
+
+    def test_large_text(self):
+        """Multi-megabyte text is processed in a single scan."""
+        text = STATEMENT_TEXT * 15000
+        records = self.processor.templates['generic_bank_template'].extract(text)
+        self.assertEqual(len(records), 45000)
+
+if __name__ == '__main__':
+    unittest.main()
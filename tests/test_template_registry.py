@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+import yaml
+from utils.processors.template_registry import TemplateRegistry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ISIN_FIELD = {'name': 'isin', 'required': True, 'patterns': [r'[A-Z]{2}[A-Z0-9]{10}']}
+
+class TestTemplateRegistry(unittest.TestCase):
+    """Test template lookup, scoring and hot reload."""
+
+    def setUp(self):
+        """Create a templates directory with two banks."""
+        self.templates_dir = tempfile.mkdtemp()
+        self.write_template('leumi.yaml', {
+            'name': 'leumi_template',
+            'institution': 'Bank Leumi',
+            'aliases': ['Leumi', 'בנק לאומי'],
+            'fields': [ISIN_FIELD],
+            'layout_markers': {'header': ['Leumi Trade', 'Page [0-9]+ of [0-9]+']},
+            'sample_identifiers': ['portfolio', 'securities']
+        })
+        self.write_template('discount.yaml', {
+            'name': 'discount_template',
+            'institution': 'Discount Bank',
+            'fields': [ISIN_FIELD],
+            'sample_identifiers': ['portfolio', 'holdings']
+        })
+        self.registry = TemplateRegistry(self.templates_dir, reload_interval=0)
+
+    def tearDown(self):
+        """Remove the templates directory."""
+        shutil.rmtree(self.templates_dir, ignore_errors=True)
+
+    def write_template(self, filename, template):
+        with open(os.path.join(self.templates_dir, filename), 'w', encoding='utf-8') as f:
+            yaml.safe_dump(template, f, allow_unicode=True)
+
+    def test_lookup_by_alias(self):
+        """Templates are found by name, institution and aliases in any spelling."""
+        for name in ('leumi_template', 'leumi', 'Bank Leumi', 'BANK_LEUMI', 'בנק לאומי'):
+            with self.subTest(name=name):
+                self.assertEqual(self.registry.get(name).name, 'leumi_template')
+        self.assertEqual(self.registry.get('discount').name, 'discount_template')
+        self.assertIsNone(self.registry.get('Hapoalim'))
+
+    def test_best_match_scoring(self):
+        """The first page's aliases, markers and identifiers choose the template."""
+        leumi_page = "Leumi Trade\nSecurities portfolio\nPage 1 of 3\n\fDiscount Bank holdings"
+        discount_page = "Discount Bank\nPortfolio holdings"
+
+        self.assertEqual(self.registry.best_match(leumi_page).name, 'leumi_template')
+        self.assertEqual(self.registry.best_match(discount_page).name, 'discount_template')
+        scores = dict(self.registry.score("portfolio holdings"))
+        self.assertEqual(scores, {'discount_template': 2, 'leumi_template': 1})
+        self.assertIsNone(self.registry.best_match("Unrelated letter"))
+
+    def test_hot_reload(self):
+        """Added, changed and removed files are picked up without recreating the registry."""
+        self.write_template('hapoalim.yaml', {
+            'name': 'hapoalim_template',
+            'institution': 'Bank Hapoalim',
+            'fields': [ISIN_FIELD]
+        })
+        self.assertEqual(self.registry.get('hapoalim').name, 'hapoalim_template')
+
+        self.write_template('hapoalim.yaml', {
+            'name': 'hapoalim_template',
+            'institution': 'Bank Hapoalim',
+            'aliases': ['Poalim'],
+            'fields': [ISIN_FIELD]
+        })
+        self.assertEqual(self.registry.get('poalim').name, 'hapoalim_template')
+
+        # A file that no longer loads keeps its previous version
+        with open(os.path.join(self.templates_dir, 'hapoalim.yaml'), 'w', encoding='utf-8') as f:
+            f.write("name: [broken")
+        self.assertIsNotNone(self.registry.get('poalim'))
+
+        os.remove(os.path.join(self.templates_dir, 'hapoalim.yaml'))
+        self.assertIsNone(self.registry.get('poalim'))
+        self.assertEqual(sorted(self.registry.templates), ['discount_template', 'leumi_template'])
+
+if __name__ == '__main__':
+    unittest.main()
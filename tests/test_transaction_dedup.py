@@ -0,0 +1,85 @@
+import time
+import random
+import unittest
+import logging
+from utils.transaction_dedup import TransactionIndex, add_transactions
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+JANUARY = [
+    {'date': '2024-01-05', 'description': 'Coffee Shop 1234', 'amount': -12.5},
+    {'date': '2024-01-05', 'description': 'Coffee Shop 1234', 'amount': -12.5},
+    {'date': '2024-01-10', 'description': 'Rent', 'amount': -4500.0},
+    {'date': '2024-01-28', 'description': 'Salary', 'amount': 12000.0}
+]
+
+class TestTransactionDedup(unittest.TestCase):
+    """Test deduplication of transactions from overlapping statements."""
+
+    def test_reupload_adds_nothing(self):
+        """A statement uploaded twice is counted once, including repeated identical rows."""
+        index = TransactionIndex()
+        self.assertEqual(len(index.ingest(JANUARY)), 4)
+        self.assertEqual(index.ingest(JANUARY), [])
+        self.assertEqual(index.duplicates, 4)
+        self.assertEqual(len(index), 4)
+
+    def test_overlapping_statement_in_other_format(self):
+        """Overlap matches across date formats, number formats, shifted dates and reference numbers."""
+        index = TransactionIndex()
+        index.ingest(JANUARY)
+        overlap = [
+            {'date': '06/01/2024', 'description': 'COFFEE SHOP #9876', 'amount': '-12,50'},
+            {'date': '10/01/2024', 'description': 'Rent', 'amount': '-4.500,00'},
+            {'date': '03/02/2024', 'description': 'Rent', 'amount': '-4.500,00'}
+        ]
+        added = index.ingest(overlap)
+        self.assertEqual([t['date'] for t in added], ['03/02/2024'])
+
+    def test_different_transactions_kept(self):
+        """Different amounts, accounts, far-apart dates and unrelated descriptions are not duplicates."""
+        index = TransactionIndex()
+        index.ingest(JANUARY, account='checking')
+        candidates = [
+            {'date': '2024-01-05', 'description': 'Coffee Shop', 'amount': -13.5},
+            {'date': '2024-01-20', 'description': 'Rent', 'amount': -4500.0},
+            {'date': '2024-01-10', 'description': 'Car insurance', 'amount': -4500.0}
+        ]
+        self.assertEqual(len(index.ingest(candidates, account='checking')), 3)
+        self.assertEqual(len(index.ingest(JANUARY, account='savings')), 4)
+
+    def test_session_state(self):
+        """Stored lists keep one copy of each transaction and survive being cleared."""
+        state = {}
+        add_transactions(state, JANUARY)
+        added = add_transactions(state, JANUARY[2:] + [{'date': '2024-02-01', 'description': 'Fuel', 'amount': -250}])
+        self.assertEqual(len(added), 1)
+        self.assertEqual(len(state['transactions']), 5)
+
+        state['transactions'] = []
+        self.assertEqual(len(add_transactions(state, JANUARY)), 4)
+
+    def test_bulk_ingest_scales(self):
+        """Ingest time grows close to linearly with the number of transactions."""
+        rng = random.Random(3)
+
+        def batch(count):
+            return [{'date': f'2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+                     'description': rng.choice(['Coffee', 'Rent', 'Supermarket', 'Fuel', 'Pharmacy']),
+                     'amount': -round(rng.uniform(1, 50), 2)} for _ in range(count)]
+
+        def timed(transactions):
+            index = TransactionIndex()
+            index.ingest(transactions)
+            start = time.perf_counter()
+            index.ingest(transactions)
+            return time.perf_counter() - start
+
+        small = timed(batch(2000))
+        large = timed(batch(20000))
+        self.assertLess(large, small * 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import logging
+from utils.transaction_tokenizer import TransactionTokenizer
+from utils.benchmark import benchmark_tokenizer
+from utils.mistral_extractor import MistralExtractor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TestTransactionTokenizer(unittest.TestCase):
+    """Test the shared transaction tokenizer."""
+
+    def setUp(self):
+        """Create a tokenizer without a known decimal convention."""
+        self.tokenizer = TransactionTokenizer()
+
+    def test_document_decimal(self):
+        """Ambiguous amounts follow the decimal separator of the rest of the document."""
+        european = '01.02.2024 Miete 1.250 Stk 1.234,56\n02.02.2024 Kaffee 3,50 1.231,06'
+        first = next(self.tokenizer.iter_lines(european))
+        self.assertEqual([token.value for token in first.amounts], [1250.0, 1234.56])
+        self.assertEqual(TransactionTokenizer(decimal='.').tokenize_line('Fee 1.250').amounts[0].value, 1.25)
+
+    def test_negative_amounts(self):
+        """Leading minus, trailing minus and parentheses mark negative amounts."""
+        line = self.tokenizer.tokenize_line('01/02/2024 x -1,000.00 y 250.00- z (3.500,00) ₪ 12.00')
+        self.assertEqual([token.value for token in line.amounts], [-1000.0, -250.0, -3500.0, 12.0])
+
+    def test_single_scan_without_overlap(self):
+        """Dates, identifiers and amounts are each read once."""
+        line = self.tokenizer.tokenize_line('| 15.03.2024 | IL0011111111 Bond | 1.234,56 | 10.000,00 |')
+        self.assertEqual(line.date, '15.03.2024')
+        self.assertEqual([token.value for token in line.amounts], [1234.56, 10000.0])
+        self.assertEqual(line.description, 'IL0011111111 Bond')
+
+    def test_hebrew_line(self):
+        """Bidirectional marks from RTL extraction do not break tokens."""
+        line = self.tokenizer.tokenize_line('‫03/01/2024 משכורת ‏12,500.00 ש"ח‬')
+        self.assertEqual(line.date, '03/01/2024')
+        self.assertEqual(line.amounts[0].value, 12500.0)
+        self.assertEqual(line.description, 'משכורת')
+
+    def test_extract_transactions(self):
+        """A second money amount on a line is the balance; undated lines are skipped."""
+        text = '\n'.join([
+            '01/01/2024 Opening balance 5,000.00',
+            '02/01/2024 Supermarket -150.25 4,849.75',
+            'Page 1 of 2',
+            'Total 150.25'
+        ])
+        transactions = self.tokenizer.extract_transactions(text)
+        self.assertEqual([(t['amount'], t['balance']) for t in transactions], [(5000.0, None), (-150.25, 4849.75)])
+        self.assertEqual(len(self.tokenizer.extract_transactions(text, require_date=False)), 4)
+
+    def test_mistral_extractor_counts_each_row_once(self):
+        """Table rows are no longer matched by several overlapping patterns."""
+        extractor = MistralExtractor.__new__(MistralExtractor)
+        text = '05/01/2024 Rent -4,500.00 5,500.00\n| 06/01/2024 | Salary | 12.000,00 | 17.500,00 |'
+        data = extractor.extract_financial_data(text, 'statement.pdf')
+        self.assertEqual([(t['date'], t['amount']) for t in data['transactions']],
+                         [('2024-01-05', -4500.0), ('2024-01-06', 12000.0)])
+        self.assertEqual(data['summary']['total_income'], 12000.0)
+        self.assertEqual(data['summary']['balance'], 17500.0)
+
+    def test_benchmark_accuracy(self):
+        """Every synthetic line in every number format is extracted correctly."""
+        result = benchmark_tokenizer(count=600, iterations=1)
+        self.assertEqual(result['transactions_extracted'], 600)
+        self.assertEqual(result['accuracy'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,17 @@
-from .pdf_integration import PDFProcessingIntegration
-from .securities_pdf_processor import SecuritiesPDFProcessor
+import importlib
+
+# Exported classes are resolved on first access, so importing any utils
+# submodule does not pull in the PDF and Gemini stacks
+_LAZY_EXPORTS = {
+    'PDFProcessingIntegration': '.pdf_integration',
+    'SecuritiesPDFProcessor': '.securities_pdf_processor',
+}
 
 __all__ = ['PDFProcessingIntegration', 'SecuritiesPDFProcessor']
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
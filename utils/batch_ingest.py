@@ -0,0 +1,273 @@
+import os
+import sys
+import time
+import signal
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Run with: python -m utils.batch_ingest FOLDER [--workers N] [--timeout S] [--bank NAME] [--db URL]
+#
+# Walks a folder tree of statement PDFs, skips files whose content was already
+# ingested, processes the rest in a process pool and writes the securities to
+# the holdings database.
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_URL = f"sqlite:///{os.path.join(_PROJECT_ROOT, 'data', 'db', 'securities.db')}"
+
+DEFAULT_TIMEOUT = 300
+STATEMENT_EXTENSIONS = ('.pdf',)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+STATUS_SUCCESS = 'success'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+
+# Per-process processor, created once by the pool initializer
+_processor = None
+
+
+def find_statements(root: str, extensions=STATEMENT_EXTENSIONS) -> Iterator[str]:
+    """
+    Walk a folder tree for statement files.
+
+    Args:
+        root: Folder to search
+        extensions: File extensions to include
+
+    Yields:
+        File paths in sorted order
+    """
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extensions):
+                yield os.path.join(directory, filename)
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _init_worker():
+    """Create the processor once per worker process."""
+    global _processor
+    from utils.securities_pdf_processor import SecuritiesPDFProcessor
+
+    _processor = SecuritiesPDFProcessor()
+
+
+class _FileTimeout(BaseException):
+    """Raised by the alarm; not an Exception, so processors' broad handlers do not swallow it."""
+
+
+def _raise_timeout(signum, frame):
+    raise _FileTimeout()
+
+
+def ingest_file(path: str, timeout: Optional[float] = DEFAULT_TIMEOUT, bank: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract the securities of one statement; runs in a worker process.
+
+    Args:
+        path: Statement path
+        timeout: Seconds before the file is abandoned (POSIX only)
+        bank: Bank the statement comes from
+
+    Returns:
+        Dictionary with status, securities, pages, seconds and error
+    """
+    from utils.mistral_extractor import count_pdf_pages
+
+    if _processor is None:
+        _init_worker()
+
+    start = time.perf_counter()
+    use_alarm = bool(timeout) and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    try:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        pages = count_pdf_pages(path)
+        securities = _processor.process_pdf(path)
+        for security in securities:
+            security.setdefault('bank', bank)
+        status, error = STATUS_SUCCESS, None
+    except _FileTimeout:
+        pages, securities, status, error = 0, [], STATUS_TIMEOUT, f"Timed out after {timeout}s"
+    except Exception as e:
+        pages, securities, status, error = 0, [], STATUS_ERROR, str(e)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    return {
+        'path': path,
+        'status': status,
+        'securities': securities,
+        'pages': pages or 0,
+        'seconds': time.perf_counter() - start,
+        'error': error
+    }
+
+
+def run_batch(root: str, store, workers: Optional[int] = None, timeout: Optional[float] = DEFAULT_TIMEOUT,
+              bank: Optional[str] = None, progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+    """
+    Ingest every new statement under a folder.
+
+    Files are hashed in this process and only files with unseen content are
+    sent to the pool. At most two files per worker are in flight, so memory
+    stays flat for folders of any size. Results are written by this process
+    only, as each file finishes.
+
+    Args:
+        root: Folder of statements
+        store: HoldingsStore to write to
+        workers: Worker processes (default: CPU count)
+        timeout: Per-file timeout in seconds
+        bank: Bank the statements come from
+        progress_callback: Optional function called with (current, total, message)
+
+    Returns:
+        Throughput statistics
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    paths = list(find_statements(root))
+    known = store.ingested_hashes()
+
+    stats = {
+        'files_found': len(paths), 'skipped': 0, 'ingested': 0, 'failed': 0, 'timed_out': 0,
+        'pages': 0, 'securities': 0
+    }
+    pending = []
+    for path in paths:
+        try:
+            content_hash = hash_file(path)
+        except OSError as e:
+            logger.error(f"Cannot read {path}: {str(e)}")
+            stats['failed'] += 1
+            continue
+        if content_hash in known:
+            stats['skipped'] += 1
+            continue
+        # The same content under two names is ingested once
+        known.add(content_hash)
+        pending.append((path, content_hash))
+
+    total = len(pending)
+    done = 0
+    if progress_callback:
+        progress_callback(0, total, f"{total} new files, {stats['skipped']} skipped")
+
+    def record(path, content_hash, result):
+        nonlocal done
+        done += 1
+        status = result['status']
+        if status == STATUS_SUCCESS:
+            stats['ingested'] += 1
+            stats['pages'] += result['pages']
+            stats['securities'] += len(result['securities'])
+        elif status == STATUS_TIMEOUT:
+            stats['timed_out'] += 1
+        else:
+            stats['failed'] += 1
+        try:
+            store.save_file(content_hash, path, result['securities'], status=status, bank=bank,
+                            pages=result['pages'], seconds=result['seconds'], error=result['error'])
+        except Exception as e:
+            logger.error(f"Error saving results for {path}: {str(e)}")
+        if status != STATUS_SUCCESS:
+            logger.warning(f"{path}: {status} ({result['error']})")
+        if progress_callback:
+            progress_callback(done, total, f"{os.path.basename(path)}: {status}, "
+                                           f"{len(result['securities'])} securities")
+
+    if pending:
+        queue = iter(pending)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            in_flight = {}
+
+            def submit_next():
+                item = next(queue, None)
+                if item is None:
+                    return False
+                in_flight[executor.submit(ingest_file, item[0], timeout, bank)] = item
+                return True
+
+            for _ in range(workers * 2):
+                if not submit_next():
+                    break
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path, content_hash = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        raise RuntimeError(f"Worker process died while processing {path}") from e
+                    except Exception as e:
+                        result = {'status': STATUS_ERROR, 'securities': [], 'pages': 0, 'seconds': 0.0,
+                                  'error': str(e)}
+                    record(path, content_hash, result)
+                    submit_next()
+
+    elapsed = time.perf_counter() - start
+    stats.update({
+        'workers': workers,
+        'seconds': round(elapsed, 2),
+        'files_per_second': round(stats['ingested'] / elapsed, 2) if elapsed else 0.0,
+        'pages_per_second': round(stats['pages'] / elapsed, 2) if elapsed else 0.0
+    })
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from utils.data_storage import HoldingsStore
+
+    parser = argparse.ArgumentParser(description="Ingest a folder of statement PDFs into the holdings database")
+    parser.add_argument('folder', help="Folder to walk for statements")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Per-file timeout in seconds")
+    parser.add_argument('--bank', default=None, help="Bank the statements come from")
+    parser.add_argument('--db', default=os.getenv('DATABASE_URL', DEFAULT_DB_URL), help="Holdings database URL")
+    parser.add_argument('--quiet', action='store_true', help="Only print the summary")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not os.path.isdir(args.folder):
+        print(f"Folder not found: {args.folder}")
+        return 2
+
+    def progress(current, total, message):
+        if not args.quiet:
+            print(f"[{current}/{total}] {message}")
+
+    stats = run_batch(args.folder, HoldingsStore(args.db), workers=args.workers, timeout=args.timeout,
+                      bank=args.bank, progress_callback=progress)
+
+    print(f"Files: {stats['files_found']} found, {stats['ingested']} ingested, {stats['skipped']} skipped, "
+          f"{stats['failed']} failed, {stats['timed_out']} timed out")
+    print(f"Extracted {stats['securities']} securities from {stats['pages']} pages "
+          f"in {stats['seconds']}s with {stats['workers']} workers")
+    print(f"Throughput: {stats['files_per_second']} files/s, {stats['pages_per_second']} pages/s")
+
+    return 1 if stats['failed'] or stats['timed_out'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,391 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.instrumentation import timings
+from utils.synthetic_statements import LAYOUT_TABULAR, LAYOUT_TEXT, generate_statement, generate_transactions
+from utils.transaction_tokenizer import TransactionTokenizer
+from utils.numeric_parser import parse_amounts
+
+logger = logging.getLogger(__name__)
+
+# Run with: python -m utils.benchmark [--scenario NAME] [--iterations N] [--output FILE]
+#      or: python -m utils.benchmark --tokenizer [--lines N]
+#
+# Every scenario runs extraction, analysis and export end to end against the
+# offline LLM stub, so results depend only on this code and can be diffed
+# across versions.
+
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_ITERATIONS = 3
+DEFAULT_TOKENIZER_LINES = 20000
+
+# Number formats of the tokenizer benchmark: Hebrew/US, European, and
+# Hebrew statements with a trailing minus
+NUMBER_STYLES = ('hebrew', 'european', 'trailing_minus')
+
+SCENARIOS = {
+    'small_tabular': {'pages': 2, 'tables_per_page': 1, 'rows_per_table': 20, 'layout': LAYOUT_TABULAR},
+    'large_tabular': {'pages': 50, 'tables_per_page': 2, 'rows_per_table': 20, 'layout': LAYOUT_TABULAR},
+    'mixed_language': {'pages': 10, 'tables_per_page': 1, 'rows_per_table': 30, 'layout': LAYOUT_TABULAR,
+                       'hebrew_ratio': 0.5},
+    'text_only': {'pages': 10, 'tables_per_page': 1, 'rows_per_table': 30, 'layout': LAYOUT_TEXT},
+}
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _read_version() -> str:
+    try:
+        with open(os.path.join(_PROJECT_ROOT, 'VERSION'), encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return 'unknown'
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(percentile / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, where available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _json_safe(value: Any) -> Any:
+    """Convert analysis output (pandas Period keys, numpy scalars) to JSON types."""
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def table_transactions(content: Dict[str, Any], normalize_date) -> List[Dict[str, Any]]:
+    """
+    Build transactions from the Date/Description/Amount tables of extracted content.
+
+    Args:
+        content: Output of MistralExtractor.extract_all_content
+        normalize_date: Function converting statement dates to YYYY-MM-DD
+
+    Returns:
+        List of transaction dictionaries
+    """
+    transactions = []
+    for table in content.get('tables', []):
+        headers = [header.lower() for header in table.get('headers', [])]
+        if not {'date', 'description', 'amount'} <= set(headers):
+            continue
+        date_col, desc_col, amount_col = (headers.index(name) for name in ('date', 'description', 'amount'))
+
+        # Skip the markdown separator row and short rows
+        rows = [row for row in table.get('rows', [])
+                if len(row) >= len(headers) and not set(''.join(row)) <= set('-: ')]
+        amounts = parse_amounts([row[amount_col] for row in rows])
+        for row, amount in zip(rows, amounts.tolist()):
+            if np.isnan(amount):
+                continue
+            transactions.append({
+                'date': normalize_date(row[date_col]),
+                'description': row[desc_col],
+                'amount': amount
+            })
+    return transactions
+
+
+def process_statement(pdf_path: str, export_dir: str) -> Dict[str, Any]:
+    """
+    Run one statement through extraction, analysis and export.
+
+    Args:
+        pdf_path: Path of the statement PDF
+        export_dir: Directory for the exported report
+
+    Returns:
+        Dictionary with the page and transaction counts
+    """
+    from utils.mistral_extractor import MistralExtractor, clear_ocr_cache
+    from utils.pdf_integration import PDFProcessingIntegration
+    from utils.financial_analyzer import FinancialAnalyzer
+    from utils.export_utils import ReportExporter
+
+    # Measure the full pipeline, not the OCR cache
+    clear_ocr_cache()
+
+    extractor = MistralExtractor(api_key='offline')
+    content = extractor.extract_all_content(pdf_path)
+    if content is None:
+        raise RuntimeError(f"Extraction failed for {pdf_path}")
+
+    transactions = table_transactions(content, extractor._normalize_date)
+    if not transactions:
+        # No tables found: let the LLM read the page text, as for scanned statements
+        texts = [page['content'] for page in content['text']]
+        transactions = [
+            {**transaction, 'date': extractor._normalize_date(transaction['date'])}
+            for transaction in PDFProcessingIntegration()._process_text(texts)
+        ]
+
+    analyzer = FinancialAnalyzer()
+    for transaction, category in zip(transactions, analyzer.categorize_batch(transactions)):
+        transaction['category'] = category
+    summary = analyzer.generate_financial_summary(transactions)
+    trends = analyzer.analyze_spending_trends(transactions)
+
+    ReportExporter(export_dir).export_json(_json_safe({
+        'summary': summary,
+        'trends': trends,
+        'transactions': transactions
+    }), filename=f"{os.path.splitext(os.path.basename(pdf_path))[0]}.json")
+
+    return {
+        'pages': content['metadata']['total_pages'],
+        'transactions': len(transactions)
+    }
+
+
+def run_scenario(name: str, params: Dict[str, Any], iterations: int = DEFAULT_ITERATIONS,
+                 work_dir: Optional[str] = None, measure_memory: bool = True) -> Dict[str, Any]:
+    """
+    Benchmark one scenario.
+
+    Args:
+        name: Scenario name
+        params: Keyword arguments for generate_statement
+        iterations: Timed runs of the pipeline
+        work_dir: Directory for the generated statement and exports
+        measure_memory: Whether to do an extra run under tracemalloc
+
+    Returns:
+        Dictionary of throughput, latency and memory metrics
+    """
+    cleanup = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='benchmark_')
+    try:
+        pdf_path = os.path.join(work_dir, f"{name}.pdf")
+        manifest = generate_statement(pdf_path, **params)
+        export_dir = os.path.join(work_dir, 'exports')
+        os.makedirs(export_dir, exist_ok=True)
+
+        # Untimed warm-up so lazy imports and model setup are not counted
+        process_statement(pdf_path, export_dir)
+
+        latencies, stage_totals, result = [], {}, {}
+        for iteration in range(iterations):
+            with timings.trace(f"{name}#{iteration}", scenario=name) as trace:
+                start = time.perf_counter()
+                result = process_statement(pdf_path, export_dir)
+                latencies.append(time.perf_counter() - start)
+            for stage, seconds in trace.totals().items():
+                stage_totals.setdefault(stage, []).append(seconds)
+
+        peak_traced_mb = None
+        if measure_memory:
+            # Separate run: tracemalloc slows the pipeline down too much to time it
+            tracemalloc.start()
+            try:
+                process_statement(pdf_path, export_dir)
+                peak_traced_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            finally:
+                tracemalloc.stop()
+
+        mean_latency = sum(latencies) / len(latencies)
+        return {
+            'params': {key: value for key, value in manifest.items() if key not in ('path', 'transactions')},
+            'iterations': iterations,
+            'pages': result.get('pages', 0),
+            'rows_expected': manifest['expected_rows'],
+            'rows_extracted': result.get('transactions', 0),
+            'latency_seconds': {
+                'p50': round(_percentile(latencies, 50), 4),
+                'p95': round(_percentile(latencies, 95), 4),
+                'mean': round(mean_latency, 4)
+            },
+            'throughput': {
+                'pages_per_second': round(result.get('pages', 0) / mean_latency, 2),
+                'rows_per_second': round(result.get('transactions', 0) / mean_latency, 2)
+            },
+            'stages': {
+                stage: {
+                    'p50': round(_percentile(values, 50), 4),
+                    'p95': round(_percentile(values, 95), 4)
+                }
+                for stage, values in sorted(stage_totals.items())
+            },
+            'peak_memory_mb': {
+                'traced': peak_traced_mb,
+                'rss': _peak_rss_mb()
+            }
+        }
+    finally:
+        if cleanup:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _format_statement_number(value: float, style: str) -> str:
+    text = f"{abs(value):,.2f}"
+    if style == 'european':
+        text = text.replace(',', ' ').replace('.', ',').replace(' ', '.')
+    if value >= 0:
+        return text
+    return f"{text}-" if style == 'trailing_minus' else f"-{text}"
+
+
+def tokenizer_statement_text(count: int, hebrew_ratio: float = 0.5, seed: int = 0) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Statement text in mixed number formats, as PDF text extraction returns it.
+
+    Args:
+        count: Number of transaction lines
+        hebrew_ratio: Share of Hebrew descriptions (0-1)
+        seed: Random seed
+
+    Returns:
+        Tuple of the text and the transactions it holds
+    """
+    transactions = generate_transactions(count, hebrew_ratio=hebrew_ratio, seed=seed)
+    lines = []
+    for i, transaction in enumerate(transactions):
+        style = NUMBER_STYLES[i % len(NUMBER_STYLES)]
+        date = transaction['date'] if style != 'european' else transaction['date'].replace('/', '.')
+        amount = _format_statement_number(transaction['amount'], style)
+        balance = _format_statement_number(transaction['balance'], style)
+        if i % 2:
+            lines.append(f"| {date} | {transaction['description']} | {amount} | {balance} |")
+        else:
+            lines.append(f"{date} {transaction['description']} {amount} {balance}")
+    return '\n'.join(lines), transactions
+
+
+def benchmark_tokenizer(count: int = DEFAULT_TOKENIZER_LINES, iterations: int = DEFAULT_ITERATIONS) -> Dict[str, Any]:
+    """
+    Benchmark the transaction tokenizer on synthetic statement text.
+
+    Args:
+        count: Number of transaction lines
+        iterations: Timed runs
+
+    Returns:
+        Dictionary of throughput and accuracy against the generated transactions
+    """
+    text, expected = tokenizer_statement_text(count)
+    tokenizer = TransactionTokenizer()
+    latencies, extracted = [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        extracted = tokenizer.extract_transactions(text)
+        latencies.append(time.perf_counter() - start)
+
+    correct = sum(
+        1 for got, want in zip(extracted, expected)
+        if got['date'].replace('.', '/') == want['date'] and round(got['amount'], 2) == want['amount']
+        and round(got['balance'], 2) == want['balance']
+    )
+    mean_latency = sum(latencies) / len(latencies)
+    return {
+        'lines': count,
+        'iterations': iterations,
+        'transactions_extracted': len(extracted),
+        'accuracy': round(correct / count, 4) if count else None,
+        'latency_seconds': {
+            'p50': round(_percentile(latencies, 50), 4),
+            'mean': round(mean_latency, 4)
+        },
+        'lines_per_second': round(count / mean_latency, 2)
+    }
+
+
+def run_benchmarks(scenarios: Optional[List[str]] = None, iterations: int = DEFAULT_ITERATIONS) -> Dict[str, Any]:
+    """
+    Run benchmark scenarios against the offline LLM stub.
+
+    Args:
+        scenarios: Scenario names to run (all when None)
+        iterations: Timed runs per scenario
+
+    Returns:
+        Results keyed by scenario, with version and environment details
+    """
+    from utils.offline_llm import use_offline_llm
+
+    use_offline_llm()
+    results = {}
+    for name in scenarios or list(SCENARIOS):
+        logger.info(f"Running benchmark scenario {name}")
+        try:
+            results[name] = run_scenario(name, SCENARIOS[name], iterations=iterations)
+        except Exception as e:
+            logger.error(f"Benchmark scenario {name} failed: {str(e)}")
+            results[name] = {'error': str(e)}
+
+    return {
+        'version': _read_version(),
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scenarios': results
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark extraction, analysis and export on synthetic statements")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help="Timed runs per scenario")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Results JSON file")
+    parser.add_argument('--tokenizer', action='store_true', help="Benchmark the transaction tokenizer only")
+    parser.add_argument('--lines', type=int, default=DEFAULT_TOKENIZER_LINES, help="Statement lines for --tokenizer")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.tokenizer:
+        result = benchmark_tokenizer(args.lines, args.iterations)
+        print(f"tokenizer: {result['lines_per_second']} lines/s, p50 {result['latency_seconds']['p50']}s, "
+              f"accuracy {result['accuracy']:.2%} ({result['transactions_extracted']}/{result['lines']} extracted)")
+        return 0 if result['accuracy'] == 1 else 1
+
+    report = run_benchmarks(args.scenario, args.iterations)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+    for name, result in report['scenarios'].items():
+        if 'error' in result:
+            print(f"{name}: FAILED ({result['error']})")
+            continue
+        print(f"{name}: {result['throughput']['pages_per_second']} pages/s, "
+              f"{result['throughput']['rows_per_second']} rows/s, "
+              f"p50 {result['latency_seconds']['p50']}s, p95 {result['latency_seconds']['p95']}s, "
+              f"rows {result['rows_extracted']}/{result['rows_expected']}")
+    print(f"Results written to {args.output}")
+
+    return 1 if any('error' in result for result in report['scenarios'].values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+import re
+import bisect
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+WINDOW_MONTH_TO_DATE = 'month_to_date'
+WINDOW_TRAILING_30_DAYS = 'trailing_30_days'
+
+SEVERITY_MEDIUM = 'medium'
+SEVERITY_HIGH = 'high'
+
+_TRAILING_PATTERN = re.compile(r'^trailing_(\d+)_days$')
+
+
+def _transaction_day(value: Any) -> Optional[date]:
+    """Day of a transaction date given as a date, timestamp or string."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            pass
+    try:
+        parsed = pd.to_datetime(value, dayfirst=True)
+    except (ValueError, TypeError):
+        return None
+    return None if pd.isna(parsed) else parsed.date()
+
+
+def _severity(spent: float, limit: float) -> Optional[str]:
+    """Severity of spending against a limit, as in FinancialAnalyzer.check_budget_limits."""
+    if spent <= limit:
+        return None
+    return SEVERITY_HIGH if limit <= 0 or (spent - limit) / limit > 0.2 else SEVERITY_MEDIUM
+
+
+class _MonthToDate:
+    """Spending per category and calendar month."""
+
+    def __init__(self):
+        self.totals: Dict[Tuple[str, Tuple[int, int]], float] = {}
+
+    def add(self, category: str, day: date, amount: float, latest: date) -> Tuple[str, float]:
+        key = (category, (day.year, day.month))
+        self.totals[key] = self.totals.get(key, 0.0) + amount
+        return f"{day.year:04d}-{day.month:02d}", self.totals[key]
+
+    def spent(self, category: str, as_of: date) -> float:
+        return self.totals.get((category, (as_of.year, as_of.month)), 0.0)
+
+
+class _Trailing:
+    """Spending per category over the last N days, kept as daily buckets and a running sum."""
+
+    def __init__(self, days: int):
+        self.days = days
+        self.buckets: Dict[str, Dict[date, float]] = {}
+        self.order: Dict[str, List[date]] = {}
+        self.sums: Dict[str, float] = {}
+
+    def _evict(self, category: str, start: date):
+        order = self.order[category]
+        buckets = self.buckets[category]
+        while order and order[0] < start:
+            self.sums[category] -= buckets.pop(order.pop(0))
+
+    def add(self, category: str, day: date, amount: float, latest: date) -> Optional[Tuple[str, float]]:
+        if category not in self.buckets:
+            self.buckets[category], self.order[category], self.sums[category] = {}, [], 0.0
+        start = latest - timedelta(days=self.days - 1)
+        self._evict(category, start)
+        if day < start:
+            # Older than the window
+            return None
+
+        buckets = self.buckets[category]
+        if day not in buckets:
+            buckets[day] = 0.0
+            bisect.insort(self.order[category], day)
+        buckets[day] += amount
+        self.sums[category] += amount
+        return f"{start.isoformat()}..{latest.isoformat()}", self.sums[category]
+
+    def spent(self, category: str, as_of: date) -> float:
+        start = as_of - timedelta(days=self.days - 1)
+        buckets = self.buckets.get(category, {})
+        return sum(amount for day, amount in buckets.items() if start <= day <= as_of)
+
+
+class BudgetMonitor:
+    """
+    Streaming budget checks over transactions as they are extracted.
+
+    Spending is accumulated per category in each window, so adding a
+    transaction costs O(1) regardless of how many came before. An alert is
+    emitted the moment spending in a window crosses a category's limit, and
+    again if it escalates to high severity (more than 20% over). A trailing
+    window re-arms when spending falls back under the limit.
+
+    Spending is the absolute amount of a transaction and transactions without
+    a category count as 'other', as in FinancialAnalyzer.check_budget_limits.
+    """
+
+    def __init__(self, budget_limits: Dict[str, float],
+                 windows: Iterable[str] = (WINDOW_MONTH_TO_DATE, WINDOW_TRAILING_30_DAYS),
+                 on_alert: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Initialize the monitor.
+
+        Args:
+            budget_limits: Dictionary of category budget limits per window
+            windows: 'month_to_date' and/or 'trailing_<N>_days'
+            on_alert: Optional function called with each alert as it is emitted
+        """
+        self.budget_limits = dict(budget_limits)
+        self.on_alert = on_alert
+        self.windows = {}
+        for window in windows:
+            match = _TRAILING_PATTERN.match(window)
+            if window == WINDOW_MONTH_TO_DATE:
+                self.windows[window] = _MonthToDate()
+            elif match and int(match.group(1)) > 0:
+                self.windows[window] = _Trailing(int(match.group(1)))
+            else:
+                raise ValueError(f"Unknown budget window: {window}")
+
+        # Severity already alerted per (window, category, period)
+        self._alerted: Dict[Tuple[str, str, str], str] = {}
+        self.latest_day: Optional[date] = None
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def add(self, transaction: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Add one transaction.
+
+        Args:
+            transaction: Transaction with date, amount and category
+
+        Returns:
+            Alerts this transaction triggered
+        """
+        day = _transaction_day(transaction.get('date'))
+        try:
+            amount = abs(float(transaction.get('amount') or 0))
+        except (TypeError, ValueError):
+            amount = None
+        if day is None or amount is None:
+            self.skipped += 1
+            logger.warning(f"Skipping transaction without a valid date or amount: {transaction.get('date')}")
+            return []
+
+        category = transaction.get('category', 'other')
+        alerts = []
+        with self._lock:
+            if self.latest_day is None or day > self.latest_day:
+                self.latest_day = day
+
+            limit = self.budget_limits.get(category)
+            for name, window in self.windows.items():
+                update = window.add(category, day, amount, self.latest_day)
+                if update is None or limit is None:
+                    continue
+                period, spent = update
+                alert = self._check(name, category, period, spent, limit)
+                if alert:
+                    alerts.append(alert)
+
+        for alert in alerts:
+            logger.info(f"Budget alert: {alert['category']} {alert['window']} {alert['spent']:.2f} > {alert['limit']}")
+            if self.on_alert:
+                self.on_alert(alert)
+        return alerts
+
+    def add_many(self, transactions: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add a batch of transactions, e.g. one extracted chunk.
+
+        Args:
+            transactions: Transactions in any order
+
+        Returns:
+            Alerts the batch triggered
+        """
+        alerts = []
+        for transaction in transactions:
+            alerts.extend(self.add(transaction))
+        return alerts
+
+    def _check(self, window: str, category: str, period: str, spent: float, limit: float) -> Optional[Dict[str, Any]]:
+        key = (window, category, period if window == WINDOW_MONTH_TO_DATE else '')
+        severity = _severity(spent, limit)
+        previous = self._alerted.get(key)
+        if severity is None:
+            # Back under the limit: the next crossing alerts again
+            self._alerted.pop(key, None)
+            return None
+        if severity == previous or previous == SEVERITY_HIGH:
+            return None
+        self._alerted[key] = severity
+        return {
+            'category': category,
+            'window': window,
+            'period': period,
+            'spent': spent,
+            'limit': limit,
+            'excess': spent - limit,
+            'severity': severity
+        }
+
+    def spending(self, window: str, as_of: Optional[date] = None) -> Dict[str, float]:
+        """
+        Spending per category in a window.
+
+        Args:
+            window: One of the monitor's windows
+            as_of: Last day of the window (default: latest transaction date)
+
+        Returns:
+            Dictionary of category spending
+        """
+        as_of = as_of or self.latest_day
+        if as_of is None:
+            return {}
+        accumulator = self.windows[window]
+        with self._lock:
+            if isinstance(accumulator, _MonthToDate):
+                categories = {category for category, _ in accumulator.totals}
+            else:
+                categories = set(accumulator.buckets)
+            return {category: accumulator.spent(category, as_of) for category in sorted(categories, key=str)}
+
+    def status(self, as_of: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Spending against every limit in every window.
+
+        Args:
+            as_of: Last day of the windows (default: latest transaction date)
+
+        Returns:
+            List with category, window, spent, limit, remaining and severity
+        """
+        rows = []
+        for window in self.windows:
+            spending = self.spending(window, as_of)
+            for category, limit in self.budget_limits.items():
+                spent = spending.get(category, 0.0)
+                rows.append({
+                    'category': category,
+                    'window': window,
+                    'spent': spent,
+                    'limit': limit,
+                    'remaining': limit - spent,
+                    'severity': _severity(spent, limit)
+                })
+        return rows
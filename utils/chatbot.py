@@ -1,8 +1,9 @@
-import google.cloud.aiplatform as aiplatform
 import os
-import google.generativeai as genai
 import json
 import logging
+from utils.lazy_loader import lazy_import
+
+genai = lazy_import('gemini')
 
 logger = logging.getLogger(__name__)
 
@@ -0,0 +1,114 @@
+import os
+import json
+import shutil
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from utils.batch_ingest import hash_file
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def _write_json_atomic(path: str, data: Any):
+    """Write JSON via a temporary file so a crash never leaves a partial file."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(temp_path, path)
+
+
+class ChunkCheckpoint:
+    """
+    On-disk progress of chunked document processing.
+
+    Every finished chunk's results are written to their own file before the
+    manifest records the chunk as done, so after a crash the manifest never
+    points at missing results. Checkpoints are keyed by the document's content
+    hash; a checkpoint made with different parameters is discarded.
+    """
+
+    def __init__(self, checkpoint_dir: str, file_path: str, params: Dict[str, Any]):
+        """
+        Open or create the checkpoint for a document.
+
+        Args:
+            checkpoint_dir: Root directory for checkpoints
+            file_path: Document being processed
+            params: Processing parameters that must match to resume (e.g. chunk size)
+        """
+        self.content_hash = hash_file(file_path)
+        self.directory = os.path.join(checkpoint_dir, self.content_hash)
+        self.params = params
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('params') == self.params:
+                    return manifest
+                logger.info(f"Discarding checkpoint {self.directory}: processing parameters changed")
+            except Exception as e:
+                logger.warning(f"Discarding unreadable checkpoint {self.directory}: {str(e)}")
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+        os.makedirs(self.directory, exist_ok=True)
+        return {'params': self.params, 'chunks': {}, 'created_at': datetime.now().isoformat()}
+
+    def _chunk_file(self, start_page: int) -> str:
+        return os.path.join(self.directory, f"chunk_{start_page:06d}.json")
+
+    def is_done(self, start_page: int) -> bool:
+        """Whether the chunk starting at a page was completed in an earlier run."""
+        return str(start_page) in self.manifest['chunks']
+
+    @property
+    def resume_page(self) -> int:
+        """First page after the last contiguous completed chunk."""
+        page = 0
+        chunks = self.manifest['chunks']
+        while str(page) in chunks:
+            page = chunks[str(page)]['end_page']
+        return page
+
+    def save_chunk(self, start_page: int, end_page: int, results: List[Dict[str, Any]], result_type: str):
+        """
+        Persist a finished chunk, then mark it done.
+
+        Args:
+            start_page: First page of the chunk (0-based)
+            end_page: Page after the chunk
+            results: Chunk results
+            result_type: Result type of the chunk
+        """
+        _write_json_atomic(self._chunk_file(start_page), results)
+        self.manifest['chunks'][str(start_page)] = {
+            'end_page': end_page,
+            'result_type': result_type,
+            'count': len(results),
+            'completed_at': datetime.now().isoformat()
+        }
+        _write_json_atomic(os.path.join(self.directory, MANIFEST_FILE), self.manifest)
+
+    def load_chunk(self, start_page: int) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Read a completed chunk's results.
+
+        Args:
+            start_page: First page of the chunk
+
+        Returns:
+            Tuple of (results, result type)
+        """
+        with open(self._chunk_file(start_page), encoding='utf-8') as f:
+            results = json.load(f)
+        return results, self.manifest['chunks'][str(start_page)]['result_type']
+
+    def clear(self):
+        """Remove the checkpoint after the document is fully processed."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,10 +1,10 @@
 """Database schema and utilities for securities data storage"""
 import sqlite3
 import pandas as pd
-from sqlalchemy import create_engine, Table, Column, String, Float, Integer, DateTime, MetaData
+from sqlalchemy import create_engine, text, Table, Column, String, Float, Integer, DateTime, MetaData
 from datetime import datetime
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set
 import json
 
 logger = logging.getLogger(__name__)
@@ -47,10 +47,88 @@ def init_db(db_url: str):
         Column('created_at', DateTime, default=datetime.now)
     )
 
+    # Ingested statement files, by content hash
+    Table('ingested_files', metadata,
+        Column('content_hash', String(64), primary_key=True),
+        Column('path', String),
+        Column('bank', String(50)),
+        Column('status', String(20)),
+        Column('pages', Integer),
+        Column('securities_count', Integer),
+        Column('seconds', Float),
+        Column('error', String),
+        Column('ingested_at', DateTime, default=datetime.now)
+    )
+
     # Create tables
     metadata.create_all(engine)
     return engine
 
+SECURITY_COLUMNS = ('isin', 'security_name', 'quantity', 'price', 'market_value', 'bank', 'currency')
+
+
+class HoldingsStore:
+    """Securities holdings database with a record of the statement files already ingested."""
+
+    def __init__(self, db_url: str):
+        """
+        Initialize the store, creating tables if needed.
+
+        Args:
+            db_url: SQLAlchemy database URL
+        """
+        self.db_url = db_url
+        self.engine = init_db(db_url)
+
+    def ingested_hashes(self) -> Set[str]:
+        """Content hashes of files that were ingested successfully."""
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                text("SELECT content_hash FROM ingested_files WHERE status = 'success'")
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def save_file(self, content_hash: str, path: str, securities: List[Dict[str, Any]], status: str = 'success',
+                  bank: Optional[str] = None, pages: int = 0, seconds: float = 0.0, error: Optional[str] = None):
+        """
+        Store a file's securities and its ingestion record in one transaction.
+
+        Args:
+            content_hash: SHA-256 of the file content
+            path: File path
+            securities: Extracted securities
+            status: 'success', 'error' or 'timeout'
+            bank: Bank the statement comes from
+            pages: Number of pages
+            seconds: Processing time
+            error: Error message for failed files
+        """
+        now = datetime.now()
+        rows = [
+            {**{column: security.get(column) for column in SECURITY_COLUMNS},
+             'isin': security.get('isin') or '',
+             'bank': security.get('bank') or bank,
+             'created_at': now, 'updated_at': now}
+            for security in securities
+        ]
+        with self.engine.begin() as connection:
+            if rows:
+                columns = SECURITY_COLUMNS + ('created_at', 'updated_at')
+                connection.execute(
+                    text(f"INSERT INTO securities ({', '.join(columns)}) "
+                         f"VALUES ({', '.join(':' + column for column in columns)})"),
+                    rows
+                )
+            connection.execute(text("DELETE FROM ingested_files WHERE content_hash = :hash"), {'hash': content_hash})
+            connection.execute(
+                text("INSERT INTO ingested_files (content_hash, path, bank, status, pages, securities_count, "
+                     "seconds, error, ingested_at) VALUES (:hash, :path, :bank, :status, :pages, :count, "
+                     ":seconds, :error, :ingested_at)"),
+                {'hash': content_hash, 'path': path, 'bank': bank, 'status': status, 'pages': pages,
+                 'count': len(securities), 'seconds': seconds, 'error': error, 'ingested_at': now}
+            )
+
+
 def get_db_connection(db_url: str):
     """Get a database connection, creating tables if needed"""
     try:
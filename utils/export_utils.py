@@ -4,6 +4,7 @@ import json
 import os
 from datetime import datetime
 from typing import Dict, List, Any, Optional
+from utils.instrumentation import timed, SPAN_EXPORT
 
 class ReportExporter:
     """Utility for exporting reports in various formats."""
@@ -13,6 +14,7 @@ class ReportExporter:
         self.export_dir = export_dir
         os.makedirs(export_dir, exist_ok=True)
     
+    @timed(SPAN_EXPORT, step='export_excel')
     def export_excel(self, report_data: Dict[str, Any], filename: Optional[str] = None) -> str:
         """
         Export report data to Excel format.
@@ -97,6 +99,7 @@ class ReportExporter:
         
         return file_path
     
+    @timed(SPAN_EXPORT, step='export_csv')
     def export_csv(self, report_data: Dict[str, Any], filename: Optional[str] = None) -> List[str]:
         """
         Export report data to CSV format (multiple files).
@@ -170,6 +173,7 @@ class ReportExporter:
         
         return exported_files
     
+    @timed(SPAN_EXPORT, step='export_json')
     def export_json(self, report_data: Dict[str, Any], filename: Optional[str] = None) -> str:
         """
         Export report data to JSON format.
@@ -34,37 +34,17 @@ def extract_transactions_from_text(text: str) -> list:
     Returns:
         A list of transaction objects with date, description, amount, and category
     """
-    import re
+    from utils.transaction_tokenizer import tokenizer
     
     transactions = []
     
-    # Simple pattern matching for dates and amounts
-    date_pattern = r'\d{1,2}[/\.-]\d{1,2}[/\.-]\d{2,4}'
-    amount_pattern = r'[-+]?[\d,]+\.\d{2}'
-    
-    lines = text.split('\n')
-    for line in lines:
-        if not line.strip():
-            continue
-            
-        amount_match = re.search(amount_pattern, line)
-        if amount_match:
-            # Extract amount
-            amount_str = amount_match.group(0).replace(',', '')
-            amount = float(amount_str)
-            
-            # Look for date
-            date_match = re.search(date_pattern, line)
-            date_str = date_match.group(0) if date_match else ""
-            
-            # Extract description
-            description = line
-            if date_match:
-                description = description.replace(date_match.group(0), '')
-            if amount_match:
-                description = description.replace(amount_match.group(0), '')
-                
-            description = description.strip()
+    # One scan per line; the amount is the first number with decimals
+    for line in tokenizer.iter_lines(text):
+        money = line.money()
+        if money:
+            amount = money[0].value
+            date_str = line.date or ""
+            description = line.description
             
             # Basic category detection
             category = "לא מסווג"
@@ -1,19 +1,41 @@
+import os
+import json
+import pickle
+import bisect
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import logging
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
+from utils.lazy_loader import lazy_import
+from utils.instrumentation import timed, SPAN_ANALYSIS
+from utils.spending_cube import SpendingCube, get_spending_cube, SIGN_INCOME, SIGN_EXPENSE
+
+# scikit-learn is only needed once the categorization model is used
+sklearn_text = lazy_import('sklearn_text')
+sklearn_naive_bayes = lazy_import('sklearn_naive_bayes')
+sklearn_pipeline = lazy_import('sklearn_pipeline')
+sklearn = lazy_import('sklearn')
 
 logger = logging.getLogger(__name__)
 
+# Saved categorization models: one pickle per version, and a manifest naming the latest
+MODEL_MANIFEST = 'latest.json'
+MODEL_FILE_FORMAT = 'categorizer_v{version:04d}.pkl'
+MODEL_VERSIONS_KEPT = 5
+MODEL_FEATURES = 2 ** 18
+
 class FinancialAnalyzer:
     """Advanced financial analysis and categorization system."""
     
-    def __init__(self):
-        """Initialize the financial analyzer."""
+    def __init__(self, model_dir: Optional[str] = None):
+        """
+        Initialize the financial analyzer.
+        
+        Args:
+            model_dir: Directory of saved categorization models; defaults to
+                CATEGORIZATION_MODEL_DIR. Without one, models are not persisted.
+        """
         self.categories = {
             'income': {
                 'keywords': ['salary', 'deposit', 'interest', 'dividend', 'refund', 'payment received'],
@@ -65,69 +87,289 @@ class FinancialAnalyzer:
             }
         }
         
-        # Initialize ML model for categorization
-        self.ml_pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=1000)),
-            ('clf', MultinomialNB())
+        # ML model for categorization, built or loaded on first use. A saved
+        # model counts as trained from startup; it is read when first needed.
+        self.model_dir = model_dir or os.getenv('CATEGORIZATION_MODEL_DIR')
+        self._ml_pipeline = None
+        self.model_info = self._read_model_manifest()
+        self.is_trained = self.model_info is not None
+    
+    @property
+    def ml_pipeline(self):
+        """Categorization pipeline, loaded or created when first needed."""
+        if self._ml_pipeline is None and self.model_info:
+            self._ml_pipeline = self._load_model_artifact(self.model_info)
+            if self._ml_pipeline is None:
+                self.model_info = None
+                self.is_trained = False
+        if self._ml_pipeline is None:
+            self._ml_pipeline = self._new_pipeline()
+        return self._ml_pipeline
+    
+    @staticmethod
+    def _new_pipeline():
+        """
+        Untrained pipeline. Hashed features need no vocabulary, so the
+        classifier can be updated with partial_fit one batch at a time.
+        """
+        return sklearn_pipeline.Pipeline([
+            ('vectorizer', sklearn_text.HashingVectorizer(
+                n_features=MODEL_FEATURES, ngram_range=(1, 2), alternate_sign=False)),
+            ('clf', sklearn_naive_bayes.MultinomialNB(alpha=0.1))
         ])
-        self.is_trained = False
         
-    def categorize_transaction(self, transaction: Dict[str, Any]) -> str:
+    def _keyword_matcher(self) -> List[tuple]:
         """
-        Categorize a transaction using both rule-based and ML approaches.
+        Keywords and patterns of all categories as (term, category) pairs.
+        
+        Pairs are in category order, so the first match found for a
+        description is also the one per-transaction rules would pick.
+        Rebuilt when the categories change.
+        """
+        signature = tuple(
+            (category, tuple(rules['keywords']), tuple(rules['patterns']))
+            for category, rules in self.categories.items()
+        )
+        if getattr(self, '_matcher_signature', None) != signature:
+            matcher = []
+            for category, keywords, patterns in signature:
+                terms = dict.fromkeys(term.lower() for term in keywords + patterns if term)
+                matcher.extend((term, category) for term in terms)
+            self._matcher = matcher
+            self._matcher_signature = signature
+        return self._matcher
+    
+    def categorize_batch(self, transactions: List[Dict[str, Any]]) -> List[str]:
+        """
+        Categorize many transactions at once.
+        
+        All descriptions are joined into one text and each keyword is searched
+        for once across the whole batch; where several categories match, the
+        first category in self.categories wins, as in per-transaction
+        categorization. The ML model is called once for all descriptions no
+        keyword matched.
         
         Args:
-            transaction: Dictionary containing transaction details
+            transactions: List of transaction dictionaries
             
         Returns:
-            Category name
+            Category names, in the order of the transactions
         """
-        description = transaction.get('description', '').lower()
-        amount = transaction.get('amount', 0)
+        descriptions = [str(t.get('description') or '').lower() for t in transactions]
+        results: List[Optional[str]] = [None] * len(transactions)
         
         # Rule-based categorization
-        for category, rules in self.categories.items():
-            # Check keywords
-            if any(keyword in description for keyword in rules['keywords']):
-                return category
+        if descriptions:
+            text = '\n'.join(descriptions)
+            starts = [0]
+            for description in descriptions[:-1]:
+                starts.append(starts[-1] + len(description) + 1)
             
-            # Check patterns
-            if any(pattern in description for pattern in rules['patterns']):
-                return category
+            for term, category in self._keyword_matcher():
+                position = text.find(term)
+                while position != -1:
+                    row = bisect.bisect_right(starts, position) - 1
+                    if results[row] is None:
+                        results[row] = category
+                    position = text.find(term, position + 1)
         
         # ML-based categorization if trained
-        if self.is_trained:
+        unmatched = [i for i, category in enumerate(results) if category is None]
+        if unmatched and self.is_trained:
             try:
-                category = self.ml_pipeline.predict([description])[0]
-                return category
+                predictions = self.ml_pipeline.predict([descriptions[i] for i in unmatched])
+                for i, category in zip(unmatched, predictions):
+                    results[i] = category
             except Exception as e:
                 logger.error(f"ML categorization failed: {str(e)}")
         
         # Default categorization based on amount
-        if amount > 0:
-            return 'income'
-        elif amount < 0:
-            return 'other'
+        for i, category in enumerate(results):
+            if category is None:
+                amount = transactions[i].get('amount', 0)
+                if amount > 0:
+                    results[i] = 'income'
+                elif amount < 0:
+                    results[i] = 'other'
+                else:
+                    results[i] = 'unclassified'
         
-        return 'unclassified'
+        return results
+    
+    def categorize_transaction(self, transaction: Dict[str, Any]) -> str:
+        """
+        Categorize a transaction using both rule-based and ML approaches.
+        
+        Args:
+            transaction: Dictionary containing transaction details
+            
+        Returns:
+            Category name
+        """
+        return self.categorize_batch([transaction])[0]
     
     def train_categorization_model(self, training_data: List[Dict[str, Any]]):
         """
-        Train the ML model for transaction categorization.
+        Train the ML model for transaction categorization from scratch.
         
         Args:
             training_data: List of transactions with known categories
         """
         try:
-            descriptions = [t.get('description', '') for t in training_data]
+            descriptions = [str(t.get('description') or '') for t in training_data]
             categories = [t.get('category', 'other') for t in training_data]
             
+            self._ml_pipeline = self._new_pipeline()
             self.ml_pipeline.fit(descriptions, categories)
             self.is_trained = True
             logger.info("ML categorization model trained successfully")
+            self._save_model(len(training_data), incremental=False)
         except Exception as e:
             logger.error(f"Failed to train ML model: {str(e)}")
     
+    def update_categorization_model(self, corrections: List[Dict[str, Any]]) -> bool:
+        """
+        Update the ML model with user-corrected categories.
+        
+        Only the corrections are processed; earlier training is kept. An
+        untrained model learns the categories of self.categories plus those of
+        the first corrections; corrections to other categories are skipped.
+        
+        Args:
+            corrections: Transactions with their corrected category
+            
+        Returns:
+            True if the model was updated
+        """
+        try:
+            pipeline = self.ml_pipeline
+            classifier = pipeline.named_steps['clf']
+            known = getattr(classifier, 'classes_', None)
+            if known is None:
+                classes = sorted(set(self.categories) | {t.get('category', 'other') for t in corrections})
+            else:
+                classes = None
+                skipped = [t for t in corrections if t.get('category', 'other') not in known]
+                if skipped:
+                    logger.warning(f"Skipping {len(skipped)} corrections to categories unknown to the model")
+                    corrections = [t for t in corrections if t.get('category', 'other') in known]
+            if not corrections:
+                return False
+            
+            features = pipeline.named_steps['vectorizer'].transform(
+                [str(t.get('description') or '') for t in corrections])
+            classifier.partial_fit(features, [t.get('category', 'other') for t in corrections], classes=classes)
+            self.is_trained = True
+            logger.info(f"ML categorization model updated with {len(corrections)} corrections")
+            self._save_model(len(corrections), incremental=True)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to update ML model: {str(e)}")
+            return False
+    
+    def load_categorization_model(self, version: Optional[int] = None) -> bool:
+        """
+        Load a saved model, e.g. to roll back to an earlier version.
+        
+        Args:
+            version: Model version (default: latest)
+            
+        Returns:
+            True if the model was loaded
+        """
+        info = self._read_model_manifest()
+        if info and version is not None and version != info['version']:
+            info = {'version': version, 'file': MODEL_FILE_FORMAT.format(version=version)}
+        pipeline = self._load_model_artifact(info) if info else None
+        if pipeline is None:
+            return False
+        self._ml_pipeline = pipeline
+        self.model_info = info
+        self.is_trained = True
+        return True
+    
+    def _read_model_manifest(self) -> Optional[Dict[str, Any]]:
+        """Details of the latest saved model, if any."""
+        if not self.model_dir:
+            return None
+        manifest_path = os.path.join(self.model_dir, MODEL_MANIFEST)
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading categorization model manifest: {str(e)}")
+            return None
+    
+    def _load_model_artifact(self, info: Dict[str, Any]):
+        """Unpickle a saved pipeline, or None if it cannot be read."""
+        try:
+            with open(os.path.join(self.model_dir, info['file']), 'rb') as f:
+                pipeline = pickle.load(f)
+            logger.info(f"Loaded categorization model version {info['version']}")
+            return pipeline
+        except Exception as e:
+            logger.error(f"Error loading categorization model version {info.get('version')}: {str(e)}")
+            return None
+    
+    def _save_model(self, samples: int, incremental: bool):
+        """
+        Save the pipeline as a new version and point the manifest at it.
+        
+        Args:
+            samples: Number of transactions in this training step
+            incremental: Whether the step updated the previous version
+        """
+        if not self.model_dir:
+            return
+        try:
+            os.makedirs(self.model_dir, exist_ok=True)
+            previous = self._read_model_manifest() or {}
+            version = previous.get('version', 0) + 1
+            filename = MODEL_FILE_FORMAT.format(version=version)
+            
+            # Write the artifact before the manifest, so the manifest never
+            # points at a partial file
+            temp_path = os.path.join(self.model_dir, f"{filename}.tmp")
+            with open(temp_path, 'wb') as f:
+                pickle.dump(self._ml_pipeline, f)
+            os.replace(temp_path, os.path.join(self.model_dir, filename))
+            
+            self.model_info = {
+                'version': version,
+                'file': filename,
+                'saved_at': datetime.now().isoformat(),
+                'parent_version': previous.get('version') if incremental else None,
+                'samples': samples,
+                'total_samples': (previous.get('total_samples', 0) if incremental else 0) + samples,
+                'classes': [str(c) for c in self._ml_pipeline.named_steps['clf'].classes_],
+                'sklearn_version': sklearn.__version__
+            }
+            temp_path = os.path.join(self.model_dir, f"{MODEL_MANIFEST}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.model_info, f, indent=2)
+            os.replace(temp_path, os.path.join(self.model_dir, MODEL_MANIFEST))
+            
+            # Keep a few earlier versions for rollback
+            for old_version in range(version - MODEL_VERSIONS_KEPT, 0, -1):
+                old_path = os.path.join(self.model_dir, MODEL_FILE_FORMAT.format(version=old_version))
+                if not os.path.exists(old_path):
+                    break
+                os.remove(old_path)
+        except Exception as e:
+            logger.error(f"Error saving categorization model: {str(e)}")
+    
+    def _category_totals(self, cube: SpendingCube, fields) -> Dict[str, Dict[str, Any]]:
+        """Totals of the known categories that have transactions, in category order."""
+        by_category = cube.by_category()
+        return {
+            category: {field: by_category.at[category, field] for field in fields}
+            for category in self.categories.keys()
+            if category in by_category.index
+        }
+    
+    @timed(SPAN_ANALYSIS, step='analyze_spending_trends')
     def analyze_spending_trends(self, transactions: List[Dict[str, Any]], 
                               period: str = 'monthly') -> Dict[str, Any]:
         """
@@ -141,44 +383,23 @@ class FinancialAnalyzer:
             Dictionary containing trend analysis
         """
         try:
-            # Convert transactions to DataFrame
-            df = pd.DataFrame(transactions)
-            df['date'] = pd.to_datetime(df['date'])
-            
-            # Group by period
-            if period == 'daily':
-                grouped = df.groupby(df['date'].dt.date)
-            elif period == 'weekly':
-                grouped = df.groupby(df['date'].dt.isocalendar().week)
-            elif period == 'monthly':
-                grouped = df.groupby(df['date'].dt.to_period('M'))
-            else:  # yearly
-                grouped = df.groupby(df['date'].dt.year)
+            cube = get_spending_cube(transactions)
+            by_period = cube.by_period(period)
             
-            # Calculate metrics
             analysis = {
-                'total_spending': grouped['amount'].sum().to_dict(),
-                'average_transaction': grouped['amount'].mean().to_dict(),
-                'transaction_count': grouped.size().to_dict(),
-                'category_breakdown': {}
+                'total_spending': by_period['total'].to_dict(),
+                'average_transaction': by_period['average'].to_dict(),
+                'transaction_count': by_period['count'].to_dict(),
+                'category_breakdown': self._category_totals(cube, ('total', 'average', 'count'))
             }
             
-            # Category breakdown
-            for category in self.categories.keys():
-                category_transactions = df[df['category'] == category]
-                if not category_transactions.empty:
-                    analysis['category_breakdown'][category] = {
-                        'total': category_transactions['amount'].sum(),
-                        'average': category_transactions['amount'].mean(),
-                        'count': len(category_transactions)
-                    }
-            
             return analysis
             
         except Exception as e:
             logger.error(f"Error analyzing spending trends: {str(e)}")
             return {}
     
+    @timed(SPAN_ANALYSIS, step='check_budget_limits')
     def check_budget_limits(self, transactions: List[Dict[str, Any]], 
                           budget_limits: Dict[str, float]) -> List[Dict[str, Any]]:
         """
@@ -194,12 +415,15 @@ class FinancialAnalyzer:
         alerts = []
         
         try:
-            # Calculate spending by category
+            # Spending by category counts income and expenses alike;
+            # transactions without a category count as 'other'
+            cube = get_spending_cube(transactions)
+            by_category = cube.by_category(SIGN_INCOME)['total'].sub(
+                cube.by_category(SIGN_EXPENSE)['total'], fill_value=0)
             spending_by_category = {}
-            for transaction in transactions:
-                category = transaction.get('category', 'other')
-                amount = abs(transaction.get('amount', 0))
-                spending_by_category[category] = spending_by_category.get(category, 0) + amount
+            for category, spent in by_category.items():
+                category = 'other' if pd.isna(category) else category
+                spending_by_category[category] = spending_by_category.get(category, 0) + spent
             
             # Check against limits
             for category, limit in budget_limits.items():
@@ -219,6 +443,7 @@ class FinancialAnalyzer:
             logger.error(f"Error checking budget limits: {str(e)}")
             return []
     
+    @timed(SPAN_ANALYSIS, step='generate_financial_summary')
     def generate_financial_summary(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Generate a comprehensive financial summary.
@@ -230,29 +455,22 @@ class FinancialAnalyzer:
             Dictionary containing financial summary
         """
         try:
-            df = pd.DataFrame(transactions)
+            cube = get_spending_cube(transactions)
+            overall = cube.totals()
+            income = cube.totals(SIGN_INCOME)
+            expenses = cube.totals(SIGN_EXPENSE)
             
             summary = {
-                'total_income': df[df['amount'] > 0]['amount'].sum(),
-                'total_expenses': abs(df[df['amount'] < 0]['amount'].sum()),
-                'net_income': df['amount'].sum(),
+                'total_income': income['total'],
+                'total_expenses': abs(expenses['total']),
+                'net_income': overall['total'],
                 'transaction_count': len(transactions),
-                'average_transaction': df['amount'].mean(),
-                'largest_expense': abs(df[df['amount'] < 0]['amount'].min()),
-                'largest_income': df[df['amount'] > 0]['amount'].max(),
-                'category_summary': {}
+                'average_transaction': overall['average'],
+                'largest_expense': abs(expenses['min']),
+                'largest_income': income['max'],
+                'category_summary': self._category_totals(cube, ('total', 'count', 'average'))
             }
             
-            # Category summary
-            for category in self.categories.keys():
-                category_transactions = df[df['category'] == category]
-                if not category_transactions.empty:
-                    summary['category_summary'][category] = {
-                        'total': category_transactions['amount'].sum(),
-                        'count': len(category_transactions),
-                        'average': category_transactions['amount'].mean()
-                    }
-            
             return summary
             
         except Exception as e:
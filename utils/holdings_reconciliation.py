@@ -0,0 +1,362 @@
+import re
+import logging
+import difflib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.numeric_parser import parse_amounts
+from utils.security_identifiers import valid_isins
+
+logger = logging.getLogger(__name__)
+
+# Units two sources may disagree on before a quantity break (fractional shares, rounding)
+DEFAULT_QUANTITY_TOLERANCE = 0.001
+# Relative deviation of a price from the consensus price of the security
+DEFAULT_PRICE_TOLERANCE = 0.005
+# A value break must exceed both the relative and the absolute tolerance
+DEFAULT_VALUE_TOLERANCE = 0.005
+DEFAULT_VALUE_ABS_TOLERANCE = 1.0
+# Minimum name similarity (0-1) for matching a position without an ISIN
+DEFAULT_NAME_SIMILARITY = 0.85
+
+BREAK_MISSING = 'missing'
+BREAK_QUANTITY = 'quantity'
+BREAK_PRICE = 'price'
+BREAK_VALUE = 'value'
+
+_NAME_NOISE = re.compile(r'[\W_]+')
+_NAME_SUFFIXES = frozenset({
+    'the', 'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'ltd', 'limited', 'plc',
+    'llc', 'sa', 'ag', 'nv', 'se', 'class', 'cl', 'ord', 'shares', 'sh', 'com', 'common', 'stock'
+})
+
+_POSITION_KEYS = ['account', 'key', 'date']
+_BREAK_COLUMNS = ['type', 'isin', 'security_name', 'matched_by', 'account', 'date', 'source', 'reference',
+                  'expected', 'actual', 'difference', 'difference_pct', 'impact']
+
+
+def normalize_security_name(name: Any) -> str:
+    """
+    Security name without case, punctuation or corporate suffixes.
+
+    Args:
+        name: Security name as reported, e.g. 'Apple Inc.'
+
+    Returns:
+        Normalized name, e.g. 'apple'
+    """
+    if not isinstance(name, str):
+        return ''
+    words = _NAME_NOISE.sub(' ', name.lower()).split()
+    kept = [word for word in words if word not in _NAME_SUFFIXES]
+    return ' '.join(kept or words)
+
+
+def _column(df: pd.DataFrame, field: Optional[str]) -> pd.Series:
+    """Column of the positions as text, '' where the field is missing."""
+    if not field or field not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[field].where(df[field].notna(), '').astype(str).str.strip()
+
+
+def _iso_dates(values: pd.Series) -> pd.Series:
+    """Statement dates as YYYY-MM-DD; unreadable dates are kept as written."""
+    present = values.ne('')
+    # ISO dates first: read day-first they would swap day and month
+    parsed = pd.to_datetime(values.where(present), errors='coerce', format='ISO8601')
+    missing = parsed.isna() & present
+    if missing.any():
+        parsed[missing] = pd.to_datetime(values[missing], errors='coerce', dayfirst=True, format='mixed')
+    return parsed.dt.strftime('%Y-%m-%d').where(parsed.notna(), values)
+
+
+class HoldingsReconciler:
+    """
+    Reconciles security positions across sources and statement dates.
+
+    Positions are matched by ISIN. Positions without a usable ISIN are
+    matched by name to a security of the book, then through the security
+    master if one is given; names matching neither are matched to each other.
+    A position is identified by account, security and statement date, and
+    each source reporting that account is compared with a reference source:
+
+    - quantity break: quantities differ by more than quantity_tolerance units
+    - value break: market values differ by more than value_tolerance of the
+      reference value and by more than value_abs_tolerance
+    - missing: the position is held in one source but not the other
+
+    Prices are compared across all accounts and sources holding the
+    security on the same date: a price break is a price deviating from the
+    median price by more than price_tolerance.
+
+    All checks run as vectorized operations on one table of the book, and
+    breaks are ranked by monetary impact.
+    """
+
+    def __init__(self, quantity_tolerance: float = DEFAULT_QUANTITY_TOLERANCE,
+                 price_tolerance: float = DEFAULT_PRICE_TOLERANCE,
+                 value_tolerance: float = DEFAULT_VALUE_TOLERANCE,
+                 value_abs_tolerance: float = DEFAULT_VALUE_ABS_TOLERANCE,
+                 name_similarity: float = DEFAULT_NAME_SIMILARITY, security_master: Any = None):
+        """
+        Initialize the reconciler.
+
+        Args:
+            quantity_tolerance: Units quantities may differ by
+            price_tolerance: Relative deviation from the consensus price allowed
+            value_tolerance: Relative difference in market value allowed
+            value_abs_tolerance: Absolute difference in market value allowed
+            name_similarity: Minimum similarity (0-1) for matching by name
+            security_master: SecurityMaster for names that match no security of the book
+        """
+        self.quantity_tolerance = quantity_tolerance
+        self.price_tolerance = price_tolerance
+        self.value_tolerance = value_tolerance
+        self.value_abs_tolerance = value_abs_tolerance
+        self.name_similarity = name_similarity
+        self.security_master = security_master
+
+    def _security_keys(self, isins: pd.Series, names: pd.Series) -> Tuple[pd.Series, pd.Series, pd.Series]:
+        """Matching key, resolved ISIN and match method of each position."""
+        isins = isins.str.upper()
+        # Placeholder ISINs and identifiers with a wrong check digit are matched by name
+        valid = pd.Series(valid_isins(isins), index=isins.index)
+        normalized = names.map(normalize_security_name)
+
+        # Names of securities with an ISIN, and clusters of names without one
+        known = dict(zip(normalized[valid][::-1], isins[valid][::-1]))
+        known = {name: isin for name, isin in known.items() if name}
+        clusters: Dict[str, str] = {}
+        resolved: Dict[str, Optional[str]] = {}
+        for name in normalized[~valid].unique():
+            if not name:
+                resolved[name] = None
+            elif name in known:
+                resolved[name] = known[name]
+            else:
+                close = difflib.get_close_matches(name, known, n=1, cutoff=self.name_similarity)
+                if close:
+                    resolved[name] = known[close[0]]
+                    continue
+                match = self.security_master.resolve(name) if self.security_master is not None else None
+                if match:
+                    resolved[name] = match[0]
+                    continue
+                close = difflib.get_close_matches(name, clusters, n=1, cutoff=self.name_similarity)
+                clusters[name] = clusters[close[0]] if close else f"name:{name}"
+                resolved[name] = clusters[name]
+
+        keys = isins.where(valid, normalized.map(resolved))
+        resolved_isin = keys.where(keys.notna() & ~keys.fillna('').str.startswith('name:'))
+        matched_by = pd.Series(np.where(valid, 'isin', 'name'), index=isins.index)
+        return keys, resolved_isin, matched_by
+
+    def positions_frame(self, positions: Iterable[Dict[str, Any]], source_field: str = 'source',
+                        account_field: str = 'account', date_field: str = 'report_date') -> pd.DataFrame:
+        """
+        Build the table of the book, one row per account, security, date and source.
+
+        Args:
+            positions: Positions with isin, security_name, quantity, price and market_value
+            source_field: Field naming the source of each position
+            account_field: Field naming the account of each position
+            date_field: Field holding the statement date of each position
+
+        Returns:
+            DataFrame with key, isin, security_name, matched_by, account, date,
+            source, quantity, price and value columns
+        """
+        df = pd.DataFrame(list(positions))
+        if df.empty:
+            return pd.DataFrame(columns=['key', 'isin', 'security_name', 'matched_by', 'account', 'date',
+                                         'source', 'quantity', 'price', 'value'])
+
+        frame = pd.DataFrame({
+            'account': _column(df, account_field),
+            'date': _iso_dates(_column(df, date_field)),
+            'source': _column(df, source_field),
+            'security_name': _column(df, 'security_name'),
+            'quantity': parse_amounts(df['quantity']) if 'quantity' in df else np.nan,
+            'price': parse_amounts(df['price']) if 'price' in df else np.nan,
+            'value': parse_amounts(df['market_value']) if 'market_value' in df else np.nan
+        }, index=df.index)
+        keys, isins, matched_by = self._security_keys(_column(df, 'isin'), frame['security_name'])
+        frame['key'], frame['isin'], frame['matched_by'] = keys, isins, matched_by
+        frame = frame[frame['key'].notna()]
+
+        # Fill a missing value or price from the other two
+        frame['value'] = frame['value'].fillna(frame['quantity'] * frame['price'])
+        implied = frame['value'] / frame['quantity'].where(frame['quantity'] != 0)
+        frame['price'] = frame['price'].where(frame['price'] > 0, implied)
+
+        # Lots of the same position in one source are added up
+        grouped = frame.groupby(_POSITION_KEYS + ['source'], sort=False)
+        book = grouped.agg(quantity=('quantity', 'sum'), value=('value', 'sum'), price=('price', 'mean'),
+                           isin=('isin', 'first'), security_name=('security_name', 'first'),
+                           matched_by=('matched_by', 'first'))
+        return book.reset_index()
+
+    def _price_breaks(self, book: pd.DataFrame) -> pd.DataFrame:
+        """Prices deviating from the median price of the security on the same date."""
+        prices = book.groupby(['key', 'date'])['price']
+        consensus = prices.transform('median')
+        deviation = book['price'] - consensus
+        breaks = (prices.transform('count') > 1) & (deviation.abs() > self.price_tolerance * consensus.abs())
+        found = book[breaks]
+        return found.assign(
+            type=BREAK_PRICE, reference='consensus', expected=consensus[breaks], actual=found['price'],
+            impact=(deviation[breaks] * found['quantity']).abs().fillna(0.0)
+        )
+
+    def _side_breaks(self, expected: pd.DataFrame, actual: pd.DataFrame, reference: str, source: str,
+                     keys: List[str], compare_values: bool) -> pd.DataFrame:
+        """Quantity, value and missing breaks of one side against its reference."""
+        merged = expected.merge(actual, on=keys, how='outer', suffixes=('_ref', ''), indicator=True)
+        for column in ('isin', 'security_name', 'matched_by'):
+            merged[column] = merged[column].fillna(merged[f"{column}_ref"])
+        merged['reference'] = reference
+        if 'source' not in keys:
+            merged['source'] = source
+        found = []
+
+        only_reference = merged['_merge'] == 'left_only'
+        only_source = merged['_merge'] == 'right_only'
+        missing = merged[only_reference | only_source].assign(type=BREAK_MISSING)
+        missing['expected'] = missing['quantity_ref'].fillna(0.0)
+        missing['actual'] = missing['quantity'].fillna(0.0)
+        missing['impact'] = missing['value_ref'].fillna(missing['value']).abs().fillna(0.0)
+        found.append(missing)
+
+        both = merged[merged['_merge'] == 'both']
+        quantity_diff = both['quantity'] - both['quantity_ref']
+        quantity_breaks = quantity_diff.abs() > self.quantity_tolerance
+        price = both['price_ref'].fillna(both['price'])
+        quantity = both[quantity_breaks]
+        found.append(quantity.assign(
+            type=BREAK_QUANTITY, expected=quantity['quantity_ref'], actual=quantity['quantity'],
+            impact=(quantity_diff * price).abs().fillna(0.0)[quantity_breaks]
+        ))
+
+        if compare_values:
+            value_diff = (both['value'] - both['value_ref']).abs()
+            value_breaks = ((value_diff > self.value_abs_tolerance)
+                            & (value_diff > self.value_tolerance * both['value_ref'].abs()))
+            value = both[value_breaks]
+            found.append(value.assign(
+                type=BREAK_VALUE, expected=value['value_ref'], actual=value['value'], impact=value_diff[value_breaks]
+            ))
+        return pd.concat(found, ignore_index=True)
+
+    def _report(self, book: pd.DataFrame, breaks: List[pd.DataFrame], reference: Optional[str]) -> Dict[str, Any]:
+        """Break report ranked by monetary impact."""
+        frames = [frame for frame in breaks if not frame.empty]
+        if frames:
+            table = pd.concat(frames, ignore_index=True)
+        else:
+            table = pd.DataFrame(columns=_BREAK_COLUMNS)
+        table['difference'] = table['actual'] - table['expected']
+        table['difference_pct'] = (table['difference'] / table['expected'].where(table['expected'] != 0)) * 100
+        table = table.sort_values('impact', ascending=False, kind='stable')[_BREAK_COLUMNS]
+        table = table.astype(object).where(table.notna(), None)
+        table[['account', 'date', 'source']] = table[['account', 'date', 'source']].replace('', None)
+
+        by_type = table['type'].value_counts().to_dict()
+        impact = float(sum(table['impact'])) if len(table) else 0.0
+        summary = {
+            'positions': len(book),
+            'securities': int(book['key'].nunique()) if len(book) else 0,
+            'sources': sorted(source for source in book['source'].unique() if source) if len(book) else [],
+            'matched_by_name': int(book['matched_by'].eq('name').sum()) if len(book) else 0,
+            'breaks': len(table),
+            'breaks_by_type': {name: int(count) for name, count in by_type.items()},
+            'total_impact': round(impact, 2)
+        }
+        logger.info(f"Reconciled {summary['positions']} positions: {summary['breaks']} breaks, "
+                    f"impact {summary['total_impact']:,.2f}")
+        return {
+            'status': 'success',
+            'reference': reference,
+            'summary': summary,
+            'breaks': table.to_dict('records')
+        }
+
+    def reconcile(self, positions: Iterable[Dict[str, Any]], reference: Optional[str] = None,
+                  source_field: str = 'source', account_field: str = 'account',
+                  date_field: str = 'report_date') -> Dict[str, Any]:
+        """
+        Reconcile positions across sources, e.g. custodian statements and internal records.
+
+        Each source is compared with the reference source for the accounts and
+        dates both report. Prices are compared across all positions in the
+        security on the same date.
+
+        Args:
+            positions: Positions with isin, security_name, quantity, price and market_value
+            reference: Source of record (default: the source with the most positions)
+            source_field: Field naming the source of each position
+            account_field: Field naming the account of each position
+            date_field: Field holding the statement date of each position
+
+        Returns:
+            Break report: status, reference, summary and breaks ranked by impact
+        """
+        book = self.positions_frame(positions, source_field, account_field, date_field)
+        breaks = [self._price_breaks(book)] if len(book) else []
+
+        sources = book['source'].value_counts() if len(book) else pd.Series(dtype=int)
+        if len(sources) > 1:
+            if reference is None or reference not in sources.index:
+                # Most positions first, then by name so the choice is stable
+                reference = sorted(sources.index, key=lambda name: (-sources[name], name))[0]
+            expected = book[book['source'] == reference].drop(columns='source')
+            for source in sources.index:
+                if source == reference:
+                    continue
+                actual = book[book['source'] == source].drop(columns='source')
+                # Only statements both sources report are compared
+                covered = actual[['account', 'date']].drop_duplicates().merge(
+                    expected[['account', 'date']].drop_duplicates())
+                breaks.append(self._side_breaks(expected.merge(covered), actual.merge(covered),
+                                                reference, source, _POSITION_KEYS, True))
+        elif len(sources) == 1:
+            reference = sources.index[0]
+        return self._report(book, breaks, reference or None)
+
+    def roll_forward(self, positions: Iterable[Dict[str, Any]], source_field: str = 'source',
+                     account_field: str = 'account', date_field: str = 'report_date') -> Dict[str, Any]:
+        """
+        Reconcile each statement with the previous statement of the same account and source.
+
+        Positions that changed quantity, appeared or disappeared between two
+        consecutive statements are reported, with the change valued at the
+        latest price. Without trade data these are the changes to explain.
+
+        Args:
+            positions: Positions with isin, security_name, quantity, price and market_value
+            source_field: Field naming the source of each position
+            account_field: Field naming the account of each position
+            date_field: Field holding the statement date of each position
+
+        Returns:
+            Break report: status, summary and breaks ranked by impact
+        """
+        book = self.positions_frame(positions, source_field, account_field, date_field)
+        book = book[book['date'] != '']
+        statements = book[['account', 'source', 'date']].drop_duplicates().sort_values(['account', 'source', 'date'])
+        statements['next_date'] = statements.groupby(['account', 'source'])['date'].shift(-1)
+
+        # Each statement is the reference of the next one
+        previous = book.merge(statements, on=['account', 'source', 'date'])
+        previous = previous[previous['next_date'].notna()]
+        previous = previous.assign(date=previous['next_date']).drop(columns='next_date')
+        first_dates = statements.groupby(['account', 'source'])['date'].transform('min')
+        later = statements[statements['date'] != first_dates][['account', 'source', 'date']]
+        current = book.merge(later, on=['account', 'source', 'date'])
+
+        keys = ['account', 'source', 'key', 'date']
+        breaks = []
+        if len(current):
+            breaks.append(self._side_breaks(previous, current, 'previous statement', None, keys, False))
+        return self._report(book, breaks, None)
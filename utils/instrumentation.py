@@ -0,0 +1,321 @@
+import os
+import json
+import time
+import bisect
+import logging
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Span names used across the extraction pipeline
+SPAN_PAGE_PARSE = 'page_parse'
+SPAN_TABLE_EXTRACTION = 'table_extraction'
+SPAN_TABULA = 'tabula'
+SPAN_LLM_CALL = 'llm_call'
+SPAN_ANALYSIS = 'analysis'
+SPAN_EXPORT = 'export'
+SPAN_EXTRACTION = 'extraction'
+
+# Histogram bucket upper bounds in seconds, from a regex pass to an LLM call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+MAX_TRACES = 100
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets: Sorted bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        """Record one duration."""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if error:
+            self.errors += 1
+
+    def cumulative_counts(self) -> List[int]:
+        """Counts of observations <= each bucket bound, ending with +Inf."""
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Histogram as a dictionary."""
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'errors': self.errors,
+            'buckets': dict(zip(bounds, self.cumulative_counts()))
+        }
+
+
+class Trace:
+    """Timeline of the spans recorded while processing one document."""
+
+    def __init__(self, document: str, **labels):
+        """
+        Initialize the trace.
+
+        Args:
+            document: Document identifier, usually the filename
+            **labels: Extra labels stored with the trace
+        """
+        self.document = document
+        self.labels = labels
+        self.started_at = datetime.now().isoformat()
+        self.spans = []
+        self.duration = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, seconds: float, labels: Dict[str, Any], error: Optional[str]):
+        """Append a finished span; safe to call from worker threads."""
+        span = {
+            'name': name,
+            'offset': round(start - self._start, 6),
+            'seconds': round(seconds, 6),
+            'labels': labels
+        }
+        if error:
+            span['error'] = error
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self):
+        """Mark the trace as complete."""
+        self.duration = time.perf_counter() - self._start
+
+    def totals(self) -> Dict[str, float]:
+        """Total seconds per span name."""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span['name']] = totals.get(span['name'], 0.0) + span['seconds']
+        return {name: round(seconds, 6) for name, seconds in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Trace as a dictionary."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['offset'])
+        return {
+            'document': self.document,
+            'labels': self.labels,
+            'started_at': self.started_at,
+            'duration': round(self.duration, 6) if self.duration is not None else None,
+            'totals': self.totals(),
+            'spans': spans
+        }
+
+
+class TimingRegistry:
+    """
+    Collects span timings into per-name histograms and per-document traces.
+
+    Spans are recorded into the trace active in the current context. Code that
+    hands work to a thread pool should submit through contextvars.copy_context()
+    so the worker spans land in the same trace.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, max_traces: int = MAX_TRACES):
+        """
+        Initialize the registry.
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+            max_traces: Number of finished traces to keep
+        """
+        self.buckets = tuple(buckets)
+        self._histograms = {}
+        self._traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, error: bool = False):
+        """
+        Record a duration for a span name.
+
+        Args:
+            name: Span name
+            seconds: Duration in seconds
+            error: Whether the span ended with an exception
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds, error)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """
+        Time a block of code.
+
+        Args:
+            name: Span name, e.g. SPAN_LLM_CALL
+            **labels: Labels stored with the span in the current trace
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(name, seconds, error is not None)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.add_span(name, start, seconds, labels, error)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """
+        Decorator that times every call of a function.
+
+        Args:
+            name: Span name
+            **labels: Labels stored with the span
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def trace(self, document: str, **labels) -> Iterator[Trace]:
+        """
+        Collect the spans of one document into a trace.
+
+        A trace opened while another is active joins the outer one.
+
+        Args:
+            document: Document identifier
+            **labels: Extra labels stored with the trace
+        """
+        active = _current_trace.get()
+        if active is not None:
+            yield active
+            return
+
+        trace = Trace(document, **labels)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.finish()
+            with self._lock:
+                self._traces.append(trace)
+            logger.info(f"Trace for {document}: {trace.duration:.2f}s {trace.totals()}")
+
+    def histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of all histograms by span name."""
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())}
+
+    def recent_traces(self) -> List[Dict[str, Any]]:
+        """Finished traces, oldest first."""
+        with self._lock:
+            traces = list(self._traces)
+        return [trace.to_dict() for trace in traces]
+
+    def reset(self):
+        """Drop all recorded timings and traces."""
+        with self._lock:
+            self._histograms = {}
+            self._traces.clear()
+
+    def prometheus_text(self, metric: str = 'pipeline_span_seconds') -> str:
+        """
+        Render the histograms in the Prometheus text exposition format.
+
+        Args:
+            metric: Metric name
+
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            lines = [f"# HELP {metric} Time spent in extraction pipeline spans.",
+                     f"# TYPE {metric} histogram"]
+            for name, histogram in histograms:
+                bounds = [str(bound) for bound in histogram.buckets] + ['+Inf']
+                for bound, count in zip(bounds, histogram.cumulative_counts()):
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+
+            lines.append(f"# HELP {metric}_errors_total Spans that ended with an exception.")
+            lines.append(f"# TYPE {metric}_errors_total counter")
+            for name, histogram in histograms:
+                lines.append(f'{metric}_errors_total{{span="{name}"}} {histogram.errors}')
+        return "\n".join(lines) + "\n"
+
+    def export_json(self, path: str):
+        """
+        Write histograms and recent traces to a JSON file.
+
+        Args:
+            path: Output file path
+        """
+        report = {
+            'generated_at': datetime.now().isoformat(),
+            'histograms': self.histograms(),
+            'traces': self.recent_traces()
+        }
+        _write_atomic(path, json.dumps(report, indent=2, ensure_ascii=False, default=str))
+
+    def export_prometheus(self, path: str):
+        """
+        Write histograms to a Prometheus text file (e.g. for the node exporter textfile collector).
+
+        Args:
+            path: Output file path
+        """
+        _write_atomic(path, self.prometheus_text())
+
+
+def _write_atomic(path: str, text: str):
+    """Write a file via a temporary file so readers never see a partial export."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+# Process-wide registry used by the pipeline
+timings = TimingRegistry()
+span = timings.span
+timed = timings.timed
+trace = timings.trace
@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job statuses, matching the status values the upload page already expects
+STATUS_QUEUED = 'queued'
+STATUS_PROCESSING = 'processing'
+STATUS_SUCCESS = 'success'
+STATUS_ERROR = 'error'
+
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+
+class JobQueue:
+    """
+    In-process background job queue with progress tracking and a result store.
+
+    Jobs run in a thread pool. Each job function receives a progress callback
+    with the usual (current, total, message) signature used across the
+    processing pipeline. When a results directory is given, job state and
+    results are also written to disk so they survive a restart.
+    """
+
+    def __init__(self, max_workers: int = 2, results_dir: Optional[str] = None):
+        """
+        Initialize the job queue.
+
+        Args:
+            max_workers: Number of worker threads
+            results_dir: Optional directory for the file-backed result store
+        """
+        self.results_dir = results_dir
+        if results_dir:
+            os.makedirs(results_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> str:
+        """
+        Submit a job for background execution.
+
+        The job function is called as func(*args, progress_callback=callback, **kwargs).
+
+        Args:
+            func: Job function
+            *args: Positional arguments for the job function
+            **kwargs: Keyword arguments for the job function
+
+        Returns:
+            Job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': STATUS_QUEUED,
+                'progress': 0,
+                'current': 0,
+                'total': 0,
+                'message': 'Waiting in queue...',
+                'created_at': now,
+                'updated_at': now
+            }
+        self._persist(job_id)
+
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        logger.info(f"Submitted job {job_id}")
+        return job_id
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the current status of a job.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Status dictionary, or None if the job is unknown
+        """
+        with self._lock:
+            status = self._jobs.get(job_id)
+            if status is not None:
+                return dict(status)
+
+        stored = self._load(job_id)
+        return stored.get('job') if stored else None
+
+    def get_result(self, job_id: str) -> Any:
+        """
+        Get the result of a finished job.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Job result, or None if the job has not finished successfully
+        """
+        with self._lock:
+            if job_id in self._results:
+                return self._results[job_id]
+
+        stored = self._load(job_id)
+        return stored.get('result') if stored else None
+
+    def discard(self, job_id: str):
+        """
+        Remove a job and its result from the store.
+
+        Args:
+            job_id: Job ID
+        """
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._results.pop(job_id, None)
+
+        path = self._job_path(job_id)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id: str, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        """Execute a job and record its outcome."""
+        self._update(job_id, status=STATUS_PROCESSING, message='Processing file...')
+
+        def progress_callback(current: int, total: int, message: str):
+            progress = int(current * 100 / total) if total else 0
+            self._update(job_id, current=current, total=total,
+                         progress=min(progress, 99), message=message)
+
+        try:
+            result = func(*args, progress_callback=progress_callback, **kwargs)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            self._update(job_id, status=STATUS_ERROR, progress=0, message=str(e), error=str(e))
+            return
+
+        if result is None:
+            self._update(job_id, status=STATUS_ERROR, progress=0,
+                         message='Failed to process file', error='Failed to process file')
+            return
+
+        with self._lock:
+            self._results[job_id] = result
+        self._update(job_id, status=STATUS_SUCCESS, progress=100, message='Processing complete')
+        logger.info(f"Job {job_id} completed")
+
+    def _update(self, job_id: str, **fields):
+        """Update job state under the lock and persist it."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job['updated_at'] = datetime.now().isoformat()
+
+        # Progress ticks are frequent; only write status transitions to disk
+        if fields.get('status') in (STATUS_PROCESSING, STATUS_SUCCESS, STATUS_ERROR):
+            self._persist(job_id)
+
+    def _job_path(self, job_id: str) -> Optional[str]:
+        """Path of the stored state for a job."""
+        # Job IDs come from request URLs; never let them escape the directory
+        if not self.results_dir or not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        return os.path.join(self.results_dir, f"{job_id}.json")
+
+    def _persist(self, job_id: str):
+        """Write job state and result to the results directory."""
+        path = self._job_path(job_id)
+        if not path:
+            return
+
+        with self._lock:
+            record = {'job': dict(self._jobs.get(job_id, {})), 'result': self._results.get(job_id)}
+
+        try:
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, default=str)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.error(f"Error persisting job {job_id}: {str(e)}")
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load stored job state from the results directory."""
+        path = self._job_path(job_id)
+        if not path or not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading job {job_id}: {str(e)}")
+            return None
@@ -0,0 +1,157 @@
+import time
+import logging
+import importlib
+import importlib.util
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Heavy optional backends, by short name. Modules that need one of these hold a
+# LazyModule proxy instead of importing it, so the import cost is paid on first
+# use rather than when the entry point starts.
+BACKENDS = {
+    'gemini': 'google.generativeai',
+    'vertex': 'google.cloud.aiplatform',
+    'mistral': 'mistralai',
+    'tabula': 'tabula',
+    'pandas': 'pandas',
+    'sklearn_text': 'sklearn.feature_extraction.text',
+    'sklearn_naive_bayes': 'sklearn.naive_bayes',
+    'sklearn_pipeline': 'sklearn.pipeline',
+}
+
+_load_times = {}
+_load_lock = threading.RLock()
+_proxies = weakref.WeakSet()
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Import errors are raised at that point, so features whose backend is
+    missing fail when used instead of breaking the whole application at startup.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the proxy.
+
+        Args:
+            name: Registered backend name or dotted module name. Backend names
+                are resolved on first use, so a backend can be re-registered
+                (e.g. to an offline stub) after modules holding proxies are imported.
+        """
+        self._module_name = name
+        self._module = None
+        _proxies.add(self)
+
+    def _load(self):
+        """Import the underlying module once."""
+        if self._module is None:
+            self._module = load_module(BACKENDS.get(self._module_name, self._module_name))
+        return self._module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._module_name!r} ({state})>"
+
+
+def register_backend(name: str, module_name: str):
+    """
+    Register a heavy backend so it can be loaded by name.
+
+    Proxies already bound to the backend are reset and load the new module on
+    their next use.
+
+    Args:
+        name: Short backend name
+        module_name: Dotted module name
+    """
+    with _load_lock:
+        BACKENDS[name] = module_name
+        for proxy in list(_proxies):
+            if proxy._module_name == name:
+                proxy._module = None
+
+
+def lazy_import(module_name: str) -> LazyModule:
+    """
+    Get a proxy for a module without importing it.
+
+    Args:
+        module_name: Dotted module name, or a registered backend name
+
+    Returns:
+        LazyModule proxy
+    """
+    return LazyModule(module_name)
+
+
+def get_backend(name: str):
+    """
+    Import a registered backend now.
+
+    Args:
+        name: Registered backend name
+
+    Returns:
+        The imported module
+    """
+    if name not in BACKENDS:
+        raise KeyError(f"Unknown backend: {name}")
+    return load_module(BACKENDS[name])
+
+
+def load_module(module_name: str):
+    """
+    Import a module and record how long the first import took.
+
+    Args:
+        module_name: Dotted module name
+
+    Returns:
+        The imported module
+    """
+    with _load_lock:
+        start_time = time.perf_counter()
+        module = importlib.import_module(module_name)
+        if module_name not in _load_times:
+            _load_times[module_name] = time.perf_counter() - start_time
+            logger.debug(f"Loaded {module_name} in {_load_times[module_name]:.3f}s")
+    return module
+
+
+def loaded_backends() -> Dict[str, float]:
+    """
+    Get the modules loaded through this registry.
+
+    Returns:
+        Dictionary of module name to first import time in seconds
+    """
+    with _load_lock:
+        return dict(_load_times)
+
+
+def backend_available(name: str) -> Optional[bool]:
+    """
+    Check whether a registered backend can be imported, without importing it.
+
+    Args:
+        name: Registered backend name
+
+    Returns:
+        True or False, or None if the backend name is unknown
+    """
+    module_name = BACKENDS.get(name)
+    if module_name is None:
+        return None
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except ModuleNotFoundError:
+        return False
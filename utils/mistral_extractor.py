@@ -1,13 +1,24 @@
 import os
+import io
+import mmap
 import base64
 import logging
 import re
 import json
-from mistralai import Mistral
+import random
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.lazy_loader import lazy_import
+from utils.instrumentation import span, timed, SPAN_EXTRACTION, SPAN_LLM_CALL, SPAN_PAGE_PARSE, SPAN_TABLE_EXTRACTION
+from utils.transaction_tokenizer import tokenizer
 from dotenv import load_dotenv
 from datetime import datetime
 import time
 
+mistralai = lazy_import('mistral')
+
 # הגדרת לוגים
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -17,14 +28,134 @@ load_dotenv()
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 logger.debug(f"MISTRAL_API_KEY exists: {bool(MISTRAL_API_KEY)}")
 
+PDF_DATA_URL_PREFIX = b"data:application/pdf;base64,"
+
+# Base64 encodes 3 input bytes to 4 output characters; chunks must be a
+# multiple of 3 so the concatenated chunks equal a one-shot encoding
+ENCODE_CHUNK_SIZE = 3 * 1024 * 1024
+
+# Files larger than this are sent to OCR in page batches
+LARGE_PDF_THRESHOLD = 10 * 1024 * 1024
+DEFAULT_PAGE_BATCH_SIZE = 10
+
+# Concurrent OCR requests per document, and retries per page batch
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+RETRY_DELAY = 2
+
+# OCR results per page batch, shared by all extractors in the process so a
+# rerun after a partial failure only sends the batches that failed
+MAX_CACHED_BATCHES = 256
+_ocr_batch_cache = {}
+_ocr_batch_cache_lock = threading.Lock()
+
+def encode_pdf_data_url(source, chunk_size=ENCODE_CHUNK_SIZE):
+    """
+    Build a base64 PDF data URL without holding extra copies of the file.
+    
+    The file is memory-mapped and encoded chunk by chunk into a single
+    preallocated buffer that already holds the data URL prefix, so the only
+    full-size allocations are that buffer and the final string.
+    
+    Args:
+        source: Path to a PDF file, or a bytes-like object
+        chunk_size (int): Number of input bytes encoded per step
+        
+    Returns:
+        str: data:application/pdf;base64,... URL
+    """
+    chunk_size -= chunk_size % 3
+    
+    def _encode(view):
+        encoded_length = 4 * ((len(view) + 2) // 3)
+        buffer = bytearray(len(PDF_DATA_URL_PREFIX) + encoded_length)
+        buffer[:len(PDF_DATA_URL_PREFIX)] = PDF_DATA_URL_PREFIX
+        
+        position = len(PDF_DATA_URL_PREFIX)
+        for offset in range(0, len(view), chunk_size):
+            encoded = base64.b64encode(view[offset:offset + chunk_size])
+            buffer[position:position + len(encoded)] = encoded
+            position += len(encoded)
+        
+        return buffer.decode("ascii")
+    
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        with memoryview(source) as view:
+            return _encode(view)
+    
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return PDF_DATA_URL_PREFIX.decode("ascii")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                return _encode(view)
+
+def clear_ocr_cache():
+    """Clear the shared per-batch OCR cache."""
+    with _ocr_batch_cache_lock:
+        _ocr_batch_cache.clear()
+
+def count_pdf_pages(pdf_path):
+    """
+    Count the pages of a PDF without rendering them.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        
+    Returns:
+        int: Number of pages
+    """
+    try:
+        from PyPDF2 import PdfReader
+        return len(PdfReader(pdf_path).pages)
+    except ImportError:
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+def iter_pdf_page_batches(pdf_path, batch_size=DEFAULT_PAGE_BATCH_SIZE):
+    """
+    Split a PDF into page batches encoded as data URLs.
+    
+    Only one batch is held in memory at a time.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        batch_size (int): Number of pages per batch
+        
+    Yields:
+        tuple: (first_page, last_page, data_url) with 1-based inclusive page numbers
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+    
+    reader = PdfReader(pdf_path)
+    total_pages = len(reader.pages)
+    
+    for start in range(0, total_pages, batch_size):
+        end = min(start + batch_size, total_pages)
+        writer = PdfWriter()
+        for page_index in range(start, end):
+            writer.add_page(reader.pages[page_index])
+        
+        with io.BytesIO() as batch_file:
+            writer.write(batch_file)
+            data_url = encode_pdf_data_url(batch_file.getbuffer())
+        
+        yield start + 1, end, data_url
+
 class MistralExtractor:
     """
     מחלץ תוכן מקבצי PDF באמצעות Mistral OCR API.
     """
     
-    def __init__(self):
-        """Initialize the Mistral OCR extractor."""
-        self.api_key = MISTRAL_API_KEY
+    def __init__(self, api_key=None):
+        """
+        Initialize the Mistral OCR extractor.
+        
+        Args:
+            api_key (str): Mistral API key (defaults to MISTRAL_API_KEY)
+        """
+        self.api_key = api_key or MISTRAL_API_KEY
         if not self.api_key:
             raise ValueError("MISTRAL_API_KEY environment variable is not set")
         
@@ -32,39 +163,85 @@ class MistralExtractor:
         logger.debug("Initializing Mistral client...")
         
         try:
-            self.client = Mistral(api_key=self.api_key)
+            self.client = mistralai.Mistral(api_key=self.api_key)
             self.model = "mistral-ocr-latest"  # מודל ה-OCR של Mistral
             logger.info("Mistral OCR extractor initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Mistral client: {str(e)}")
             raise
     
-    def process_pdf_file(self, pdf_path):
-        """Process a local PDF file and extract text using Mistral OCR."""
+    def process_pdf_file(self, pdf_path, page_batch_size=None):
+        """
+        Process a local PDF file and extract text using Mistral OCR.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            page_batch_size (int): Pages per OCR request. Defaults to the whole
+                document, or DEFAULT_PAGE_BATCH_SIZE for files larger than
+                LARGE_PDF_THRESHOLD
+                
+        Returns:
+            str: Markdown text of all pages in page order
+        """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
         logger.info(f"Processing local PDF: {pdf_path}")
         
         try:
-            # Read the PDF file
-            logger.debug("Reading PDF file...")
-            with open(pdf_path, "rb") as f:
-                pdf_content = f.read()
-            logger.debug(f"Read {len(pdf_content)} bytes from PDF file")
-            
-            # Convert to base64
-            logger.debug("Converting PDF to base64...")
-            pdf_base64 = base64.b64encode(pdf_content).decode("utf-8")
-            logger.debug(f"Base64 string length: {len(pdf_base64)}")
-            
-            # Create a data URL
-            pdf_data_url = f"data:application/pdf;base64,{pdf_base64}"
+            file_size = os.path.getsize(pdf_path)
+            logger.debug(f"PDF file size: {file_size} bytes")
+            
+            if page_batch_size is None and file_size > LARGE_PDF_THRESHOLD:
+                page_batch_size = DEFAULT_PAGE_BATCH_SIZE
+            
+            if page_batch_size:
+                try:
+                    pages = self._ocr_pages_concurrently(pdf_path, page_batch_size)
+                    return "\n".join(pages[page_num] for page_num in sorted(pages)).strip()
+                except ImportError:
+                    logger.warning("PyPDF2 is not installed; sending the whole document in one request")
+            
+            # Encode straight from a memory map into the data URL
+            logger.debug("Converting PDF to base64 data URL...")
+            pdf_data_url = encode_pdf_data_url(pdf_path)
             logger.debug(f"Data URL length: {len(pdf_data_url)}")
             
-            # Send request to Mistral API
-            logger.debug("Sending request to Mistral API...")
-            try:
+            text = self._ocr_data_url(pdf_data_url)
+            
+            logger.debug(f"Extracted text: {text[:500]}...")  # Log first 500 chars
+            return text.strip()
+            
+        except Exception as e:
+            logger.error(f"Error processing local PDF: {str(e)}", exc_info=True)
+            raise
+    
+    def _ocr_data_url(self, pdf_data_url):
+        """
+        Run Mistral OCR on a PDF data URL.
+        
+        Args:
+            pdf_data_url (str): base64 PDF data URL
+            
+        Returns:
+            str: Markdown text of all pages
+        """
+        return "".join(markdown + "\n" for markdown in self._ocr_pages(pdf_data_url))
+    
+    def _ocr_pages(self, pdf_data_url):
+        """
+        Run Mistral OCR on a PDF data URL and return each page's markdown.
+        
+        Args:
+            pdf_data_url (str): base64 PDF data URL
+            
+        Returns:
+            list: Markdown of each page, in document order
+        """
+        # Send request to Mistral API
+        logger.debug("Sending request to Mistral API...")
+        try:
+            with span(SPAN_LLM_CALL, provider="mistral", model="mistral-ocr-latest"):
                 response = self.client.ocr.process(
                     model="mistral-ocr-latest",
                     document={
@@ -72,32 +249,124 @@ class MistralExtractor:
                         "document_url": pdf_data_url
                     }
                 )
-                logger.debug("Successfully received response from Mistral API")
-                logger.debug(f"Response type: {type(response)}")
-                logger.debug(f"Response content: {response}")
+            logger.debug("Successfully received response from Mistral API")
+            logger.debug(f"Response type: {type(response)}")
+        except Exception as e:
+            logger.error(f"Error calling Mistral API: {str(e)}", exc_info=True)
+            raise
+        
+        if not hasattr(response, "pages"):
+            logger.warning("Response has no 'pages' attribute")
+            logger.debug(f"Response attributes: {dir(response)}")
+            return []
+        
+        logger.debug(f"Number of pages: {len(response.pages)}")
+        return [getattr(page, "markdown", "") or "" for page in response.pages]
+    
+    def _ocr_batch_with_retry(self, first_page, last_page, data_url, max_retries=DEFAULT_MAX_RETRIES):
+        """
+        OCR one page batch, retrying with exponential backoff and caching the result.
+        
+        Args:
+            first_page (int): First page of the batch (1-based)
+            last_page (int): Last page of the batch (1-based, inclusive)
+            data_url (str): base64 data URL of the batch
+            max_retries (int): Maximum number of attempts
+            
+        Returns:
+            dict: Page number -> markdown for every page in the batch
+        """
+        cache_key = hashlib.sha256(data_url.encode("ascii")).hexdigest()
+        with _ocr_batch_cache_lock:
+            cached = _ocr_batch_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached OCR result for pages {first_page}-{last_page}")
+            return {first_page + offset: markdown for offset, markdown in enumerate(cached)}
+        
+        for attempt in range(max_retries):
+            try:
+                markdowns = self._ocr_pages(data_url)
+                break
             except Exception as e:
-                logger.error(f"Error calling Mistral API: {str(e)}", exc_info=True)
-                raise
-            
-            # Extract text from all pages
-            text = ""
-            logger.debug("Processing response pages...")
-            if hasattr(response, "pages"):
-                logger.debug(f"Number of pages: {len(response.pages)}")
-                for page in response.pages:
-                    logger.debug(f"Processing page: {page}")
-                    if hasattr(page, "markdown"):
-                        text += page.markdown + "\n"
-            else:
-                logger.warning("Response has no 'pages' attribute")
-                logger.debug(f"Response attributes: {dir(response)}")
+                if attempt == max_retries - 1:
+                    raise
+                delay = RETRY_DELAY * (2 ** attempt) + random.uniform(0, 1)
+                logger.warning(f"OCR failed for pages {first_page}-{last_page} "
+                               f"(attempt {attempt + 1}/{max_retries}): {str(e)}. Retrying in {delay:.1f}s")
+                time.sleep(delay)
+        
+        # Pad or trim so every page of the batch keeps its true page number
+        expected_pages = last_page - first_page + 1
+        markdowns = (list(markdowns) + [""] * expected_pages)[:expected_pages]
+        
+        with _ocr_batch_cache_lock:
+            if len(_ocr_batch_cache) >= MAX_CACHED_BATCHES:
+                _ocr_batch_cache.pop(next(iter(_ocr_batch_cache)))
+            _ocr_batch_cache[cache_key] = markdowns
+        
+        return {first_page + offset: markdown for offset, markdown in enumerate(markdowns)}
+    
+    def _ocr_pages_concurrently(self, pdf_path, page_batch_size=DEFAULT_PAGE_BATCH_SIZE,
+                                max_concurrency=DEFAULT_MAX_CONCURRENCY, progress_callback=None,
+                                failed_pages=None):
+        """
+        OCR a PDF in page batches submitted concurrently.
+        
+        At most max_concurrency batches are encoded and in flight at once, so
+        memory stays bounded by the batch size rather than the document size.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            page_batch_size (int): Pages per OCR request
+            max_concurrency (int): Maximum concurrent OCR requests
+            progress_callback (callable): Optional (current, total, message) callback
+            failed_pages (list): Optional list that receives the page numbers of
+                batches that still failed after retries
             
-            logger.debug(f"Extracted text: {text[:500]}...")  # Log first 500 chars
-            return text.strip()
+        Returns:
+            dict: Page number (1-based) -> markdown
+        """
+        total_pages = count_pdf_pages(pdf_path)
+        batches = iter_pdf_page_batches(pdf_path, page_batch_size)
+        
+        pages = {}
+        completed_pages = 0
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ocr') as executor:
+            pending = {}
             
-        except Exception as e:
-            logger.error(f"Error processing local PDF: {str(e)}", exc_info=True)
-            raise
+            def submit_next():
+                batch = next(batches, None)
+                if batch is None:
+                    return False
+                first_page, last_page, data_url = batch
+                # Run in a copy of the caller's context so OCR spans join its trace
+                context = contextvars.copy_context()
+                future = executor.submit(context.run, self._ocr_batch_with_retry, first_page, last_page, data_url)
+                pending[future] = (first_page, last_page)
+                return True
+            
+            while len(pending) < max_concurrency and submit_next():
+                pass
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    first_page, last_page = pending.pop(future)
+                    try:
+                        pages.update(future.result())
+                    except Exception as e:
+                        logger.error(f"OCR failed for pages {first_page}-{last_page}: {str(e)}")
+                        if failed_pages is not None:
+                            failed_pages.extend(range(first_page, last_page + 1))
+                    
+                    completed_pages += last_page - first_page + 1
+                    if progress_callback:
+                        progress_callback(completed_pages, total_pages,
+                                          f"OCR completed for pages {first_page}-{last_page}")
+                    submit_next()
+        
+        return pages
     
     def extract_financial_data(self, text, filename):
         """
@@ -132,51 +401,17 @@ class MistralExtractor:
                 }
             }
             
-            # Try different patterns for transaction extraction
-            patterns = [
-                # Pattern for standard bank statement format
-                r"(\d{2}[-/]\d{2}[-/]\d{4})\s+([^|]+?)\s+([-]?\d+[.,]\d{2})\s+([-]?\d+[.,]\d{2})",
-                # Pattern for credit card statement
-                r"(\d{2}[-/]\d{2}[-/]\d{4})\s+([^|]+?)\s+([-]?\d+[.,]\d{2})",
-                # Pattern for investment portfolio
-                r"\|([^|]+)\|([^|]+)\|([^|]+)\|([^|]+)\|"
-            ]
-            
-            for pattern in patterns:
-                matches = re.finditer(pattern, text)
-                for match in matches:
-                    try:
-                        if len(match.groups()) == 4:  # Standard bank statement
-                            date, description, amount, balance = match.groups()
-                            amount = float(amount.replace(',', '.'))
-                            balance = float(balance.replace(',', '.'))
-                        elif len(match.groups()) == 3:  # Credit card statement
-                            date, description, amount = match.groups()
-                            amount = float(amount.replace(',', '.'))
-                            balance = None
-                        else:  # Investment portfolio
-                            date, description, amount, balance = match.groups()
-                            amount = float(amount.replace(',', '.'))
-                            balance = float(balance.replace(',', '.'))
-                        
-                        transaction = {
-                            "date": self._normalize_date(date),
-                            "description": description.strip(),
-                            "amount": amount,
-                            "balance": balance
-                        }
-                        
-                        data["transactions"].append(transaction)
-                        
-                        # Update summary
-                        if amount > 0:
-                            data["summary"]["total_income"] += amount
-                        else:
-                            data["summary"]["total_expenses"] += abs(amount)
-                            
-                    except (ValueError, IndexError) as e:
-                        logger.warning(f"Could not parse transaction: {match.group(0)}, error: {str(e)}")
-                        continue
+            # One scan per line; a second money amount on the line is the balance
+            for transaction in tokenizer.extract_transactions(text):
+                transaction["date"] = self._normalize_date(transaction["date"])
+                data["transactions"].append(transaction)
+                
+                # Update summary
+                amount = transaction["amount"]
+                if amount > 0:
+                    data["summary"]["total_income"] += amount
+                else:
+                    data["summary"]["total_expenses"] += abs(amount)
             
             # Update final summary
             data["summary"]["num_transactions"] = len(data["transactions"])
@@ -283,61 +518,55 @@ class MistralExtractor:
             logger.warning(f"Could not normalize date: {date_str}, error: {str(e)}")
             return date_str
 
-    def extract_all_content(self, pdf_path):
-        """Extract all content from PDF including text, tables and images."""
+    @timed(SPAN_EXTRACTION)
+    def extract_all_content(self, pdf_path, progress_callback=None,
+                            page_batch_size=DEFAULT_PAGE_BATCH_SIZE,
+                            max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        Extract all content from PDF including text, tables and images.
+        
+        The PDF is split into page batches that are sent to Mistral OCR
+        concurrently; the markdown is reassembled in true page order.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            progress_callback (callable): Optional function called with
+                (current, total, message) as pages are processed
+            page_batch_size (int): Pages per OCR request
+            max_concurrency (int): Maximum concurrent OCR requests
+            
+        Returns:
+            dict: Extracted content, or None on failure
+        """
         try:
             logger.info(f"Starting to process PDF file: {pdf_path}")
-            start_time = time.time()
             
             if not os.path.exists(pdf_path):
                 logger.error(f"PDF file not found: {pdf_path}")
                 return None
             
-            # Initialize OCR
-            try:
-                logger.info("Initializing OCR client...")
-                ocr = self.client.ocr
-                logger.info("OCR initialized successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize OCR: {str(e)}", exc_info=True)
-                return None
-            
             # Process PDF
             logger.info("Starting PDF processing")
+            failed_pages = []
             try:
-                logger.info("Reading PDF file...")
-                with open(pdf_path, 'rb') as file:
-                    pdf_content = file.read()
-                logger.info(f"Read {len(pdf_content)} bytes from PDF file")
+                logger.info(f"Read {os.path.getsize(pdf_path)} bytes from PDF file")
+                if progress_callback:
+                    progress_callback(0, 1, "Sending document to OCR...")
                 
-                logger.info("Converting PDF to base64...")
-                pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
-                data_url = f"data:application/pdf;base64,{pdf_base64}"
-                
-                logger.info("Sending request to Mistral API...")
-                result = self.client.chat.completions.create(
-                    model="mistral-large-latest",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": "Extract all text and tables from this PDF document. Include any financial data, account numbers, dates, and transaction details. Format tables in markdown format."
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": data_url
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                    max_tokens=4096
-                )
+                try:
+                    pages = self._ocr_pages_concurrently(
+                        pdf_path,
+                        page_batch_size=page_batch_size,
+                        max_concurrency=max_concurrency,
+                        progress_callback=progress_callback,
+                        failed_pages=failed_pages
+                    )
+                except ImportError:
+                    logger.warning("PyPDF2 is not installed; sending the whole document in one request")
+                    markdowns = self._ocr_pages(encode_pdf_data_url(pdf_path))
+                    pages = {page_num: markdown for page_num, markdown in enumerate(markdowns, 1)}
                 
-                if not result:
+                if not pages:
                     logger.error("OCR processing returned no results")
                     return None
                     
@@ -351,9 +580,10 @@ class MistralExtractor:
             extracted_content = {
                 "metadata": {
                     "filename": os.path.basename(pdf_path),
-                    "total_pages": 1,  # We'll update this based on the content
+                    "total_pages": len(pages) + len(failed_pages),
                     "file_size": os.path.getsize(pdf_path),
-                    "processed_date": datetime.now().isoformat()
+                    "processed_date": datetime.now().isoformat(),
+                    "failed_pages": sorted(failed_pages)
                 },
                 "tables": [],
                 "text": [],
@@ -369,61 +599,20 @@ class MistralExtractor:
             
             # Process the response
             try:
-                content = result.choices[0].message.content
-                logger.info(f"Extracted content length: {len(content)} characters")
-                
-                # Split into pages
-                pages = content.split("\n\n")
-                logger.info(f"Found {len(pages)} pages")
+                logger.info(f"Extracted {len(pages)} pages")
+                if failed_pages:
+                    logger.warning(f"OCR failed for pages: {sorted(failed_pages)}")
                 
                 # Process each page
-                for page_num, page_content in enumerate(pages, 1):
+                for page_num in sorted(pages):
+                    page_content = pages[page_num]
                     try:
-                        page_start_time = time.time()
-                        logger.info(f"Processing page {page_num}/{len(pages)}")
-                        
-                        # Extract text from page
-                        if page_content:
-                            logger.info(f"Extracted {len(page_content)} characters from page {page_num}")
-                            extracted_content["text"].append({
-                                "page": page_num,
-                                "content": page_content
-                            })
-                        
-                        # Extract tables from page
-                        table_pattern = r"\|[^|]+\|[^|]+\|[\s\S]*?(?=\n\n|\Z)"
-                        tables = re.finditer(table_pattern, page_content)
-                        
-                        for table_match in tables:
-                            table_text = table_match.group(0)
-                            logger.info(f"Found table on page {page_num}")
-                            
-                            # Parse table
-                            rows = [row.strip().split('|') for row in table_text.split('\n')]
-                            rows = [[cell.strip() for cell in row if cell.strip()] for row in rows if any(cell.strip() for cell in row)]
-                            
-                            if len(rows) >= 2:  # At least header and one data row
-                                table_data = {
-                                    "page": page_num,
-                                    "headers": rows[0],
-                                    "rows": rows[1:],
-                                    "source": "text"
-                                }
-                                extracted_content["tables"].append(table_data)
-                                logger.info(f"Added table with {len(rows)-1} rows")
-                        
-                        page_processing_time = time.time() - page_start_time
-                        logger.info(f"Page {page_num}/{len(pages)} processed in {page_processing_time:.2f} seconds")
-                        
+                        with span(SPAN_PAGE_PARSE, page=page_num):
+                            self._parse_page(page_num, page_content, extracted_content)
                     except Exception as e:
                         logger.error(f"Error processing page {page_num}: {str(e)}", exc_info=True)
                         continue
                 
-                # Update metadata
-                extracted_content["metadata"]["total_pages"] = len(pages)
-                
-                total_processing_time = time.time() - start_time
-                logger.info(f"Total processing completed in {total_processing_time:.2f} seconds")
                 logger.info(f"Extracted {len(extracted_content['tables'])} tables and {len(extracted_content['text'])} text sections")
                 
                 return extracted_content
@@ -436,6 +625,46 @@ class MistralExtractor:
             logger.error(f"Error extracting content: {str(e)}", exc_info=True)
             return None
 
+    def _parse_page(self, page_num, page_content, extracted_content):
+        """
+        Add one page's text and markdown tables to the extracted content.
+        
+        Args:
+            page_num (int): Page number (1-based)
+            page_content (str): Page markdown
+            extracted_content (dict): Result structure being built
+        """
+        # Extract text from page
+        if page_content:
+            logger.info(f"Extracted {len(page_content)} characters from page {page_num}")
+            extracted_content["text"].append({
+                "page": page_num,
+                "content": page_content
+            })
+        
+        # Extract tables from page
+        with span(SPAN_TABLE_EXTRACTION, page=page_num, source="markdown"):
+            table_pattern = r"\|[^|]+\|[^|]+\|[\s\S]*?(?=\n\n|\Z)"
+            tables = re.finditer(table_pattern, page_content)
+            
+            for table_match in tables:
+                table_text = table_match.group(0)
+                logger.info(f"Found table on page {page_num}")
+                
+                # Parse table
+                rows = [row.strip().split('|') for row in table_text.split('\n')]
+                rows = [[cell.strip() for cell in row if cell.strip()] for row in rows if any(cell.strip() for cell in row)]
+                
+                if len(rows) >= 2:  # At least header and one data row
+                    table_data = {
+                        "page": page_num,
+                        "headers": rows[0],
+                        "rows": rows[1:],
+                        "source": "text"
+                    }
+                    extracted_content["tables"].append(table_data)
+                    logger.info(f"Added table with {len(rows)-1} rows")
+
     def save_extracted_content(self, content, output_dir="extracted_data"):
         """
         Save extracted content to JSON files.
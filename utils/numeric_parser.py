@@ -0,0 +1,295 @@
+import re
+import math
+import logging
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from utils.lazy_loader import lazy_import
+
+# Loaded on first column conversion; extractors import this module at startup
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+DECIMAL_POINT = '.'
+DECIMAL_COMMA = ','
+
+# A document's decimal separator is settled once one of them has this many votes
+DOCUMENT_VOTES = 50
+
+# Runs of digits and separators that end in a separated number; runs that
+# are dates (03.01.2024, 03/01/2024, 2024-01-03) do not count as numbers
+_NUMBER_RUN = re.compile(r"\d[\d.,'\u00a0\u202f/\-]*[.,]\d+")
+_DOTTED_DATE = re.compile(r'^\d{1,2}\.\d{1,2}\.(?:\d{2}|\d{4})$')
+
+_GROUPING = re.compile("['\u00a0\u202f]")
+# Everything that is not part of the number itself: currency, units, spaces,
+# bidi marks, grouping apostrophes
+_NOT_NUMERIC = r'[^\d.,]'
+_NEGATIVE_PARENS = r'^\s*\(.*\d.*\)\s*$'
+_NEGATIVE_LEADING = '^[^\\d]*[-\u2212]'
+_NEGATIVE_TRAILING = r'\d[^\d]*-\s*\)?\s*$'
+_SINGLE_SEPARATOR = re.compile(r'^\d+([.,])(\d+)$')
+
+
+def normalize_number(text: str, decimal: Optional[str] = None) -> str:
+    """
+    Rewrite a number with thousands and decimal separators as plain digits.
+
+    Args:
+        text: Digits with separators, e.g. '1,234.56', '1.234,56' or "1'234"
+        decimal: Decimal separator of the document if known ('.' or ',')
+
+    Returns:
+        The number with '.' as decimal separator and no grouping, e.g. '1234.56'
+    """
+    text = _GROUPING.sub('', text)
+    commas, dots = text.count(','), text.count('.')
+    if not commas and not dots:
+        return text
+    if commas and dots:
+        # Both used: whichever comes last is the decimal separator
+        decimal = ',' if text.rfind(',') > text.rfind('.') else '.'
+    else:
+        separator = ',' if commas else '.'
+        if commas + dots > 1:
+            decimal = '.' if separator == ',' else ','
+        elif len(text) - text.rfind(separator) != 4:
+            # A single separator not followed by exactly three digits marks decimals
+            decimal = separator
+        elif decimal not in (',', '.'):
+            # Ambiguous, e.g. '1,234': a comma groups thousands, a dot marks decimals
+            decimal = '.'
+
+    thousands = ',' if decimal == '.' else '.'
+    return text.replace(thousands, '').replace(decimal, '.')
+
+
+def parse_number(text: str, decimal: Optional[str] = None) -> float:
+    """
+    Convert a number written with thousands and decimal separators to float.
+
+    Args:
+        text: Digits with separators
+        decimal: Decimal separator of the document if known ('.' or ',')
+
+    Returns:
+        The number
+
+    Raises:
+        ValueError: If the text is not a number
+    """
+    return float(normalize_number(text, decimal))
+
+
+def _decimal_vote(digits: str) -> Optional[str]:
+    """Decimal separator a single number proves, or None if it is ambiguous."""
+    commas, dots = digits.count(','), digits.count('.')
+    if commas and dots:
+        return DECIMAL_COMMA if digits.rfind(',') > digits.rfind('.') else DECIMAL_POINT
+    if commas > 1:
+        return DECIMAL_POINT
+    if dots > 1:
+        return DECIMAL_COMMA
+    match = _SINGLE_SEPARATOR.match(digits)
+    if match and len(match.group(2)) != 3:
+        return match.group(1)
+    return None
+
+
+def detect_decimal(values: Iterable[Any]) -> Optional[str]:
+    """
+    Detect the decimal separator of a column or document.
+
+    Each number that can only be read one way votes, e.g. '1.234,56' and
+    '12,5' vote for a decimal comma; '1,234' is ambiguous and does not vote.
+    The result settles the ambiguous numbers of the same column or document.
+
+    Args:
+        values: Numbers as written (non-strings are ignored)
+
+    Returns:
+        '.' or ',' by majority (a point on a tie), or None if no value settles it
+    """
+    votes = Counter()
+    for value in values:
+        if isinstance(value, str):
+            vote = _decimal_vote(re.sub(_NOT_NUMERIC, '', value))
+            if vote:
+                votes[vote] += 1
+    if not votes:
+        return None
+    return DECIMAL_COMMA if votes[DECIMAL_COMMA] > votes[DECIMAL_POINT] else DECIMAL_POINT
+
+
+def detect_document_decimal(text: str) -> Optional[str]:
+    """
+    Detect the decimal separator of a document from the numbers in its text.
+
+    Dates are skipped, and reading stops once one separator has
+    DOCUMENT_VOTES votes, so long documents cost no more than short ones.
+
+    Args:
+        text: Document text
+
+    Returns:
+        '.' or ',', or None if no number settles it
+    """
+    votes = Counter()
+    for match in _NUMBER_RUN.finditer(text):
+        run = match.group(0)
+        if '/' in run or '-' in run or _DOTTED_DATE.match(run):
+            continue
+        vote = _decimal_vote(_GROUPING.sub('', run))
+        if vote:
+            votes[vote] += 1
+            if votes[vote] >= DOCUMENT_VOTES:
+                break
+    if not votes:
+        return None
+    return DECIMAL_COMMA if votes[DECIMAL_COMMA] > votes[DECIMAL_POINT] else DECIMAL_POINT
+
+
+def parse_amount(value: Any, decimal: Optional[str] = None) -> Optional[float]:
+    """
+    Convert one amount as it appears in a statement to float.
+
+    Currency symbols, units and spaces are ignored. Negatives may be written
+    as -1.00, 1.00- or (1.00).
+
+    Args:
+        value: Amount as text or number
+        decimal: Decimal separator of the column or document if known
+
+    Returns:
+        The amount, or None if the value is not a number
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, np.number)):
+        return None if math.isnan(value) else float(value)
+    text = str(value).strip()
+    digits = re.sub(_NOT_NUMERIC, '', text)
+    if not any(c.isdigit() for c in digits):
+        return None
+    try:
+        number = parse_number(digits, decimal)
+    except ValueError:
+        return None
+    if re.match(_NEGATIVE_PARENS, text) or re.match(_NEGATIVE_LEADING, text) or re.search(_NEGATIVE_TRAILING, text):
+        return -number
+    return number
+
+
+def parse_amounts(values: Iterable[Any], decimal: Optional[str] = None,
+                  default: Optional[str] = None) -> np.ndarray:
+    """
+    Convert a whole column of amounts to floats.
+
+    The decimal separator is detected once for the column unless given, and
+    the column is converted with vectorized string operations. Values that
+    are not numbers become NaN.
+
+    Args:
+        values: Column of amounts as text or numbers
+        decimal: Decimal separator of the column if known ('.' or ',')
+        default: Decimal separator to use if the column does not settle it,
+            e.g. the one of the table or document
+
+    Returns:
+        Float array of the same length
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    series = series.reset_index(drop=True)
+    result = np.full(len(series), np.nan)
+    if series.empty:
+        return result
+
+    if pd.api.types.is_string_dtype(series.dtype):
+        is_text = series.notna().to_numpy(dtype=bool)
+    else:
+        is_text = series.map(type).eq(str).to_numpy(dtype=bool)
+    if not is_text.all():
+        numbers = series[~is_text]
+        numbers = numbers.where(numbers.map(type).ne(bool))
+        result[~is_text] = pd.to_numeric(numbers, errors='coerce').to_numpy(dtype=float)
+    if not is_text.any():
+        return result
+
+    text = series[is_text].astype(str).str.strip()
+    digits = text.str.replace(_NOT_NUMERIC, '', regex=True)
+    length = digits.str.len().to_numpy()
+    commas = length - digits.str.replace(',', '', regex=False).str.len().to_numpy()
+    dots = length - digits.str.replace('.', '', regex=False).str.len().to_numpy()
+    # Digits after the last comma and after the last dot (all of them if there is none)
+    after_comma = digits.str.replace(r'^.*,', '', regex=True).str.len().to_numpy()
+    after_dot = digits.str.replace(r'^.*\.', '', regex=True).str.len().to_numpy()
+
+    # Decimal separator of each value: the last one when both appear, none when
+    # one repeats (grouping). A single separator followed by exactly three
+    # digits is ambiguous and settled by the column's decimal separator.
+    both = (commas > 0) & (dots > 0)
+    single_comma = (commas == 1) & (dots == 0)
+    single_dot = (dots == 1) & (commas == 0)
+    ambiguous = (single_comma | single_dot) & (np.minimum(after_comma, after_dot) == 3)
+    comma_last = after_comma < after_dot
+
+    if decimal not in (DECIMAL_POINT, DECIMAL_COMMA):
+        # Same votes as detect_decimal, counted over the whole column at once
+        comma_votes = np.count_nonzero((both & comma_last) | (dots > 1) | (single_comma & ~ambiguous))
+        point_votes = np.count_nonzero((both & ~comma_last) | (commas > 1) | (single_dot & ~ambiguous))
+        if comma_votes or point_votes:
+            decimal = DECIMAL_COMMA if comma_votes > point_votes else DECIMAL_POINT
+        else:
+            decimal = default
+
+    if decimal == DECIMAL_COMMA:
+        separator_decimal = ~ambiguous | single_comma
+    else:
+        separator_decimal = ~ambiguous | single_dot
+    comma_rows = (both & comma_last) | (single_comma & separator_decimal)
+    point_rows = (both & ~comma_last) | (single_dot & separator_decimal)
+    other_rows = ~comma_rows & ~point_rows
+
+    normalized = digits.copy()
+    normalized[comma_rows] = digits[comma_rows].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    normalized[point_rows] = digits[point_rows].str.replace(',', '', regex=False)
+    normalized[other_rows] = digits[other_rows].str.replace(r'[.,]', '', regex=True)
+    parsed = normalized.where(normalized.str.fullmatch(r'\d+(?:\.\d*)?|\.\d+'), 'nan').astype(float).to_numpy()
+
+    negative = (text.str.match(_NEGATIVE_PARENS) | text.str.match(_NEGATIVE_LEADING)
+                | text.str.contains(_NEGATIVE_TRAILING, regex=True)).to_numpy(dtype=bool)
+    result[is_text] = np.where(negative, -parsed, parsed)
+    return result
+
+
+def parse_numeric_columns(df: 'pd.DataFrame', columns: Iterable[Any],
+                          decimal: Optional[str] = None) -> 'pd.DataFrame':
+    """
+    Convert columns of a table to floats, detecting each column's locale.
+
+    A column whose numbers are all ambiguous (e.g. '1.000' and '10') follows
+    the decimal separator of the table's other numeric columns.
+
+    Args:
+        df: Table as extracted
+        columns: Columns to convert (None entries are skipped)
+        decimal: Decimal separator of the document if known; otherwise each
+            column is detected on its own
+
+    Returns:
+        Copy of the table with the columns as floats (NaN where not a number)
+    """
+    columns = {column for column in columns if column is not None}
+    positions = [position for position, name in enumerate(df.columns) if name in columns]
+    df = df.copy()
+    default = None
+    if decimal is None and positions:
+        default = detect_decimal(df.iloc[:, positions].to_numpy().ravel())
+    # By position, so repeated header names are converted too
+    for position in positions:
+        df.isetitem(position, parse_amounts(df.iloc[:, position], decimal, default))
+    return df
+
@@ -3,22 +3,62 @@ import io
 import logging
 import os
 import tempfile
-from typing import Tuple, List, Dict, Any, Union, BinaryIO, Optional, Callable
+from typing import Tuple, List, Dict, Any, Union, BinaryIO, Optional, Callable, Iterator
 from dotenv import load_dotenv
-import google.generativeai as genai
 import pandas as pd
-import tabula
 import re
+from utils.lazy_loader import lazy_import
+from utils.instrumentation import span, SPAN_PAGE_PARSE, SPAN_TABULA
+from utils.table_layouts import extract_page_tables
+from utils.transaction_tokenizer import tokenizer
+
+# Loaded on first use; tabula starts a JVM
+genai = lazy_import('gemini')
+tabula = lazy_import('tabula')
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(file_path: str, start_page: int = 0, max_pages: Optional[int] = None) -> Tuple[List[Any], str]:
+def extract_pages_content(pages: List[Any], start_page: int = 0,
+                          institution: Optional[str] = None) -> Tuple[List[Any], str]:
+    """Extract text and tables from already opened pdfplumber pages.
+    
+    Args:
+        pages: pdfplumber pages
+        start_page: Number of the first page (0-based), for instrumentation
+        institution: Issuing bank; its cached table layout is used instead of
+            searching each page for tables
+        
+    Returns:
+        Tuple of (content, content_type) as for extract_text_from_pdf
+    """
+    content = []
+    content_type = 'text'  # Default to text
+    
+    for page_num, page in enumerate(pages, start_page):
+        with span(SPAN_PAGE_PARSE, page=page_num + 1):
+            # Try to extract tables first
+            tables = extract_page_tables(page, institution)
+            if tables:
+                content.extend(tables)
+                content_type = 'table'
+            else:
+                # If no tables, extract text
+                text = page.extract_text()
+                if text:
+                    content.append(text)
+                    
+    return content, content_type
+
+def extract_text_from_pdf(file_path: str, start_page: int = 0, max_pages: Optional[int] = None,
+                          institution: Optional[str] = None) -> Tuple[List[Any], str]:
     """Extract text and tables from PDF file.
     
     Args:
         file_path: Path to PDF file
         start_page: Starting page number (0-based)
         max_pages: Maximum number of pages to process
+        institution: Issuing bank; its cached table layout is used instead of
+            searching each page for tables
         
     Returns:
         Tuple of (content, content_type) where:
@@ -27,9 +67,6 @@ def extract_text_from_pdf(file_path: str, start_page: int = 0, max_pages: Option
     """
     try:
         with pdfplumber.open(file_path) as pdf:
-            content = []
-            content_type = 'text'  # Default to text
-            
             # Calculate page range
             total_pages = len(pdf.pages)
             if max_pages:
@@ -37,26 +74,73 @@ def extract_text_from_pdf(file_path: str, start_page: int = 0, max_pages: Option
             else:
                 end_page = total_pages
                 
-            for page_num in range(start_page, end_page):
-                page = pdf.pages[page_num]
-                
-                # Try to extract tables first
-                tables = page.extract_tables()
-                if tables:
-                    content.extend(tables)
-                    content_type = 'table'
-                else:
-                    # If no tables, extract text
-                    text = page.extract_text()
-                    if text:
-                        content.append(text)
-                        
-            return content, content_type
+            return extract_pages_content(pdf.pages[start_page:end_page], start_page, institution)
             
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}", exc_info=True)
         return [], 'error'
 
+class PDFChunkReader:
+    """
+    Reads a PDF in chunks of pages through a single open handle.
+    
+    The document's cross-reference table and page tree are parsed once for
+    all chunks. Each page's cached layout objects are released as soon as its
+    chunk has been processed, so memory is bounded by the chunk size rather
+    than the document size.
+    """
+    
+    def __init__(self, file_path: str, chunk_size: int = 5):
+        """
+        Initialize the reader.
+        
+        Args:
+            file_path: Path to PDF file
+            chunk_size: Number of pages per chunk
+        """
+        self.file_path = file_path
+        self.chunk_size = max(1, chunk_size)
+        self.pdf = None
+    
+    def __enter__(self) -> 'PDFChunkReader':
+        self.pdf = pdfplumber.open(self.file_path)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the document."""
+        if self.pdf is not None:
+            self.pdf.close()
+            self.pdf = None
+    
+    @property
+    def total_pages(self) -> int:
+        """Number of pages in the document."""
+        return len(self.pdf.pages)
+    
+    def chunks(self, start_page: int = 0) -> Iterator[Tuple[int, int, List[Any]]]:
+        """
+        Iterate over the document in chunks.
+        
+        Args:
+            start_page: First page to read (0-based)
+            
+        Yields:
+            Tuples of (start page, end page, pages); the pages are released
+            when the caller asks for the next chunk
+        """
+        total_pages = self.total_pages
+        for chunk_start in range(start_page, total_pages, self.chunk_size):
+            chunk_end = min(chunk_start + self.chunk_size, total_pages)
+            pages = self.pdf.pages[chunk_start:chunk_end]
+            try:
+                yield chunk_start, chunk_end, pages
+            finally:
+                for page in pages:
+                    page.close()
+
 def extract_tables(pdf_path: str, pages: Optional[str] = 'all', 
                   progress_callback: Optional[Callable] = None) -> List[pd.DataFrame]:
     """
@@ -74,7 +158,8 @@ def extract_tables(pdf_path: str, pages: Optional[str] = 'all',
         if progress_callback:
             progress_callback(0, 1, "Extracting tables from PDF")
             
-        tables = tabula.read_pdf(pdf_path, pages=pages, multiple_tables=True)
+        with span(SPAN_TABULA, pages=pages):
+            tables = tabula.read_pdf(pdf_path, pages=pages, multiple_tables=True)
         
         if progress_callback:
             progress_callback(1, 1, f"Extracted {len(tables)} tables")
@@ -99,70 +184,39 @@ def extract_transactions_from_text(text_results: Union[str, List[str]]) -> List[
             text_results = [text_results]
             
         combined_text = "\n".join(text_results)
-        cleaned_text = ' '.join(combined_text.split())  # Normalize whitespace
-        
-        # Enhanced pattern matching
-        patterns = {
-            'date': r'\b\d{1,2}[/\.-]\d{1,2}[/\.-]\d{2,4}\b',
-            'amount': r'[-+]?[\d,]+\.?\d*',
-            'isin': r'[A-Z]{2}[A-Z0-9]{10}',
-            'quantity': r'\b\d+(?:,\d{3})*(?:\.\d+)?\s*(?:shares|units|יחידות|מניות)\b',
-            'price': r'\$?\d+(?:,\d{3})*(?:\.\d+)?'
-        }
-        
-        # Break text into logical segments
-        segments = re.split(r'\n+|\r\n+', combined_text)
         
         transactions = []
         # Track unique identifiers to avoid duplicates
         seen_segments = set()
         
-        for segment in segments:
-            segment = segment.strip()
-            if len(segment) < 5 or segment in seen_segments:  # Skip very short segments or duplicates
+        # One scan per line; the amount is the last number on the line
+        for line in tokenizer.iter_lines(combined_text):
+            segment = line.text
+            if len(segment) < 5 or segment in seen_segments or not line.dates:  # Skip short, duplicate or undated lines
                 continue
                 
             seen_segments.add(segment)
-            transaction = {'raw_text': segment}
+            amount = line.amounts[-1].value
+            description = line.description
+            transaction = {
+                'raw_text': segment,
+                'date': line.date,
+                'amount': amount,
+                'description': description
+            }
             
-            # Extract date
-            date_matches = re.findall(patterns['date'], segment)
-            if date_matches:
-                transaction['date'] = date_matches[0]
-                
-                # Remove date from segment for cleaner description
-                segment_without_date = re.sub(patterns['date'], '', segment).strip()
-                
-                # Extract amount (prefer last number as it's often the amount)
-                amount_matches = re.findall(patterns['amount'], segment_without_date)
-                if amount_matches:
-                    try:
-                        # Convert last match to float (usually the transaction amount)
-                        amount_str = amount_matches[-1].replace(',', '')
-                        amount = float(amount_str)
-                        transaction['amount'] = amount
-                        
-                        # Remove amount from segment for description
-                        segment_for_desc = segment_without_date.replace(amount_matches[-1], '').strip()
-                        transaction['description'] = segment_for_desc
-                        
-                        # Basic category detection
-                        transaction['category'] = "לא מסווג"  # Default category
-                        if amount > 0:
-                            transaction['category'] = "הכנסה"
-                        elif any(kw in segment_for_desc.lower() for kw in ["שכר", "משכורת", "salary", "deposit"]):
-                            transaction['category'] = "הכנסה"
-                        elif any(kw in segment_for_desc.lower() for kw in ["שכירות", "דירה", "rent", "mortgage"]):
-                            transaction['category'] = "דיור"
-                        elif any(kw in segment_for_desc.lower() for kw in ["מזון", "סופר", "מסעדה", "food", "restaurant", "grocery"]):
-                            transaction['category'] = "מזון"
-                        
-                        # Only add if we have date and amount at minimum
-                        if 'date' in transaction and 'amount' in transaction:
-                            transactions.append(transaction)
-                    except ValueError:
-                        # Skip if amount conversion fails
-                        pass
+            # Basic category detection
+            transaction['category'] = "לא מסווג"  # Default category
+            if amount > 0:
+                transaction['category'] = "הכנסה"
+            elif any(kw in description.lower() for kw in ["שכר", "משכורת", "salary", "deposit"]):
+                transaction['category'] = "הכנסה"
+            elif any(kw in description.lower() for kw in ["שכירות", "דירה", "rent", "mortgage"]):
+                transaction['category'] = "דיור"
+            elif any(kw in description.lower() for kw in ["מזון", "סופר", "מסעדה", "food", "restaurant", "grocery"]):
+                transaction['category'] = "מזון"
+            
+            transactions.append(transaction)
         
         return transactions
     except Exception as e:
@@ -0,0 +1,170 @@
+import io
+import os
+import re
+import json
+import time
+import base64
+import logging
+from typing import Any, Dict, List, Optional
+
+import pdfplumber
+
+from utils.lazy_loader import BACKENDS, register_backend
+from utils.numeric_parser import parse_amount
+
+logger = logging.getLogger(__name__)
+
+# Deterministic stand-ins for the Gemini and Mistral clients, so extraction can
+# be benchmarked and tested without network access or API keys. Both APIs are
+# mimicked at the surface the pipeline uses: genai.configure/GenerativeModel
+# and Mistral(...).ocr.process.
+
+LLM_BACKENDS = ('gemini', 'mistral')
+
+# Optional simulated per-call latency in seconds
+SIMULATED_LATENCY = float(os.getenv('OFFLINE_LLM_LATENCY', '0'))
+
+_TRANSACTION_LINE = re.compile(
+    r'(?P<date>\d{2}/\d{2}/\d{4})\s+(?P<description>.+?)\s+(?P<amount>[+-]?[\d,]+\.\d{2})(?:\s|$)'
+)
+
+
+def use_offline_llm() -> Dict[str, str]:
+    """
+    Route the 'gemini' and 'mistral' backends to this module.
+
+    Returns:
+        The previous module names by backend, for register_backend to restore
+    """
+    previous = {name: BACKENDS[name] for name in LLM_BACKENDS}
+    for name in LLM_BACKENDS:
+        register_backend(name, __name__)
+    logger.info("Using offline LLM stub for Gemini and Mistral")
+    return previous
+
+
+def _simulate_latency():
+    if SIMULATED_LATENCY > 0:
+        time.sleep(SIMULATED_LATENCY)
+
+
+def parse_transaction_lines(text: str) -> List[Dict[str, Any]]:
+    """
+    Extract transactions from statement text, one per line.
+
+    Args:
+        text: Statement text
+
+    Returns:
+        List of transaction dictionaries
+    """
+    transactions = []
+    for line in text.splitlines():
+        match = _TRANSACTION_LINE.search(line)
+        if match:
+            transactions.append({
+                'date': match.group('date'),
+                'description': match.group('description').strip(),
+                'amount': parse_amount(match.group('amount'))
+            })
+    return transactions
+
+
+# --- Gemini (google.generativeai) surface ---
+
+def configure(api_key: Optional[str] = None, **kwargs):
+    """Accept and ignore client configuration."""
+
+
+class GenerateContentResponse:
+    """Response with the `.text` attribute of a Gemini response."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ChatSession:
+    """Chat session that answers every message with an empty JSON object."""
+
+    def __init__(self, history=None):
+        self.history = list(history or [])
+
+    def send_message(self, message: str) -> GenerateContentResponse:
+        _simulate_latency()
+        self.history.append(message)
+        return GenerateContentResponse('{}')
+
+
+class GenerativeModel:
+    """Model whose responses are the transactions found in the prompt, as JSON."""
+
+    def __init__(self, model_name: str = 'offline', **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt: Any, **kwargs) -> GenerateContentResponse:
+        _simulate_latency()
+        text = prompt if isinstance(prompt, str) else str(prompt)
+        return GenerateContentResponse(json.dumps(parse_transaction_lines(text), ensure_ascii=False))
+
+    def start_chat(self, history=None) -> ChatSession:
+        return ChatSession(history)
+
+
+# --- Mistral (mistralai) surface ---
+
+class OCRPage:
+    """One page of an OCR response."""
+
+    def __init__(self, index: int, markdown: str):
+        self.index = index
+        self.markdown = markdown
+
+
+class OCRResponse:
+    """OCR response with per-page markdown."""
+
+    def __init__(self, pages: List[OCRPage], model: str):
+        self.pages = pages
+        self.model = model
+
+
+def _table_to_markdown(table: List[List[Optional[str]]]) -> str:
+    """Render an extracted table as a markdown table, like Mistral OCR does."""
+    rows = [[(cell or '').replace('\n', ' ').strip() for cell in row] for row in table if row]
+    if not rows:
+        return ''
+    lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + '---|' * len(rows[0])]
+    lines += ['| ' + ' | '.join(row) + ' |' for row in rows[1:]]
+    return '\n'.join(lines)
+
+
+class OCR:
+    """Local OCR that reads the text layer of the PDF with pdfplumber."""
+
+    def process(self, model: str, document: Dict[str, str], **kwargs) -> OCRResponse:
+        _simulate_latency()
+        data_url = document['document_url']
+        pdf_bytes = base64.b64decode(data_url.split(',', 1)[1])
+
+        pages = []
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            for index, page in enumerate(pdf.pages):
+                tables = page.find_tables()
+                # Text outside table regions, then each table as markdown
+                outside = page
+                for table in tables:
+                    outside = outside.outside_bbox(table.bbox)
+                parts = [outside.extract_text() or '']
+                parts += [_table_to_markdown(table.extract()) for table in tables]
+                pages.append(OCRPage(index, '\n\n'.join(part for part in parts if part)))
+                page.flush_cache()
+
+        return OCRResponse(pages, model)
+
+
+class Mistral:
+    """Client exposing `ocr.process` like mistralai.Mistral."""
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        self.api_key = api_key
+        self.ocr = OCR()
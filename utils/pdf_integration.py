@@ -3,11 +3,16 @@ import tempfile
 import logging
 import pandas as pd
 from typing import Tuple, List, Dict, Any, Union, BinaryIO, Optional, Callable
-from utils.ocr_processor import extract_text_from_pdf
+from utils.ocr_processor import extract_text_from_pdf, extract_pages_content, PDFChunkReader
 from utils.securities_pdf_processor import SecuritiesPDFProcessor
+from utils.instrumentation import span, SPAN_LLM_CALL
+from utils.lazy_loader import lazy_import
+from utils.checkpoints import ChunkCheckpoint
 
 logger = logging.getLogger(__name__)
 
+genai = lazy_import('gemini')
+
 class PDFProcessingIntegration:
     """Integration class for various PDF processing functionalities."""
     
@@ -20,7 +25,8 @@ class PDFProcessingIntegration:
         file_path_or_bytes: Union[str, bytes, BinaryIO],
         document_type: Optional[str] = None,
         max_pages: Optional[int] = None,
-        callback: Optional[Callable[[int, int, str], None]] = None
+        callback: Optional[Callable[[int, int, str], None]] = None,
+        institution: Optional[str] = None
     ) -> Tuple[List[Dict[str, Any]], str]:
         """
         Process a financial document to extract data.
@@ -30,6 +36,7 @@ class PDFProcessingIntegration:
             document_type: Type of document (statement, securities, etc.)
             max_pages: Maximum number of pages to process
             callback: Progress callback function
+            institution: Issuing bank, for its cached table layout
             
         Returns:
             Tuple of (extracted data, result type)
@@ -53,7 +60,8 @@ class PDFProcessingIntegration:
                 # Extract text and tables
                 content, content_type = extract_text_from_pdf(
                     file_path,
-                    max_pages=max_pages
+                    max_pages=max_pages,
+                    institution=institution
                 )
                 
                 if not content:
@@ -102,15 +110,6 @@ class PDFProcessingIntegration:
                 f.write(file_path_or_bytes.read())
             return temp_path
     
-    def _get_total_pages(self, file_path: str) -> int:
-        """Get total number of pages in PDF."""
-        try:
-            import pdfplumber
-            with pdfplumber.open(file_path) as pdf:
-                return len(pdf.pages)
-        except:
-            return 0
-    
     def _process_tables(self, tables: List[pd.DataFrame]) -> List[Dict[str, Any]]:
         """Process extracted tables."""
         results = []
@@ -128,7 +127,6 @@ class PDFProcessingIntegration:
         
         for text in text_content:
             # Use Gemini to extract information
-            import google.generativeai as genai
             from dotenv import load_dotenv
             import os
             import json
@@ -155,7 +153,8 @@ class PDFProcessingIntegration:
             """
             
             # Get response
-            response = model.generate_content(prompt)
+            with span(SPAN_LLM_CALL, provider='gemini', model='gemini-pro'):
+                response = model.generate_content(prompt)
             
             # Parse response
             try:
@@ -171,16 +170,28 @@ class PDFProcessingIntegration:
         file_path_or_bytes: Union[str, bytes, BinaryIO],
         chunk_size: int = 5,
         document_type: Optional[str] = None,
-        callback: Optional[Callable[[int, int, str], None]] = None
+        callback: Optional[Callable[[int, int, str], None]] = None,
+        institution: Optional[str] = None,
+        checkpoint_dir: Optional[str] = None,
+        chunk_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None
     ) -> Tuple[List[Dict[str, Any]], str]:
         """
         Process a large document in chunks to manage memory usage.
         
+        With a checkpoint directory, each chunk's results are saved to disk as
+        soon as the chunk finishes. If processing fails, rerunning on the same
+        document skips the saved chunks and resumes after the last one; the
+        checkpoint is removed once the whole document is processed.
+        
         Args:
             file_path_or_bytes: File path or bytes content
             chunk_size: Number of pages to process in each chunk
             document_type: Type of document (statement, securities, etc.)
             callback: Progress callback function
+            institution: Issuing bank, for its cached table layout
+            checkpoint_dir: Directory for resumable checkpoints (optional)
+            chunk_callback: Optional function called with each chunk's results as
+                soon as they are available, e.g. BudgetMonitor.add_many
             
         Returns:
             Tuple of (extracted data, result type)
@@ -189,50 +200,64 @@ class PDFProcessingIntegration:
             callback(0, 1, "Starting chunked processing")
         
         file_path = self._prepare_file_path(file_path_or_bytes)
-        total_pages = self._get_total_pages(file_path)
-        
-        if callback:
-            callback(0, total_pages, "Starting document processing")
-            
         all_results = []
-        current_page = 0
+        result_type = 'error'
+        checkpoint = None
         
         try:
-            while current_page < total_pages:
-                end_page = min(current_page + chunk_size, total_pages)
+            # One open handle for all chunks; pages are released after their chunk
+            with PDFChunkReader(file_path, chunk_size) as reader:
+                total_pages = reader.total_pages
                 
                 if callback:
-                    callback(current_page, total_pages, f"Processing pages {current_page+1} to {end_page}")
+                    callback(0, total_pages, "Starting document processing")
                 
-                # Process chunk
-                if document_type == 'securities':
-                    chunk_results = self.securities_processor.process_pdf(
-                        file_path,
-                        max_pages=chunk_size,
-                        start_page=current_page
-                    )
-                    result_type = 'securities'
-                else:
-                    # Extract text and tables from chunk
-                    content, content_type = extract_text_from_pdf(
-                        file_path,
-                        max_pages=chunk_size,
-                        start_page=current_page
-                    )
+                if checkpoint_dir:
+                    checkpoint = ChunkCheckpoint(checkpoint_dir, file_path, {
+                        'chunk_size': chunk_size,
+                        'document_type': document_type,
+                        'institution': institution
+                    })
+                    if checkpoint.resume_page:
+                        logger.info(f"Resuming {file_path} from page {checkpoint.resume_page + 1}")
+                
+                for current_page, end_page, pages in reader.chunks():
+                    if checkpoint and checkpoint.is_done(current_page):
+                        chunk_results, result_type = checkpoint.load_chunk(current_page)
+                        if chunk_callback:
+                            chunk_callback(chunk_results)
+                        all_results.extend(chunk_results)
+                        continue
                     
-                    if content:
-                        if content_type == 'table':
-                            chunk_results = self._process_tables(content)
-                        else:
-                            chunk_results = self._process_text(content)
-                        result_type = 'transactions'
+                    if callback:
+                        callback(current_page, total_pages, f"Processing pages {current_page+1} to {end_page}")
+                    
+                    # Process chunk
+                    if document_type == 'securities':
+                        chunk_results = self.securities_processor.process_pages(pages, current_page)
+                        result_type = 'securities'
                     else:
-                        chunk_results = []
-                        result_type = 'error'
-                
-                all_results.extend(chunk_results)
-                current_page += chunk_size
+                        # Extract text and tables from chunk
+                        content, content_type = extract_pages_content(pages, current_page, institution)
+                        
+                        if content:
+                            if content_type == 'table':
+                                chunk_results = self._process_tables(content)
+                            else:
+                                chunk_results = self._process_text(content)
+                            result_type = 'transactions'
+                        else:
+                            chunk_results = []
+                            result_type = 'error'
+                    
+                    if checkpoint:
+                        checkpoint.save_chunk(current_page, end_page, chunk_results, result_type)
+                    if chunk_callback:
+                        chunk_callback(chunk_results)
+                    all_results.extend(chunk_results)
                 
+            if checkpoint:
+                checkpoint.clear()
             if callback:
                 callback(total_pages, total_pages, "Processing complete")
                 
@@ -240,6 +265,8 @@ class PDFProcessingIntegration:
             
         except Exception as e:
             logger.error(f"Error in chunked processing: {str(e)}", exc_info=True)
+            if checkpoint:
+                logger.info(f"Pages 1 to {checkpoint.resume_page} are checkpointed; rerun to resume")
             if callback:
                 callback(1, 1, f"Error in chunked processing: {str(e)}")
             return [], 'error'
@@ -303,5 +330,14 @@ class PDFProcessingIntegration:
                     pass
 
 
-# Initialize the integration for easy import
-pdf_processor = PDFProcessingIntegration()
\ No newline at end of file
+_pdf_processor = None
+
+
+def __getattr__(name):
+    """Create the shared `pdf_processor` on first access instead of at import."""
+    global _pdf_processor
+    if name == 'pdf_processor':
+        if _pdf_processor is None:
+            _pdf_processor = PDFProcessingIntegration()
+        return _pdf_processor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -10,6 +10,9 @@ import logging
 import hashlib
 from typing import Dict, List, Any, Optional
 from utils.ocr_processor import extract_text_from_pdf
+from utils.instrumentation import span, SPAN_LLM_CALL, SPAN_TABULA
+from utils.numeric_parser import parse_numeric_columns
+from utils.security_identifiers import CUSIP, ISIN, cusip_to_isin, identifier_types, search_isin
 
 logger = logging.getLogger(__name__)
 
@@ -190,27 +193,34 @@ class BankStatementParser:
                 # Look for sections that might contain securities information
                 if any(header in text for header in ["Holdings", "Portfolio Holdings", "Investment Detail", "Securities"]):
                     # Extract tables using tabula
-                    tables = tabula.read_pdf(
-                        io.BytesIO(pdf.stream.get_data()), 
-                        pages=str(page_num + 1),  # tabula uses 1-based page numbering
-                        multiple_tables=True
-                    )
+                    with span(SPAN_TABULA, pages=str(page_num + 1), institution='jp_morgan'):
+                        tables = tabula.read_pdf(
+                            io.BytesIO(pdf.stream.get_data()), 
+                            pages=str(page_num + 1),  # tabula uses 1-based page numbering
+                            multiple_tables=True
+                        )
                     
                     for table in tables:
                         # Process the table to extract securities data
                         # JP Morgan typically includes columns for description, CUSIP/ISIN, quantity, price, and market value
                         if len(table.columns) >= 5:
-                            # Look for ISIN/CUSIP pattern in any column
+                            # Look for ISINs/CUSIPs in any column; check digits are validated for the
+                            # whole column, so account numbers and references are not taken for securities
                             for col in table.columns:
-                                table_with_isins = table[table[col].str.match(r'[A-Z0-9]{10,12}', na=False)].copy()
+                                kinds = identifier_types(table[col])
+                                identified = (kinds == ISIN) | (kinds == CUSIP)
+                                table_with_isins = table[identified].copy()
                                 
                                 if not table_with_isins.empty:
                                     # Process rows with ISIN/CUSIP
-                                    for _, row in table_with_isins.iterrows():
+                                    for kind, (_, row) in zip(kinds[identified], table_with_isins.iterrows()):
+                                        identifier = str(row[col]).strip().upper()
                                         security = {
-                                            'isin': row[col],  # Using the identified ISIN/CUSIP column
+                                            'isin': cusip_to_isin(identifier) if kind == CUSIP else identifier,
                                             'bank': 'JP Morgan'
                                         }
+                                        if kind == CUSIP:
+                                            security['cusip'] = identifier
                                         
                                         # Try to extract other details based on common JP Morgan formatting
                                         # Description is usually in the column before or after the ISIN
@@ -266,11 +276,12 @@ class BankStatementParser:
             
             # Process position pages
             if position_pages:
-                tables = tabula.read_pdf(
-                    io.BytesIO(pdf.stream.get_data()),
-                    pages=','.join(map(str, position_pages)),
-                    multiple_tables=True
-                )
+                with span(SPAN_TABULA, pages=','.join(map(str, position_pages)), institution='interactive_brokers'):
+                    tables = tabula.read_pdf(
+                        io.BytesIO(pdf.stream.get_data()),
+                        pages=','.join(map(str, position_pages)),
+                        multiple_tables=True
+                    )
                 
                 for table in tables:
                     # Interactive Brokers typically shows Symbol, Description, Quantity, Price, and Value
@@ -281,6 +292,9 @@ class BankStatementParser:
                         price_col = next((col for col in table.columns if any(s in str(col).lower() for s in ['price', 'mark'])), None)
                         value_col = next((col for col in table.columns if any(s in str(col).lower() for s in ['value', 'market value'])), None)
                         
+                        # Numeric columns are converted whole, each with its own decimal separator
+                        table = parse_numeric_columns(table, [quantity_col, price_col, value_col])
+                        
                         # Process rows
                         for _, row in table.iterrows():
                             # Skip rows without a symbol
@@ -295,28 +309,19 @@ class BankStatementParser:
                                 desc_col = next((col for col in table.columns if any(s in str(col).lower() for s in ['description', 'name'])), None)
                                 if desc_col and pd.notna(row[desc_col]):
                                     security['security_name'] = str(row[desc_col]).strip()
-                                    isin_match = re.search(r'\(([A-Z]{2}[A-Z0-9]{10})\)', str(row[desc_col]))
-                                    if isin_match:
-                                        security['isin'] = isin_match.group(1)
+                                    isin = search_isin(str(row[desc_col]))
+                                    if isin:
+                                        security['isin'] = isin
                                 
                                 # Extract other fields if present
                                 if quantity_col and pd.notna(row[quantity_col]):
-                                    try:
-                                        security['quantity'] = float(str(row[quantity_col]).replace(',', ''))
-                                    except ValueError:
-                                        pass
+                                    security['quantity'] = float(row[quantity_col])
                                 
                                 if price_col and pd.notna(row[price_col]):
-                                    try:
-                                        security['price'] = float(str(row[price_col]).replace(',', ''))
-                                    except ValueError:
-                                        pass
+                                    security['price'] = float(row[price_col])
                                 
                                 if value_col and pd.notna(row[value_col]):
-                                    try:
-                                        security['market_value'] = float(str(row[value_col]).replace(',', ''))
-                                    except ValueError:
-                                        pass
+                                    security['market_value'] = float(row[value_col])
                                 
                                 securities.append(security)
         
@@ -754,7 +759,8 @@ class SecuritiesPDFProcessor:
             """
             
             # Get response
-            response = model.generate_content(prompt)
+            with span(SPAN_LLM_CALL, provider='gemini', model='gemini-pro'):
+                response = model.generate_content(prompt)
             
             # Parse response
             try:
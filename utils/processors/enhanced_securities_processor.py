@@ -7,6 +7,8 @@ import json
 from typing import List, Dict, Any, Optional
 from sqlalchemy import create_engine
 import yaml
+from utils.processors.template_engine import CompiledTemplate
+from utils.processors.template_registry import TemplateRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +21,8 @@ class EnhancedSecuritiesProcessor:
         self.templates_dir = templates_dir
         self.model_path = model_path
         
-        # Load templates
-        self.templates = self._load_templates()
+        # Load templates; changed template files are picked up without a restart
+        self.registry = TemplateRegistry(templates_dir)
         
         # Initialize Gemini
         load_dotenv()
@@ -31,26 +33,20 @@ class EnhancedSecuritiesProcessor:
             logger.warning("No Gemini API key found. AI features will be disabled.")
             self.model = None
 
-    def _load_templates(self) -> Dict[str, Any]:
-        """Load document processing templates"""
-        templates = {}
-        try:
-            for file in os.listdir(self.templates_dir):
-                if file.endswith('.yaml'):
-                    with open(os.path.join(self.templates_dir, file)) as f:
-                        template = yaml.safe_load(f)
-                        templates[template['name']] = template
-        except Exception as e:
-            logger.error(f"Error loading templates: {e}")
-        return templates
+    @property
+    def templates(self) -> Dict[str, CompiledTemplate]:
+        """Compiled document processing templates by name"""
+        return self.registry.templates
 
     def process_document(self, text: str, institution: Optional[str] = None) -> List[Dict[str, Any]]:
         """Process a document using templates and AI assistance"""
         securities = []
         
-        # Try template-based extraction first
-        if institution and institution.lower() in self.templates:
-            securities.extend(self._process_with_template(text, self.templates[institution.lower()]))
+        # Try template-based extraction first: the institution's template, or
+        # the one whose identifiers best match the first page
+        template = self.registry.get(institution) or self.registry.best_match(text)
+        if template:
+            securities.extend(self._process_with_template(text, template))
         
         # Use AI for additional extraction
         if self.model and (not securities or len(securities) < 2):
@@ -58,21 +54,15 @@ class EnhancedSecuritiesProcessor:
         
         return securities
 
-    def _process_with_template(self, text: str, template: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Process text using a specific template"""
-        securities = []
+    def _process_with_template(self, text: str, template) -> List[Dict[str, Any]]:
+        """Process text using a specific template, returning one record per security"""
         try:
-            for field in template['fields']:
-                for pattern in field['patterns']:
-                    # Apply regex patterns from template
-                    matches = re.finditer(pattern, text)
-                    for match in matches:
-                        security = {}
-                        security[field['name']] = match.group(1)
-                        securities.append(security)
+            if not isinstance(template, CompiledTemplate):
+                template = CompiledTemplate(template)
+            return template.extract(text)
         except Exception as e:
             logger.error(f"Template processing error: {e}")
-        return securities
+            return []
 
     def _process_with_ai(self, text: str) -> List[Dict[str, Any]]:
         """Process text using Gemini AI"""
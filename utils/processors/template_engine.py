@@ -0,0 +1,258 @@
+import re
+import bisect
+import logging
+from typing import Any, Dict, List, Optional
+
+from utils.numeric_parser import parse_amount
+from utils.security_identifiers import is_valid_cusip, is_valid_isin, is_valid_sedol
+
+logger = logging.getLogger(__name__)
+
+# Lines between a field value and the record it belongs to
+DEFAULT_MAX_LINE_DISTANCE = 2
+
+# Validation rule types that check a security identifier's check digit
+IDENTIFIER_RULES = {
+    'isin': is_valid_isin,
+    'cusip': is_valid_cusip,
+    'sedol': is_valid_sedol
+}
+
+
+def _parse_float(value: str) -> Optional[float]:
+    return parse_amount(value)
+
+
+class CompiledField:
+    """A template field with its validation rules prepared."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        """
+        Initialize the field.
+
+        Args:
+            spec: Field entry of a template (name, field_type, required, patterns, validation_rules)
+        """
+        self.name = spec['name']
+        self.field_type = spec.get('field_type', 'string')
+        self.required = bool(spec.get('required', False))
+        self.patterns = list(spec.get('patterns', []))
+        self.ignore_case = bool(spec.get('ignore_case', False))
+        self.rules = []
+        for rule in spec.get('validation_rules') or []:
+            if rule.get('type') == 'regex':
+                self.rules.append(('regex', re.compile(rule['pattern'])))
+            elif rule.get('type') == 'range':
+                self.rules.append(('range', (rule.get('min'), rule.get('max'))))
+            elif rule.get('type') in IDENTIFIER_RULES:
+                self.rules.append(('identifier', IDENTIFIER_RULES[rule['type']]))
+
+    def convert(self, raw: str) -> Any:
+        """
+        Convert and validate a matched value.
+
+        Args:
+            raw: Matched text
+
+        Returns:
+            Typed value, or None if it fails validation
+        """
+        # A capture that runs over a line break keeps the part next to the rest of the match
+        value = raw.strip().splitlines()[-1].strip() if raw.strip() else ''
+        if not value:
+            return None
+        if self.field_type in ('float', 'number'):
+            value = _parse_float(value)
+            if value is None:
+                return None
+
+        for kind, rule in self.rules:
+            if kind == 'regex' and not rule.match(str(value)):
+                return None
+            if kind == 'identifier' and not rule(str(value)):
+                return None
+            if kind == 'range':
+                low, high = rule
+                if (low is not None and value < low) or (high is not None and value > high):
+                    return None
+        return value
+
+
+class CompiledTemplate:
+    """
+    A document template compiled into a single regular expression.
+
+    Every pattern of every field becomes one named alternative, so the text is
+    scanned once no matter how many fields and patterns the template has.
+    Matches are then grouped into records around the template's key field.
+    """
+
+    def __init__(self, template: Dict[str, Any], max_line_distance: int = DEFAULT_MAX_LINE_DISTANCE):
+        """
+        Compile a template.
+
+        Args:
+            template: Template dictionary as loaded from YAML
+            max_line_distance: Maximum lines between a value and its record's key
+
+        Raises:
+            ValueError: If the template has no fields or a pattern is invalid
+        """
+        self.name = template.get('name', '')
+        self.institution = template.get('institution', '')
+        self.template = template
+        self.fields = [CompiledField(spec) for spec in template.get('fields', [])]
+        if not self.fields:
+            raise ValueError(f"Template {self.name} has no fields")
+        self.max_line_distance = max_line_distance
+
+        field_names = [field.name for field in self.fields]
+        self.key_field = template.get('record_key') or ('isin' if 'isin' in field_names else
+                                                        next((f.name for f in self.fields if f.required), field_names[0]))
+
+        alternatives = []
+        # Group name -> (field, index of the value group)
+        self._groups = {}
+        for field_index, field in enumerate(self.fields):
+            for pattern_index, pattern in enumerate(field.patterns):
+                try:
+                    inner_groups = re.compile(pattern).groups
+                except re.error as e:
+                    raise ValueError(f"Invalid pattern for {self.name}.{field.name}: {pattern} ({e})")
+                group_name = f"f{field_index}p{pattern_index}"
+                body = f"(?i:{pattern})" if field.ignore_case else pattern
+                alternatives.append(f"(?P<{group_name}>{body})")
+                self._groups[group_name] = (field, inner_groups > 0)
+
+        self.regex = re.compile('|'.join(alternatives), re.MULTILINE)
+        # Named wrapper groups come before their pattern's own groups
+        self._value_group = {
+            name: self.regex.groupindex[name] + (1 if has_inner else 0)
+            for name, (_, has_inner) in self._groups.items()
+        }
+
+    def scan(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Find every field value in the text in one pass.
+
+        After a match the scan resumes where the value ends, so context that a
+        pattern consumes after its value (e.g. the ISIN following a security
+        name) is still available to other fields.
+
+        Args:
+            text: Document text
+
+        Returns:
+            Matches with field, value, line and column, in text order
+        """
+        matches = []
+        line, line_start, counted_to = 0, 0, 0
+        pos = 0
+        search = self.regex.search
+
+        while True:
+            match = search(text, pos)
+            if match is None:
+                break
+            group_name = match.lastgroup
+            field, _ = self._groups[group_name]
+            value_index = self._value_group[group_name]
+            start, end = match.span(value_index)
+            if start < 0:
+                start, end = match.span()
+            pos = max(end, match.start() + 1)
+
+            raw = text[start:end]
+            value = field.convert(raw)
+            if value is None:
+                continue
+
+            # Position of the value's last line, counted incrementally
+            last_break = raw.rstrip().rfind('\n')
+            if last_break >= 0:
+                value_start = start + last_break + 1
+            else:
+                value_start = start + len(raw) - len(raw.lstrip())
+            newlines = text.count('\n', counted_to, value_start)
+            if newlines:
+                line += newlines
+                line_start = text.rfind('\n', counted_to, value_start) + 1
+            counted_to = value_start
+
+            matches.append({
+                'field': field.name,
+                'value': value,
+                'line': line,
+                'column': value_start - line_start
+            })
+        return matches
+
+    def assemble(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Group field matches into records.
+
+        Each key field match starts a record. Other values join the key on the
+        nearest line within max_line_distance, preferring the same line, then
+        the closest column; each record keeps the nearest value per field.
+
+        Args:
+            matches: Output of scan()
+
+        Returns:
+            Records that have all required fields
+        """
+        keys = [m for m in matches if m['field'] == self.key_field]
+        if not keys:
+            return []
+        key_lines = [key['line'] for key in keys]
+        records = [{self.key_field: key['value']} for key in keys]
+        distances = [{} for _ in keys]
+
+        for match in matches:
+            if match['field'] == self.key_field:
+                continue
+            best, best_distance = None, None
+            low = bisect.bisect_left(key_lines, match['line'] - self.max_line_distance)
+            high = bisect.bisect_right(key_lines, match['line'] + self.max_line_distance)
+            for index in range(low, high):
+                distance = (abs(key_lines[index] - match['line']), abs(keys[index]['column'] - match['column']))
+                if best_distance is None or distance < best_distance:
+                    best, best_distance = index, distance
+            if best is None:
+                continue
+            current = distances[best].get(match['field'])
+            if current is None or best_distance < current:
+                records[best][match['field']] = match['value']
+                distances[best][match['field']] = best_distance
+
+        required = [field.name for field in self.fields if field.required]
+        return [record for record in records if all(name in record for name in required)]
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Extract complete records from text.
+
+        Args:
+            text: Document text
+
+        Returns:
+            List of record dictionaries
+        """
+        return self.assemble(self.scan(text))
+
+
+def compile_template(template: Dict[str, Any]) -> Optional[CompiledTemplate]:
+    """
+    Compile a template, logging instead of raising on invalid templates.
+
+    Args:
+        template: Template dictionary
+
+    Returns:
+        Compiled template, or None if it is invalid
+    """
+    try:
+        return CompiledTemplate(template)
+    except Exception as e:
+        logger.error(f"Error compiling template {template.get('name')}: {str(e)}")
+        return None
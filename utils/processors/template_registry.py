@@ -0,0 +1,253 @@
+import os
+import re
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from utils.processors.template_engine import CompiledTemplate, compile_template
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the templates directory for changes
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+# Score weights for choosing a template from a document's first page
+ALIAS_WEIGHT = 3
+MARKER_WEIGHT = 2
+IDENTIFIER_WEIGHT = 1
+
+# Characters of text treated as the first page when there is no form feed
+FIRST_PAGE_CHARS = 4000
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_name(name: str) -> str:
+    """Normalize an institution or template name for lookups."""
+    return ' '.join(str(name).lower().replace('_', ' ').replace('-', ' ').split())
+
+
+def template_aliases(template: Dict[str, Any]) -> List[str]:
+    """
+    Names a template can be looked up by.
+
+    Args:
+        template: Template dictionary
+
+    Returns:
+        Normalized template name (with and without a "template" suffix),
+        institution and `aliases` entries
+    """
+    names = [template.get('name'), template.get('institution')] + list(template.get('aliases') or [])
+    aliases = []
+    for name in names:
+        if not name:
+            continue
+        alias = normalize_name(name)
+        aliases.append(alias)
+        if alias.endswith(' template'):
+            aliases.append(alias[:-len(' template')])
+    return list(dict.fromkeys(alias for alias in aliases if alias))
+
+
+class TemplateRegistry:
+    """
+    Templates from a directory, reloaded when files change.
+
+    Lookups by institution go through an alias index, and choosing a template
+    for a document goes through an index of the first word of every alias,
+    sample identifier and layout marker, so neither grows with the number of
+    templates.
+    """
+
+    def __init__(self, templates_dir: str, reload_interval: float = DEFAULT_RELOAD_INTERVAL):
+        """
+        Initialize the registry and load the templates.
+
+        Args:
+            templates_dir: Directory of template YAML files
+            reload_interval: Minimum seconds between checks for changed files
+        """
+        self.templates_dir = templates_dir
+        self.reload_interval = reload_interval
+        # filename -> ((mtime, size), compiled template)
+        self._files = {}
+        self._templates = {}
+        self._aliases = {}
+        # first token -> [(template name, phrase, pattern or None, weight)]
+        self._phrases = {}
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self.reload()
+
+    @property
+    def templates(self) -> Dict[str, CompiledTemplate]:
+        """Compiled templates by name."""
+        self._maybe_reload()
+        return dict(self._templates)
+
+    def _scan_dir(self) -> Dict[str, Tuple[int, int]]:
+        try:
+            return {
+                entry.name: (entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in os.scandir(self.templates_dir)
+                if entry.name.endswith(('.yaml', '.yml')) and entry.is_file()
+            }
+        except OSError as e:
+            logger.error(f"Error reading templates directory {self.templates_dir}: {str(e)}")
+            return {}
+
+    def _load_file(self, filename: str) -> Optional[CompiledTemplate]:
+        try:
+            with open(os.path.join(self.templates_dir, filename), encoding='utf-8') as f:
+                template = yaml.safe_load(f)
+        except Exception as e:
+            logger.error(f"Error loading template {filename}: {str(e)}")
+            return None
+        if not isinstance(template, dict) or not template.get('name'):
+            logger.error(f"Template {filename} has no name")
+            return None
+        return compile_template(template)
+
+    def reload(self) -> bool:
+        """
+        Reload templates whose files were added, changed or removed.
+
+        Returns:
+            True if any template changed
+        """
+        with self._lock:
+            self._last_check = time.monotonic()
+            current = self._scan_dir()
+            changed = False
+
+            for filename in list(self._files):
+                if filename not in current:
+                    del self._files[filename]
+                    logger.info(f"Template file removed: {filename}")
+                    changed = True
+
+            for filename, signature in current.items():
+                known = self._files.get(filename)
+                if known and known[0] == signature:
+                    continue
+                compiled = self._load_file(filename)
+                if compiled is None:
+                    # Keep the previous version of a file that no longer loads
+                    continue
+                self._files[filename] = (signature, compiled)
+                logger.info(f"{'Reloaded' if known else 'Loaded'} template {compiled.name} from {filename}")
+                changed = True
+
+            if changed:
+                self._build_indexes()
+            return changed
+
+    def _maybe_reload(self):
+        if time.monotonic() - self._last_check >= self.reload_interval:
+            self.reload()
+
+    def _build_indexes(self):
+        templates, aliases, phrases = {}, {}, {}
+
+        def add_phrase(name, phrase, weight, is_pattern=False):
+            phrase = phrase.lower()
+            tokens = _TOKEN.findall(phrase)
+            if not tokens:
+                return
+            pattern = None
+            if is_pattern:
+                try:
+                    pattern = re.compile(phrase, re.IGNORECASE)
+                except re.error:
+                    return
+            # Phrases of one plain word match on the token alone
+            exact = not is_pattern and tokens == [phrase]
+            phrases.setdefault(tokens[0], []).append((name, None if exact else phrase, pattern, weight))
+
+        for filename in sorted(self._files):
+            compiled = self._files[filename][1]
+            if compiled.name in templates:
+                logger.warning(f"Template name {compiled.name} in {filename} overrides an earlier file")
+            templates[compiled.name] = compiled
+
+        for name, compiled in templates.items():
+            template = compiled.template
+            for alias in template_aliases(template):
+                if aliases.get(alias, name) != name:
+                    logger.warning(f"Template alias '{alias}' is used by {aliases[alias]} and {name}")
+                aliases.setdefault(alias, name)
+                add_phrase(name, alias, ALIAS_WEIGHT)
+            for identifier in template.get('sample_identifiers') or []:
+                add_phrase(name, str(identifier), IDENTIFIER_WEIGHT)
+            for markers in (template.get('layout_markers') or {}).values():
+                for marker in markers or []:
+                    add_phrase(name, str(marker), MARKER_WEIGHT, is_pattern=True)
+
+        self._templates, self._aliases, self._phrases = templates, aliases, phrases
+
+    def get(self, institution: Optional[str]) -> Optional[CompiledTemplate]:
+        """
+        Look up a template by name, institution or alias.
+
+        Args:
+            institution: Institution or template name
+
+        Returns:
+            Compiled template, or None
+        """
+        if not institution:
+            return None
+        self._maybe_reload()
+        name = self._aliases.get(normalize_name(institution))
+        return self._templates.get(name) if name else None
+
+    def score(self, text: str) -> List[Tuple[str, int]]:
+        """
+        Score templates against a document's first page.
+
+        Aliases found in the text count most, then layout markers, then
+        sample identifiers; each phrase counts once.
+
+        Args:
+            text: First page text
+
+        Returns:
+            (template name, score) pairs, best first
+        """
+        self._maybe_reload()
+        lowered = text.lower()
+        scores = {}
+        seen = set()
+        for token in set(_TOKEN.findall(lowered)):
+            for name, phrase, pattern, weight in self._phrases.get(token, ()):
+                key = (name, phrase or token, weight)
+                if key in seen:
+                    continue
+                if pattern is not None:
+                    if not pattern.search(text):
+                        continue
+                elif phrase is not None and phrase not in lowered:
+                    continue
+                seen.add(key)
+                scores[name] = scores.get(name, 0) + weight
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def best_match(self, text: str) -> Optional[CompiledTemplate]:
+        """
+        Choose the template that best fits a document.
+
+        Args:
+            text: Document text; only the first page is scored
+
+        Returns:
+            Best scoring template, or None if nothing matches
+        """
+        first_page = text.split('\f', 1)[0][:FIRST_PAGE_CHARS]
+        ranked = self.score(first_page)
+        if not ranked:
+            return None
+        return self._templates.get(ranked[0][0])
@@ -0,0 +1,329 @@
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PERIOD_FREQUENCIES = {
+    'daily': 'D',
+    'weekly': 'W',
+    'monthly': 'M',
+    'quarterly': 'Q',
+    'yearly': 'Y'
+}
+
+
+class ReturnsEngine:
+    """
+    Derives aligned period returns per ISIN from historical holdings snapshots
+    and computes correlation and covariance matrices with NumPy.
+
+    Snapshots are the same records used by
+    SecuritiesAnalyzer.analyze_performance_over_time: dictionaries with a
+    date (or report_date), an ISIN and a price (or market_value and quantity).
+    """
+
+    def __init__(self, frequency: str = 'monthly', min_periods: int = 2, max_cache_entries: int = 32):
+        """
+        Initialize the returns engine.
+
+        Args:
+            frequency: Period used to align snapshots (daily, weekly, monthly, quarterly, yearly)
+            min_periods: Minimum number of overlapping returns required for a pairwise estimate
+            max_cache_entries: Maximum number of date windows kept in the results cache
+        """
+        if frequency not in PERIOD_FREQUENCIES:
+            raise ValueError(f"Invalid frequency: {frequency}")
+
+        self.frequency = frequency
+        self.min_periods = max(2, int(min_periods))
+        self.max_cache_entries = max_cache_entries
+        self._results_cache = {}  # (data fingerprint, window, frequency) -> returns frame
+
+    def compute_returns(self,
+                        historical_data: Union[List[Dict[str, Any]], pd.DataFrame],
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        Compute period-over-period returns for every ISIN in the snapshots.
+
+        Args:
+            historical_data: Historical holdings snapshots
+            start_date: Optional inclusive start of the date window
+            end_date: Optional inclusive end of the date window
+
+        Returns:
+            DataFrame indexed by period with one column per ISIN. Periods in
+            which a security was not reported are NaN.
+        """
+        prices = self._prepare_prices(historical_data)
+        if prices.empty:
+            return pd.DataFrame()
+
+        window = self._window_bounds(start_date, end_date)
+        if window[0] is not None:
+            prices = prices[prices['date'] >= window[0]]
+        if window[1] is not None:
+            prices = prices[prices['date'] <= window[1]]
+
+        cache_key = (self._fingerprint(prices), window, self.frequency)
+        cached = self._results_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        returns = self._aligned_returns(prices)
+
+        if len(self._results_cache) >= self.max_cache_entries:
+            # Drop the oldest window; dicts preserve insertion order
+            self._results_cache.pop(next(iter(self._results_cache)))
+        self._results_cache[cache_key] = returns
+
+        return returns
+
+    def correlation_matrix(self,
+                           historical_data: Union[List[Dict[str, Any]], pd.DataFrame],
+                           start_date: Optional[str] = None,
+                           end_date: Optional[str] = None,
+                           shrinkage: Union[None, float, str] = None) -> pd.DataFrame:
+        """
+        Compute the correlation matrix of period returns.
+
+        Args:
+            historical_data: Historical holdings snapshots
+            start_date: Optional inclusive start of the date window
+            end_date: Optional inclusive end of the date window
+            shrinkage: None, a shrinkage intensity in [0, 1], or 'ledoit_wolf'
+
+        Returns:
+            Correlation matrix as a DataFrame indexed and labelled by ISIN
+        """
+        covariance = self.covariance_matrix(historical_data, start_date, end_date, shrinkage)
+        return covariance_to_correlation(covariance)
+
+    def covariance_matrix(self,
+                          historical_data: Union[List[Dict[str, Any]], pd.DataFrame],
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          shrinkage: Union[None, float, str] = None) -> pd.DataFrame:
+        """
+        Compute the covariance matrix of period returns.
+
+        Args:
+            historical_data: Historical holdings snapshots
+            start_date: Optional inclusive start of the date window
+            end_date: Optional inclusive end of the date window
+            shrinkage: None, a shrinkage intensity in [0, 1], or 'ledoit_wolf'
+
+        Returns:
+            Covariance matrix as a DataFrame indexed and labelled by ISIN
+        """
+        returns = self.compute_returns(historical_data, start_date, end_date)
+        return returns_covariance(returns, min_periods=self.min_periods, shrinkage=shrinkage)
+
+    def attach_returns(self,
+                       securities_data: Dict[str, Any],
+                       historical_data: Union[List[Dict[str, Any]], pd.DataFrame],
+                       start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Add a 'returns' series to each ISIN entry of securities_data.
+
+        Args:
+            securities_data: Dict keyed by ISIN (as returned in the 'securities'
+                key of SecuritiesAnalyzer.analyze_securities_by_isin)
+            historical_data: Historical holdings snapshots
+            start_date: Optional inclusive start of the date window
+            end_date: Optional inclusive end of the date window
+
+        Returns:
+            The same securities_data dict, updated in place
+        """
+        returns = self.compute_returns(historical_data, start_date, end_date)
+        for isin, data in securities_data.items():
+            if isinstance(data, dict) and isin in returns.columns:
+                data['returns'] = returns[isin]
+        return securities_data
+
+    def clear_cache(self):
+        """Clear the results cache."""
+        self._results_cache = {}
+        logger.info("Returns cache cleared")
+
+    def _prepare_prices(self, historical_data: Union[List[Dict[str, Any]], pd.DataFrame]) -> pd.DataFrame:
+        """Normalize snapshots to a date / isin / price frame."""
+        if historical_data is None or len(historical_data) == 0:
+            return pd.DataFrame(columns=['date', 'isin', 'price'])
+
+        df = historical_data if isinstance(historical_data, pd.DataFrame) else pd.DataFrame(historical_data)
+
+        if 'date' not in df.columns and 'report_date' in df.columns:
+            df = df.rename(columns={'report_date': 'date'})
+        if 'date' not in df.columns or 'isin' not in df.columns:
+            logger.warning("Historical data is missing date or isin columns")
+            return pd.DataFrame(columns=['date', 'isin', 'price'])
+
+        price = pd.to_numeric(df['price'], errors='coerce') if 'price' in df.columns else pd.Series(np.nan, index=df.index)
+
+        # Fall back to market value / quantity where no unit price was reported
+        if 'market_value' in df.columns and 'quantity' in df.columns:
+            quantity = pd.to_numeric(df['quantity'], errors='coerce').to_numpy(dtype=float)
+            market_value = pd.to_numeric(df['market_value'], errors='coerce').to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                implied = np.where(quantity > 0, market_value / quantity, np.nan)
+            price = price.where(price.notna(), pd.Series(implied, index=df.index))
+
+        prices = pd.DataFrame({
+            'date': pd.to_datetime(df['date'], errors='coerce'),
+            'isin': df['isin'].astype(str),
+            'price': price.astype(float)
+        })
+        prices = prices[prices['date'].notna() & (prices['price'] > 0)]
+        return prices.sort_values('date', kind='mergesort')
+
+    def _aligned_returns(self, prices: pd.DataFrame) -> pd.DataFrame:
+        """Pivot prices to a period x ISIN grid and compute simple returns."""
+        periods = prices['date'].dt.to_period(PERIOD_FREQUENCIES[self.frequency])
+
+        # Several sources may report the same ISIN in a period: average their
+        # latest prices so every security has one observation per period
+        last_by_source = prices.assign(period=periods).groupby(['period', 'isin'], sort=False)['price'].mean()
+        grid = last_by_source.unstack('isin').sort_index()
+
+        if len(grid) < 2:
+            return pd.DataFrame(columns=grid.columns)
+
+        values = grid.to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = values[1:] / values[:-1] - 1.0
+        returns[~np.isfinite(returns)] = np.nan
+
+        return pd.DataFrame(returns, index=grid.index[1:].astype(str), columns=grid.columns)
+
+    @staticmethod
+    def _window_bounds(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """Parse the date window bounds."""
+        start = pd.Timestamp(start_date) if start_date is not None else None
+        end = pd.Timestamp(end_date) if end_date is not None else None
+        return start, end
+
+    @staticmethod
+    def _fingerprint(prices: pd.DataFrame) -> str:
+        """Hash the normalized snapshots so identical inputs share cache entries."""
+        row_hashes = pd.util.hash_pandas_object(prices, index=False).to_numpy()
+        return hashlib.md5(row_hashes.tobytes()).hexdigest()
+
+
+def returns_covariance(returns: pd.DataFrame,
+                       min_periods: int = 2,
+                       shrinkage: Union[None, float, str] = None) -> pd.DataFrame:
+    """
+    Compute a pairwise-complete covariance matrix of returns with NumPy.
+
+    Missing observations are handled with a mask so the whole matrix is built
+    from two matrix products instead of a per-pair loop.
+
+    Args:
+        returns: DataFrame of returns (periods x securities), NaN where missing
+        min_periods: Minimum overlapping observations for a pairwise estimate
+        shrinkage: None, a shrinkage intensity in [0, 1], or 'ledoit_wolf'
+
+    Returns:
+        Covariance matrix as a DataFrame
+    """
+    columns = returns.columns
+    if returns.empty or len(columns) == 0:
+        return pd.DataFrame(index=columns, columns=columns, dtype=float)
+
+    values = returns.to_numpy(dtype=float)
+    mask = np.isfinite(values)
+    counts = mask.sum(axis=0)
+
+    # Demean each column over its observed periods, then zero the gaps
+    means = np.divide(np.where(mask, values, 0.0).sum(axis=0), counts,
+                      out=np.zeros(len(columns)), where=counts > 0)
+    centered = np.where(mask, values - means, 0.0)
+
+    observed = mask.astype(float)
+    pair_counts = observed.T @ observed
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = (centered.T @ centered) / (pair_counts - 1.0)
+    covariance[pair_counts < min_periods] = np.nan
+
+    if shrinkage is not None:
+        covariance = _shrink_covariance(covariance, centered, mask, shrinkage)
+
+    return pd.DataFrame(covariance, index=columns, columns=columns)
+
+
+def covariance_to_correlation(covariance: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a covariance matrix to a correlation matrix.
+
+    Args:
+        covariance: Covariance matrix as a DataFrame
+
+    Returns:
+        Correlation matrix as a DataFrame
+    """
+    values = covariance.to_numpy(dtype=float)
+    if values.size == 0:
+        return covariance.copy()
+
+    std = np.sqrt(np.diag(values))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = values / np.outer(std, std)
+    correlation = np.clip(correlation, -1.0, 1.0)
+    np.fill_diagonal(correlation, np.where(std > 0, 1.0, np.nan))
+
+    return pd.DataFrame(correlation, index=covariance.index, columns=covariance.columns)
+
+
+def _shrink_covariance(covariance: np.ndarray,
+                       centered: np.ndarray,
+                       mask: np.ndarray,
+                       shrinkage: Union[float, str]) -> np.ndarray:
+    """Shrink a sample covariance towards a scaled identity target."""
+    diagonal = np.diag(covariance)
+    finite_variances = diagonal[np.isfinite(diagonal)]
+    if finite_variances.size == 0:
+        return covariance
+
+    mu = finite_variances.mean()
+    target = np.eye(len(diagonal)) * mu
+
+    if shrinkage == 'ledoit_wolf':
+        intensity = _ledoit_wolf_intensity(covariance, centered, mask, mu)
+    else:
+        intensity = float(shrinkage)
+        if not 0.0 <= intensity <= 1.0:
+            raise ValueError(f"Shrinkage intensity must be between 0 and 1, got {shrinkage}")
+
+    sample = np.where(np.isfinite(covariance), covariance, 0.0)
+    return intensity * target + (1.0 - intensity) * sample
+
+
+def _ledoit_wolf_intensity(covariance: np.ndarray,
+                           centered: np.ndarray,
+                           mask: np.ndarray,
+                           mu: float) -> float:
+    """Estimate the Ledoit-Wolf optimal shrinkage intensity towards mu * I."""
+    n_obs = int(mask.any(axis=1).sum())
+    if n_obs < 2:
+        return 1.0
+
+    sample = np.where(np.isfinite(covariance), covariance, 0.0)
+    n_features = sample.shape[0]
+
+    # Dispersion of the sample covariance around the target
+    delta = np.sum((sample - mu * np.eye(n_features)) ** 2) / n_features
+
+    # Average squared distance between each outer product and the sample
+    # covariance, computed from squared observations to stay O(T * N^2)
+    squared = centered ** 2
+    beta = (np.sum(squared.T @ squared) / n_obs - np.sum(sample ** 2)) / (n_obs * n_features)
+    beta = min(max(beta, 0.0), delta)
+
+    return float(beta / delta) if delta > 0 else 1.0
@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.transaction_dedup import add_transactions
 
 def load_sample_document(sample_type):
     """Load sample document data into session state."""
@@ -44,7 +45,10 @@ def load_sample_document(sample_type):
         st.info("תוכל לראות את ניתוח ניירות הערך בלשונית 'ניירות ערך'")
 
 def _add_to_session_state(key, data):
-    """Add data to session state, initializing if needed."""
+    """Add data to session state, initializing if needed; transactions already loaded are skipped."""
+    if key == 'transactions':
+        add_transactions(st.session_state, data)
+        return
     if key not in st.session_state:
         st.session_state[key] = []
     st.session_state[key].extend(data)
@@ -7,6 +7,9 @@ import time
 from datetime import datetime, timedelta
 import hashlib
 import re
+from utils.instrumentation import timed, SPAN_ANALYSIS
+from utils.holdings_reconciliation import HoldingsReconciler, BREAK_PRICE
+from utils.security_master import get_security_master
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +20,18 @@ class SecuritiesAnalyzer:
     
     def __init__(self):
         self.securities_data = {}
-        self.price_tolerance = 0.05  # 5% tolerance for price differences
+        self.reconciler = HoldingsReconciler(security_master=get_security_master())
     
+    @property
+    def price_tolerance(self) -> float:
+        """Relative deviation from the consensus price before prices are flagged."""
+        return self.reconciler.price_tolerance
+    
+    @price_tolerance.setter
+    def price_tolerance(self, tolerance: float):
+        self.reconciler.price_tolerance = tolerance
+    
+    @timed(SPAN_ANALYSIS, step='analyze_securities_by_isin')
     def analyze_securities_by_isin(self, securities_list: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Analyze securities by ISIN across different accounts.
@@ -44,6 +57,10 @@ class SecuritiesAnalyzer:
                 
             securities_by_isin[isin].append(security)
         
+        # Each bank is its own account, so only prices are compared across banks
+        reconciliation = self.reconcile_holdings(securities_list, account_field='bank')
+        price_breaks = {item['isin'] for item in reconciliation['breaks'] if item['type'] == BREAK_PRICE}
+        
         # Process each ISIN group
         results = {}
         price_discrepancies = []
@@ -61,12 +78,11 @@ class SecuritiesAnalyzer:
             
             # Check for price discrepancies
             prices = [float(s.get('price', 0)) for s in securities if s.get('price') is not None and float(s.get('price', 0)) > 0]
-            if len(prices) > 1:
+            if len(prices) > 1 and isin in price_breaks:
                 min_price = min(prices)
                 max_price = max(prices)
                 
-                # Check if price difference exceeds tolerance
-                if min_price > 0 and (max_price - min_price) / min_price > self.price_tolerance:
+                if min_price > 0:
                     price_discrepancies.append({
                         'isin': isin,
                         'security_name': name,
@@ -123,15 +139,40 @@ class SecuritiesAnalyzer:
                 }
                 for holding in top_holdings
             ],
-            'price_discrepancies': price_discrepancies
+            'price_discrepancies': price_discrepancies,
+            'reconciliation': reconciliation['summary']
         }
         
         return {
             'status': 'success',
             'summary': summary,
-            'securities': results
+            'securities': results,
+            'breaks': reconciliation['breaks']
         }
     
+    @timed(SPAN_ANALYSIS, step='reconcile_holdings')
+    def reconcile_holdings(self, securities_list: List[Dict[str, Any]], reference: Optional[str] = None,
+                           across_dates: bool = False, source_field: str = 'source',
+                           account_field: str = 'account', date_field: str = 'report_date') -> Dict[str, Any]:
+        """
+        Reconcile holdings across sources or across statement dates.
+        
+        Args:
+            securities_list: List of securities data dictionaries
+            reference: Source of record when reconciling across sources
+            across_dates: Compare each statement with the previous one instead of across sources
+            source_field: Field naming the source of each holding
+            account_field: Field naming the account of each holding
+            date_field: Field holding the statement date of each holding
+            
+        Returns:
+            Break report ranked by monetary impact
+        """
+        if across_dates:
+            return self.reconciler.roll_forward(securities_list, source_field, account_field, date_field)
+        return self.reconciler.reconcile(securities_list, reference, source_field, account_field, date_field)
+    
+    @timed(SPAN_ANALYSIS, step='analyze_performance_over_time')
     def analyze_performance_over_time(self, historical_data: List[Dict[str, Any]], grouping: str = 'monthly') -> Dict[str, Any]:
         """
         Analyze securities performance over time.
@@ -275,6 +316,7 @@ class SecuritiesAnalyzer:
                 'message': f'Error analyzing performance: {str(e)}'
             }
     
+    @timed(SPAN_ANALYSIS, step='generate_consolidated_report')
     def generate_consolidated_report(self, securities_analysis: Dict[str, Any], 
                                     performance_analysis: Optional[Dict[str, Any]] = None) -> str:
         """
@@ -482,6 +524,7 @@ class SecuritiesAnalyzer:
         most_common = max(value_counts.items(), key=lambda x: x[1])[0]
         return most_common
 
+    @timed(SPAN_ANALYSIS, step='analyze_portfolio')
     def analyze_portfolio(self, securities: List[Dict[Any, Any]]) -> Dict[str, Any]:
         """
         Analyze portfolio data and generate comprehensive insights.
@@ -1,5 +1,6 @@
 import pdfplumber
 import io
+import numpy as np
 import pandas as pd
 import re
 import os
@@ -9,7 +10,14 @@ import logging
 import hashlib
 from typing import List, Dict, Any, Callable, Optional
 from dotenv import load_dotenv
-import google.generativeai as genai
+from utils.lazy_loader import lazy_import
+from utils.instrumentation import span, timed, SPAN_EXTRACTION, SPAN_PAGE_PARSE, SPAN_TABLE_EXTRACTION
+from utils.table_layouts import extract_page_tables
+from utils.numeric_parser import parse_amount, parse_amounts, parse_numeric_columns
+from utils.security_identifiers import ISIN_IN_TEXT, extract_isins, search_isin, valid_isins
+from utils.security_master import get_security_master
+
+genai = lazy_import('gemini')
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +37,7 @@ class SecuritiesPDFProcessor:
         genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
         self.model = genai.GenerativeModel('gemini-pro')
     
+    @timed(SPAN_EXTRACTION, processor='securities')
     def process_pdf(self, pdf_file_path: str, max_pages: Optional[int] = None, start_page: int = 0) -> List[Dict[str, Any]]:
         """Process PDF file and extract securities information."""
         try:
@@ -38,30 +47,43 @@ class SecuritiesPDFProcessor:
                 if max_pages is not None:
                     total_pages = min(total_pages, start_page + max_pages)
                 
-                all_securities = []
-                for page_num in range(start_page, total_pages):
-                    page = pdf.pages[page_num]
-                    
-                    # Extract tables and text
-                    tables = page.extract_tables()
-                    text = page.extract_text()
-                    
-                    # Process tables
-                    for table in tables:
-                        securities = self._process_table(table)
-                        all_securities.extend(securities)
-                    
-                    # Process text if no tables found
-                    if not tables and text:
-                        securities = self._process_text(text)
-                        all_securities.extend(securities)
-                
-                return all_securities
+                return self.process_pages(pdf.pages[start_page:total_pages], start_page)
                 
         except Exception as e:
             logger.error(f"Error processing securities PDF: {str(e)}", exc_info=True)
             return []
     
+    def process_pages(self, pages: List[Any], start_page: int = 0) -> List[Dict[str, Any]]:
+        """
+        Extract securities from already opened pdfplumber pages.
+        
+        Args:
+            pages: pdfplumber pages
+            start_page: Number of the first page (0-based), for instrumentation
+            
+        Returns:
+            List of securities
+        """
+        all_securities = []
+        for page_num, page in enumerate(pages, start_page):
+            with span(SPAN_PAGE_PARSE, page=page_num + 1):
+                # Extract tables and text
+                with span(SPAN_TABLE_EXTRACTION, page=page_num + 1, source='pdfplumber'):
+                    tables = page.extract_tables()
+                text = page.extract_text()
+                
+                # Process tables
+                for table in tables:
+                    securities = self._process_table(table)
+                    all_securities.extend(securities)
+                
+                # Process text if no tables found
+                if not tables and text:
+                    securities = self._process_text(text)
+                    all_securities.extend(securities)
+        
+        return self._resolve_isins(all_securities)
+    
     def _extract_securities_from_text(self, text: str) -> list:
         """Extract securities information from text."""
         securities = []
@@ -70,7 +92,6 @@ class SecuritiesPDFProcessor:
         lines = text.split('\n')
         
         # Regular expressions for different fields
-        isin_pattern = r'[A-Z]{2}[A-Z0-9]{10}'
         quantity_pattern = r'Quantity:\s*(\d+(?:,\d+)?(?:\.\d+)?)'
         price_pattern = r'Price:\s*\$(\d+(?:,\d+)?(?:\.\d+)?)'
         market_value_pattern = r'Market Value:\s*\$(\d+(?:,\d+)?(?:\.\d+)?)'
@@ -79,14 +100,14 @@ class SecuritiesPDFProcessor:
         
         for line in lines:
             # Try to find security name and ISIN
-            isin_match = re.search(isin_pattern, line)
-            if isin_match:
+            isin = search_isin(line)
+            if isin:
                 if current_security:
                     securities.append(current_security)
                 
                 current_security = {
-                    'isin': isin_match.group(0),
-                    'security_name': line.split(isin_match.group(0))[0].strip().rstrip('(').strip(),
+                    'isin': isin,
+                    'security_name': line.split(isin)[0].strip().rstrip('(').strip(),
                     'quantity': 0,
                     'price': 0,
                     'market_value': 0
@@ -97,19 +118,19 @@ class SecuritiesPDFProcessor:
                 # Try to find quantity
                 quantity_match = re.search(quantity_pattern, line)
                 if quantity_match:
-                    current_security['quantity'] = float(quantity_match.group(1).replace(',', ''))
+                    current_security['quantity'] = parse_amount(quantity_match.group(1)) or 0
                     continue
                 
                 # Try to find price
                 price_match = re.search(price_pattern, line)
                 if price_match:
-                    current_security['price'] = float(price_match.group(1).replace(',', ''))
+                    current_security['price'] = parse_amount(price_match.group(1)) or 0
                     continue
                 
                 # Try to find market value
                 market_value_match = re.search(market_value_pattern, line)
                 if market_value_match:
-                    current_security['market_value'] = float(market_value_match.group(1).replace(',', ''))
+                    current_security['market_value'] = parse_amount(market_value_match.group(1)) or 0
                     continue
         
         # Add last security if exists
@@ -119,11 +140,44 @@ class SecuritiesPDFProcessor:
         return securities
     
     def _generate_placeholder_isin(self, security_name: str) -> str:
-        """Generate a placeholder ISIN for securities without one."""
+        """Generate a placeholder ISIN for securities the security master cannot resolve."""
         name_hash = hashlib.md5(security_name.encode()).hexdigest()
         country_code = "XX"
         identifier = name_hash[:10].upper()
         return f"{country_code}{identifier}"
+    
+    def _resolve_isins(self, securities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fill in missing and placeholder ISINs from the security master.
+        
+        Securities of the document that have an ISIN are added to the master
+        first, so names seen in earlier uploads or elsewhere in the same
+        document resolve to the same ISIN across banks.
+        
+        Args:
+            securities: Extracted securities
+            
+        Returns:
+            The same securities
+        """
+        if not securities:
+            return securities
+        master = get_security_master()
+        master.learn(securities)
+        resolved = 0
+        valid = valid_isins([security.get('isin') for security in securities])
+        for security, has_isin in zip(securities, valid):
+            name = security.get('security_name')
+            if not name or has_isin:
+                continue
+            match = master.resolve(name)
+            if match:
+                security['isin'] = match[0]
+                resolved += 1
+        if resolved:
+            logger.info(f"Resolved {resolved} ISINs by name from the security master")
+        master.save()
+        return securities
 
     def _process_pdf_tables(self, tables, bank_name=None, progress_callback=None):
         """
@@ -162,24 +216,17 @@ class SecuritiesPDFProcessor:
                 price_col = next((col for col in table.columns if any(s in str(col).lower() for s in price_cols)), None)
                 val_col = next((col for col in table.columns if any(s in str(col).lower() for s in value_cols)), None)
                 
-                # If no security name column found, try to find ISIN patterns in any column
+                # If no security name column found, use the first column with valid ISINs
                 if not sec_col:
-                    for col in table.columns:
-                        isin_pattern = r'[A-Z]{2}[A-Z0-9]{10}'
-                        has_isins = False
-                        
-                        for _, value in table[col].items():
-                            if isinstance(value, str) and re.search(isin_pattern, value):
-                                sec_col = col
-                                has_isins = True
-                                break
-                        
-                        if has_isins:
-                            break
+                    sec_col = next((col for col in table.columns if pd.notna(extract_isins(table[col])).any()), None)
                 
                 # Process rows with appropriate columns
                 if sec_col:
-                    for _, row in table.iterrows():
+                    # Numeric columns are converted whole, each with its own decimal separator
+                    table = parse_numeric_columns(table, {qty_col, price_col, val_col} - {None, sec_col})
+                    # ISINs in the names, validated for the whole column at once
+                    isins = extract_isins(table[sec_col])
+                    for isin, (_, row) in zip(isins, table.iterrows()):
                         security_data = {'bank': bank_name or 'Unknown'}
                         
                         # Extract security details and values
@@ -187,23 +234,14 @@ class SecuritiesPDFProcessor:
                             security_name = str(row[sec_col]).strip()
                             security_data['security_name'] = security_name
                             
-                            # Extract ISIN if present in the name
-                            isin_match = re.search(r'([A-Z]{2}[A-Z0-9]{10})', security_name)
-                            if isin_match:
-                                security_data['isin'] = isin_match.group(1)
+                            # ISIN if present in the name
+                            if isin:
+                                security_data['isin'] = isin
                         
                         # Extract numeric values
                         for col, key in [(qty_col, 'quantity'), (price_col, 'price'), (val_col, 'market_value')]:
                             if col and pd.notna(row[col]):
-                                try:
-                                    # Convert value to float, handling various formats
-                                    value_str = str(row[col])
-                                    # Remove currency symbols, commas, etc.
-                                    value_str = re.sub(r'[^\d.-]', '', value_str)
-                                    value = float(value_str)
-                                    security_data[key] = value
-                                except (ValueError, TypeError):
-                                    pass
+                                security_data[key] = float(row[col])
                         
                         # Only add if we have at minimum a security name or ISIN
                         if 'security_name' in security_data:
@@ -220,7 +258,7 @@ class SecuritiesPDFProcessor:
         if progress_callback:
             progress_callback(100, 100, f"Extracted {len(securities)} securities from tables")
         
-        return securities
+        return self._resolve_isins(securities)
     
     def _process_pdf_text(self, text_results, bank_name=None, pdf_path=None, progress_callback=None):
         """
@@ -247,9 +285,10 @@ class SecuritiesPDFProcessor:
         if progress_callback:
             progress_callback(60, 100, "Analyzing text content for securities data")
         
-        # Look for ISIN patterns
-        isin_pattern = r'([A-Z]{2}[A-Z0-9]{10})'
-        isin_matches = re.finditer(isin_pattern, combined_text)
+        # Look for ISINs; candidates with a wrong check digit (account numbers, references) are dropped
+        candidates = list(ISIN_IN_TEXT.finditer(combined_text))
+        valid = valid_isins([match.group(1) for match in candidates]) if candidates else []
+        isin_matches = [match for match, is_isin in zip(candidates, valid) if is_isin]
         
         for i, match in enumerate(isin_matches):
             isin = match.group(1)
@@ -286,14 +325,7 @@ class SecuritiesPDFProcessor:
             number_matches = re.findall(number_pattern, context)
             
             # Convert matches to floats and assign based on magnitude
-            numbers = []
-            for num_str in number_matches:
-                try:
-                    # Remove commas and convert to float
-                    num = float(num_str.replace(',', ''))
-                    numbers.append(num)
-                except ValueError:
-                    continue
+            numbers = [num for num in parse_amounts(number_matches).tolist() if not np.isnan(num)]
             
             # Sort numbers by size
             numbers.sort()
@@ -355,7 +387,7 @@ class SecuritiesPDFProcessor:
                     # Call bank-specific processor if available
                     processor_method = getattr(self, f"_process_{bank_name.lower()}", None)
                     if processor_method and callable(processor_method):
-                        return processor_method(pdf, max_pages, progress_callback)
+                        return self._resolve_isins(processor_method(pdf, max_pages, progress_callback))
                 
                 # Generic processing
                 all_text = ""
@@ -368,8 +400,8 @@ class SecuritiesPDFProcessor:
                     text = page.extract_text() or ""
                     all_text += text + "\n"
                     
-                    # Try to extract tables
-                    tables = page.extract_tables()
+                    # Try to extract tables, using the bank's known layout if any
+                    tables = extract_page_tables(page, bank_name)
                     for table in tables:
                         if table:
                             # Convert table to DataFrame
@@ -385,7 +417,7 @@ class SecuritiesPDFProcessor:
                 if progress_callback:
                     progress_callback(100, 100, f"Extracted {len(securities)} securities")
                 
-                return securities
+                return self._resolve_isins(securities)
                     
         except Exception as e:
             logger.error(f"Error processing PDF with pdfplumber: {e}", exc_info=True)
@@ -429,21 +461,18 @@ class SecuritiesPDFProcessor:
             elif col_str in ['market value', 'value', 'notional', 'שווי', 'שווי שוק']:
                 market_value_col = col
         
-        # If we couldn't identify columns, check content
+        # If we couldn't identify columns, use the first column with valid ISINs
         if not security_name_col and not isin_col:
-            # Look for ISIN pattern in any column
-            for col in df.columns:
-                has_isin = False
-                for val in df[col]:
-                    if isinstance(val, str) and re.search(r'[A-Z]{2}[A-Z0-9]{10}', val):
-                        isin_col = col
-                        has_isin = True
-                        break
-                if has_isin:
-                    break
+            isin_col = next((col for col in df.columns if pd.notna(extract_isins(df[col])).any()), None)
+        
+        # Numeric columns are converted whole, each with its own decimal separator
+        df = parse_numeric_columns(df, {quantity_col, price_col, market_value_col} - {None, security_name_col, isin_col})
+        
+        # ISINs are validated for the whole column at once
+        isins = extract_isins(df[isin_col]) if isin_col else [None] * len(df)
         
         # Extract securities
-        for _, row in df.iterrows():
+        for isin, (_, row) in zip(isins, df.iterrows()):
             security_data = {'bank': bank_name or 'Unknown'}
             
             # Extract security name if column exists
@@ -451,11 +480,8 @@ class SecuritiesPDFProcessor:
                 security_data['security_name'] = str(row.get(security_name_col)).strip()
             
             # Extract ISIN
-            if isin_col and pd.notna(row.get(isin_col)):
-                isin_val = str(row.get(isin_col))
-                isin_match = re.search(r'([A-Z]{2}[A-Z0-9]{10})', isin_val)
-                if isin_match:
-                    security_data['isin'] = isin_match.group(1)
+            if isin:
+                security_data['isin'] = isin
             
             # Extract numeric fields
             for col, field in [
@@ -464,14 +490,7 @@ class SecuritiesPDFProcessor:
                 (market_value_col, 'market_value')
             ]:
                 if col and pd.notna(row.get(col)):
-                    try:
-                        val_str = str(row.get(col))
-                        # Clean up the value
-                        val_str = re.sub(r'[^\d.-]', '', val_str)
-                        val = float(val_str)
-                        security_data[field] = val
-                    except (ValueError, TypeError):
-                        pass
+                    security_data[field] = float(row.get(col))
             
             # Check if we have enough data to consider this a security
             if 'security_name' in security_data or 'isin' in security_data:
@@ -509,31 +528,38 @@ class SecuritiesPDFProcessor:
         # Convert table to DataFrame for easier processing
         df = pd.DataFrame(table[1:], columns=table[0] if table else [])
         
+        # Identify columns once for the whole table
+        fields = {}
+        for col in df.columns:
+            col_lower = str(col).lower()
+            if any(term in col_lower for term in ['name', 'security', 'description']):
+                fields[col] = 'security_name'
+            elif 'isin' in col_lower:
+                fields[col] = 'isin'
+            elif any(term in col_lower for term in ['quantity', 'units', 'shares']):
+                fields[col] = 'quantity'
+            elif any(term in col_lower for term in ['price', 'value per share']):
+                fields[col] = 'price'
+            elif any(term in col_lower for term in ['market value', 'total value']):
+                fields[col] = 'market_value'
+        
+        # Numeric columns are converted whole, each with its own decimal separator
+        numeric_cols = [col for col, field in fields.items() if field in ('quantity', 'price', 'market_value')]
+        df = parse_numeric_columns(df, numeric_cols)
+        # Identifiers with a wrong check digit are dropped for the whole column at once
+        for col in [col for col, field in fields.items() if field == 'isin']:
+            df[col] = extract_isins(df[col])
+        
         for _, row in df.iterrows():
             security = {}
             
-            # Try to identify columns
-            for col in row.index:
-                col_lower = str(col).lower()
-                if any(term in col_lower for term in ['name', 'security', 'description']):
-                    security['security_name'] = str(row[col]).strip()
-                elif 'isin' in col_lower:
-                    security['isin'] = str(row[col]).strip()
-                elif any(term in col_lower for term in ['quantity', 'units', 'shares']):
-                    try:
-                        security['quantity'] = float(str(row[col]).replace(',', ''))
-                    except:
-                        continue
-                elif any(term in col_lower for term in ['price', 'value per share']):
-                    try:
-                        security['price'] = float(str(row[col]).replace(',', ''))
-                    except:
-                        continue
-                elif any(term in col_lower for term in ['market value', 'total value']):
-                    try:
-                        security['market_value'] = float(str(row[col]).replace(',', ''))
-                    except:
-                        continue
+            for col, field in fields.items():
+                if field == 'isin':
+                    security[field] = row[col] if isinstance(row[col], str) else ''
+                elif field == 'security_name':
+                    security[field] = str(row[col]).strip()
+                elif pd.notna(row[col]):
+                    security[field] = float(row[col])
             
             # Only add if we have the required fields
             if all(field in security for field in ['security_name', 'quantity', 'market_value']):
@@ -569,9 +595,9 @@ class SecuritiesPDFProcessor:
                 security = {
                     'security_name': match.group(1).strip(),
                     'isin': match.group(2) if match.group(2) else '',
-                    'quantity': float(match.group(3).replace(',', '')),
-                    'price': float(match.group(4).replace(',', '')),
-                    'market_value': float(match.group(5).replace(',', ''))
+                    'quantity': parse_amount(match.group(3)),
+                    'price': parse_amount(match.group(4)),
+                    'market_value': parse_amount(match.group(5))
                 }
                 securities.append(security)
         
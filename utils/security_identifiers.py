@@ -0,0 +1,290 @@
+import re
+import logging
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+
+from utils.lazy_loader import lazy_import
+
+# Loaded on first column validation; extractors import this module at startup
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+ISIN = 'isin'
+CUSIP = 'cusip'
+SEDOL = 'sedol'
+
+# XX is not assigned to any country; it marks placeholder ISINs made up for
+# securities without one
+PLACEHOLDER_COUNTRY = 'XX'
+
+# Shapes of each identifier; only the check digit tells a real one from an
+# account number or reference of the same shape
+ISIN_PATTERN = r'[A-Z]{2}[A-Z0-9]{9}[0-9]'
+CUSIP_PATTERN = r'[0-9A-Z*@#]{8}[0-9]'
+SEDOL_PATTERN = r'[0-9BCDFGHJKLMNPQRSTVWXYZ]{6}[0-9]'
+
+# Candidates in free text: not part of a longer run of letters and digits
+ISIN_IN_TEXT = re.compile(rf'(?<![A-Z0-9])({ISIN_PATTERN})(?![A-Z0-9])')
+
+_SEDOL_WEIGHTS = np.array([1, 3, 1, 7, 3, 9])
+
+
+def _char_values(values: List[str], width: int) -> np.ndarray:
+    """Matrix of character values (0-9 for digits, A=10 ... Z=35, *=36, @=37, #=38)."""
+    codes = np.frombuffer(''.join(values).encode('ascii'), dtype=np.uint8).reshape(len(values), width)
+    result = codes.astype(np.int64) - ord('0')
+    letters = codes >= ord('A')
+    result[letters] = codes[letters].astype(np.int64) - ord('A') + 10
+    result[codes == ord('*')] = 36
+    result[codes == ord('@')] = 37
+    result[codes == ord('#')] = 38
+    return result
+
+
+def _luhn_check_digits(payload: np.ndarray) -> np.ndarray:
+    """
+    Luhn check digits of rows of digits, right-aligned with -1 as padding.
+
+    Starting from the rightmost digit, every other digit is doubled and the
+    digits of the results are added up.
+    """
+    present = payload >= 0
+    # Digits from the right, the rightmost being 0
+    from_right = np.cumsum(present[:, ::-1], axis=1)[:, ::-1] - 1
+    digits = np.where(present, payload, 0)
+    doubled = present & (from_right % 2 == 0)
+    digits = np.where(doubled, digits * 2, digits)
+    digits = np.where(digits > 9, digits - 9, digits)
+    return (10 - digits.sum(axis=1) % 10) % 10
+
+
+def _isin_check_digits(body: List[str]) -> np.ndarray:
+    """Check digits of the first 11 characters of ISINs."""
+    values = _char_values(body, 11)
+    # Letters become two digits (A=10), digits stay one digit
+    tens = np.where(values >= 10, values // 10, -1)
+    ones = np.where(values >= 10, values % 10, values)
+    payload = np.stack([tens, ones], axis=2).reshape(len(body), 22)
+    # Right-align the digits so the Luhn doubling starts from the last one
+    order = np.argsort(payload >= 0, axis=1, kind='stable')
+    return _luhn_check_digits(np.take_along_axis(payload, order, axis=1))
+
+
+def _cusip_check_digits(body: List[str]) -> np.ndarray:
+    """Check digits of the first 8 characters of CUSIPs."""
+    values = _char_values(body, 8)
+    values[:, 1::2] *= 2
+    total = (values // 10 + values % 10).sum(axis=1)
+    return (10 - total % 10) % 10
+
+
+def _sedol_check_digits(body: List[str]) -> np.ndarray:
+    """Check digits of the first 6 characters of SEDOLs."""
+    values = _char_values(body, 6)
+    return (10 - (values * _SEDOL_WEIGHTS).sum(axis=1) % 10) % 10
+
+
+_CHECKS = {
+    ISIN: (ISIN_PATTERN, 12, _isin_check_digits),
+    CUSIP: (CUSIP_PATTERN, 9, _cusip_check_digits),
+    SEDOL: (SEDOL_PATTERN, 7, _sedol_check_digits)
+}
+
+
+def _normalized(values: Iterable[Any]) -> 'pd.Series':
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    series = series.reset_index(drop=True)
+    return series.where(series.map(type).eq(str), '').astype(str).str.strip().str.upper()
+
+
+def _valid(series: 'pd.Series', kind: str) -> np.ndarray:
+    pattern, width, check_digits = _CHECKS[kind]
+    valid = series.str.fullmatch(pattern).to_numpy(dtype=bool, copy=True)
+    if kind == ISIN:
+        valid &= ~series.str.startswith(PLACEHOLDER_COUNTRY).to_numpy(dtype=bool)
+    if valid.any():
+        candidates = series[valid].tolist()
+        expected = check_digits([value[:width - 1] for value in candidates])
+        actual = np.array([int(value[-1]) for value in candidates])
+        valid[valid] = expected == actual
+    return valid
+
+
+def valid_isins(values: Iterable[Any]) -> np.ndarray:
+    """
+    Validate a whole column of ISINs, including their Luhn check digits.
+
+    Args:
+        values: Column of values (non-strings are invalid)
+
+    Returns:
+        Boolean array of the same length
+    """
+    return _valid(_normalized(values), ISIN)
+
+
+def valid_cusips(values: Iterable[Any]) -> np.ndarray:
+    """
+    Validate a whole column of CUSIPs, including their check digits.
+
+    Args:
+        values: Column of values (non-strings are invalid)
+
+    Returns:
+        Boolean array of the same length
+    """
+    return _valid(_normalized(values), CUSIP)
+
+
+def valid_sedols(values: Iterable[Any]) -> np.ndarray:
+    """
+    Validate a whole column of SEDOLs, including their check digits.
+
+    Args:
+        values: Column of values (non-strings are invalid)
+
+    Returns:
+        Boolean array of the same length
+    """
+    return _valid(_normalized(values), SEDOL)
+
+
+def identifier_types(values: Iterable[Any]) -> np.ndarray:
+    """
+    Classify a whole column of security identifiers.
+
+    Args:
+        values: Column of values
+
+    Returns:
+        Array of 'isin', 'cusip', 'sedol' or None for each value
+    """
+    series = _normalized(values)
+    kinds = np.full(len(series), None, dtype=object)
+    for kind in (ISIN, CUSIP, SEDOL):
+        kinds[(kinds == None) & _valid(series, kind)] = kind  # noqa: E711
+    return kinds
+
+
+_CHAR_VALUES = {c: i for i, c in enumerate('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ*@#')}
+
+
+def _check_digit(body: str, kind: str) -> int:
+    """Check digit of one identifier, computed in plain Python (numpy costs more for a single value)."""
+    values = [_CHAR_VALUES[c] for c in body]
+    if kind == ISIN:
+        digits = [int(d) for value in values for d in str(value)]
+        total = 0
+        for position, digit in enumerate(reversed(digits)):
+            if position % 2 == 0:
+                digit *= 2
+            total += digit - 9 if digit > 9 else digit
+    elif kind == CUSIP:
+        total = 0
+        for position, value in enumerate(values):
+            if position % 2:
+                value *= 2
+            total += value // 10 + value % 10
+    else:
+        total = sum(value * weight for value, weight in zip(values, _SEDOL_WEIGHTS.tolist()))
+    return (10 - total % 10) % 10
+
+
+def _is_valid(value: Any, kind: str) -> bool:
+    """Validate a single identifier."""
+    if not isinstance(value, str):
+        return False
+    pattern, width, _ = _CHECKS[kind]
+    value = value.strip().upper()
+    if not re.fullmatch(pattern, value) or (kind == ISIN and value.startswith(PLACEHOLDER_COUNTRY)):
+        return False
+    return _check_digit(value[:width - 1], kind) == int(value[-1])
+
+
+def is_valid_isin(value: Any) -> bool:
+    """Whether a value is an ISIN with a correct check digit (placeholder ISINs are not)."""
+    return _is_valid(value, ISIN)
+
+
+def is_valid_cusip(value: Any) -> bool:
+    """Whether a value is a CUSIP with a correct check digit."""
+    return _is_valid(value, CUSIP)
+
+
+def is_valid_sedol(value: Any) -> bool:
+    """Whether a value is a SEDOL with a correct check digit."""
+    return _is_valid(value, SEDOL)
+
+
+def cusip_to_isin(cusip: str, country: str = 'US') -> str:
+    """
+    ISIN of a security identified by its CUSIP.
+
+    Args:
+        cusip: Valid CUSIP
+        country: Country code of the ISIN (US or CA)
+
+    Returns:
+        The ISIN
+    """
+    body = f"{country}{cusip.strip().upper()}"
+    return f"{body}{_check_digit(body, ISIN)}"
+
+
+def find_isins(text: str) -> List[str]:
+    """
+    Valid ISINs in a text, in order of appearance.
+
+    Args:
+        text: Text to search
+
+    Returns:
+        ISINs whose check digits are correct
+    """
+    if not isinstance(text, str):
+        return []
+    candidates = ISIN_IN_TEXT.findall(text)
+    if not candidates:
+        return []
+    return [isin for isin, valid in zip(candidates, valid_isins(candidates)) if valid]
+
+
+def search_isin(text: str) -> Optional[str]:
+    """
+    First valid ISIN in a text.
+
+    Args:
+        text: Text to search
+
+    Returns:
+        The ISIN, or None if the text has none
+    """
+    isins = find_isins(text)
+    return isins[0] if isins else None
+
+
+def extract_isins(values: Iterable[Any]) -> np.ndarray:
+    """
+    First valid ISIN in each cell of a column, e.g. a name column like 'Apple Inc (US0378331005)'.
+
+    All candidates of the column are validated at once.
+
+    Args:
+        values: Column of cells
+
+    Returns:
+        Array of ISINs, None where a cell has none
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    series = series.reset_index(drop=True)
+    text = series.where(series.map(type).eq(str), '').astype(str)
+    candidates = text.str.findall(ISIN_IN_TEXT.pattern).explode().dropna()
+    result = np.full(len(series), None, dtype=object)
+    if candidates.empty:
+        return result
+    candidates = candidates[valid_isins(candidates.astype(str))]
+    first = candidates[~candidates.index.duplicated()]
+    result[first.index.to_numpy()] = first.to_numpy()
+    return result
@@ -0,0 +1,256 @@
+import os
+import json
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from utils.holdings_reconciliation import normalize_security_name
+from utils.security_identifiers import valid_isins
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MASTER_PATH = os.path.join('data', 'security_master.json')
+# Minimum trigram similarity (Dice coefficient, 0-1) for a fuzzy match
+DEFAULT_MIN_SCORE = 0.6
+# Candidates sharing the most trigrams with a name that are scored exactly
+CANDIDATES = 20
+# Trigrams in more names than this (e.g. 'inc', 'ban') do not pick candidates
+COMMON_POSTINGS = 500
+
+_FORMAT_VERSION = 1
+
+_masters: Dict[str, 'SecurityMaster'] = {}
+_masters_lock = threading.Lock()
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Character trigrams of the words of a normalized name.
+
+    Each word is padded, so word starts weigh more and word order does not
+    matter ('Bank Leumi' and 'Leumi Bank' have the same trigrams).
+
+    Args:
+        text: Normalized name
+
+    Returns:
+        Set of trigrams
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SecurityMaster:
+    """
+    Local index of securities seen in earlier uploads, for resolving names to ISINs.
+
+    Every security is stored with its ISIN, the names and aliases it was
+    reported under and its tickers. Names are looked up exactly first, then
+    through an inverted index from character trigrams to names: the names
+    sharing the most uncommon trigrams with the query are the candidates,
+    so a fuzzy lookup scores a handful of names instead of the whole master.
+    The securities are persisted as JSON and the index is rebuilt when loaded.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_score: float = DEFAULT_MIN_SCORE):
+        """
+        Open the security master, loading it from disk if it exists.
+
+        Args:
+            path: JSON file of the master (None keeps it in memory only)
+            min_score: Minimum trigram similarity for a fuzzy match
+        """
+        self.path = path
+        self.min_score = min_score
+        self.securities: Dict[str, Dict[str, Any]] = {}
+        self._names: List[Tuple[str, str]] = []
+        self._grams: List[FrozenSet[str]] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._exact: Dict[str, str] = {}
+        self._tickers: Dict[str, str] = {}
+        self._cache: Dict[str, Optional[Tuple[str, float]]] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.securities)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            for isin, record in data.get('securities', {}).items():
+                self.add(isin, record.get('name'), record.get('aliases', []), record.get('tickers', []))
+            self._dirty = False
+            logger.info(f"Loaded {len(self)} securities from {self.path}")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable security master {self.path}: {str(e)}")
+
+    def save(self):
+        """Write the master to disk if it changed since it was loaded or saved."""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Written via a temporary file so a crash never leaves a partial master
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': _FORMAT_VERSION, 'securities': self.securities}, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+    def _index_name(self, name: str, isin: str):
+        normalized = normalize_security_name(name)
+        if not normalized or normalized in self._exact:
+            return
+        self._exact[normalized] = isin
+        entry = len(self._names)
+        grams = frozenset(trigrams(normalized))
+        self._names.append((normalized, isin))
+        self._grams.append(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(entry)
+
+    def add(self, isin: str, name: Optional[str] = None, aliases: Iterable[str] = (),
+            tickers: Iterable[str] = ()) -> bool:
+        """
+        Add a security, or new names and tickers of a known one.
+
+        Args:
+            isin: ISIN of the security
+            name: Name it was reported under
+            aliases: Other names of the security
+            tickers: Ticker symbols of the security
+
+        Returns:
+            True if anything new was added
+        """
+        isin = isin.strip().upper()
+        with self._lock:
+            record = self.securities.get(isin)
+            if record is None:
+                record = self.securities[isin] = {'name': None, 'aliases': [], 'tickers': []}
+                changed = True
+            else:
+                changed = False
+
+            for alias in ([name] if name else []) + list(aliases):
+                alias = str(alias).strip()
+                if not alias or alias == record['name'] or alias in record['aliases']:
+                    continue
+                if record['name'] is None:
+                    record['name'] = alias
+                else:
+                    record['aliases'].append(alias)
+                self._index_name(alias, isin)
+                changed = True
+
+            for ticker in tickers:
+                ticker = str(ticker).strip().upper()
+                if ticker and ticker not in record['tickers']:
+                    record['tickers'].append(ticker)
+                    self._tickers.setdefault(ticker, isin)
+                    changed = True
+
+            if changed:
+                self._dirty = True
+                self._cache.clear()
+            return changed
+
+    def learn(self, securities: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add the names and tickers of extracted securities that have a valid ISIN.
+
+        Args:
+            securities: Securities with isin, security_name and optionally symbol or ticker
+
+        Returns:
+            Number of securities that added something new
+        """
+        securities = list(securities)
+        added = 0
+        valid = valid_isins([security.get('isin') for security in securities])
+        for security, has_isin in zip(securities, valid):
+            if not has_isin:
+                continue
+            isin = security['isin']
+            tickers = [security[field] for field in ('symbol', 'ticker') if security.get(field)]
+            if self.add(isin, security.get('security_name'), tickers=tickers):
+                added += 1
+        return added
+
+    def resolve(self, name: str) -> Optional[Tuple[str, float]]:
+        """
+        Find the ISIN of a security by name, alias or ticker.
+
+        Args:
+            name: Name or ticker as reported
+
+        Returns:
+            (ISIN, similarity from 0 to 1), or None if no name is similar enough
+        """
+        if not isinstance(name, str) or not name.strip():
+            return None
+        with self._lock:
+            if name in self._cache:
+                return self._cache[name]
+            match = self._resolve(name)
+            self._cache[name] = match
+            return match
+
+    def _resolve(self, name: str) -> Optional[Tuple[str, float]]:
+        ticker = name.strip().upper()
+        if ticker in self._tickers:
+            return self._tickers[ticker], 1.0
+        normalized = normalize_security_name(name)
+        if not normalized:
+            return None
+        if normalized in self._exact:
+            return self._exact[normalized], 1.0
+
+        grams = trigrams(normalized)
+        postings = sorted((self._postings[gram] for gram in grams if gram in self._postings), key=len)
+        if not postings:
+            return None
+        # Rare trigrams pick the candidates, so a lookup never walks most of the master
+        limit = max(COMMON_POSTINGS, len(postings[0]))
+        shared = Counter()
+        for posting in postings:
+            if len(posting) > limit:
+                break
+            shared.update(posting)
+
+        best, best_score = None, 0.0
+        for entry, _ in shared.most_common(CANDIDATES):
+            candidate = self._grams[entry]
+            score = 2 * len(grams & candidate) / (len(grams) + len(candidate))
+            if score > best_score:
+                best, best_score = entry, score
+        if best is None or best_score < self.min_score:
+            return None
+        return self._names[best][1], round(best_score, 3)
+
+
+def get_security_master(path: Optional[str] = None) -> SecurityMaster:
+    """
+    Shared security master of the application, loaded once per file.
+
+    Args:
+        path: JSON file of the master (default: SECURITY_MASTER_PATH or data/security_master.json)
+
+    Returns:
+        The security master
+    """
+    path = path or os.getenv('SECURITY_MASTER_PATH', DEFAULT_MASTER_PATH)
+    with _masters_lock:
+        if path not in _masters:
+            _masters[path] = SecurityMaster(path)
+        return _masters[path]
@@ -0,0 +1,232 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SIGN_INCOME = 'income'
+SIGN_EXPENSE = 'expense'
+SIGN_ZERO = 'zero'
+
+CUBE_CACHE_SIZE = 8
+
+
+class SpendingCube:
+    """
+    Transaction totals by day, category and sign.
+
+    The transactions are aggregated once, in a single groupby. Trends,
+    summaries, budget checks and reports then roll up the cube, which has at
+    most one row per day, category and sign, instead of scanning the
+    transactions again for every period or category.
+
+    Each cell holds the sum of amounts, the number of transactions, the
+    number with an amount, and the smallest and largest amount. Transactions
+    without a valid date are kept for category totals but left out of period
+    roll-ups.
+    """
+
+    def __init__(self, transactions: Union[List[Dict[str, Any]], pd.DataFrame]):
+        """
+        Build the cube.
+
+        Args:
+            transactions: Transactions with date, amount and category
+        """
+        df = transactions if isinstance(transactions, pd.DataFrame) else pd.DataFrame(transactions)
+        self.transaction_count = len(df)
+
+        def column(name):
+            return df[name] if name in df.columns else pd.Series([None] * len(df), index=df.index, dtype=object)
+
+        amount = pd.to_numeric(column('amount'), errors='coerce')
+        sign = np.select([amount > 0, amount < 0, amount == 0], [SIGN_INCOME, SIGN_EXPENSE, SIGN_ZERO], None)
+        frame = pd.DataFrame({
+            'day': pd.to_datetime(column('date'), errors='coerce').dt.normalize(),
+            'category': column('category'),
+            'sign': sign,
+            'amount': amount
+        })
+
+        self.cells = frame.groupby(['day', 'category', 'sign'], dropna=False)['amount'].agg(
+            total='sum', count='size', valued='count', min='min', max='max')
+        self._rollups = {}
+
+    @staticmethod
+    def _finish(grouped: pd.DataFrame) -> pd.DataFrame:
+        """Add the average amount to summed cells."""
+        grouped['average'] = grouped['total'] / grouped['valued'].where(grouped['valued'] > 0)
+        return grouped
+
+    def _sum(self, cells: pd.DataFrame, keys) -> pd.DataFrame:
+        grouped = cells.groupby(keys, dropna=False)
+        summed = grouped[['total', 'count', 'valued']].sum()
+        summed['min'] = grouped['min'].min()
+        summed['max'] = grouped['max'].max()
+        return self._finish(summed)
+
+    def _memoized(self, key, compute) -> pd.DataFrame:
+        """Roll-ups are computed once per cube; callers get a copy."""
+        if key not in self._rollups:
+            self._rollups[key] = compute()
+        return self._rollups[key].copy()
+
+    def _select(self, sign: Optional[str] = None) -> pd.DataFrame:
+        if sign is None:
+            return self.cells
+        return self.cells[self.cells.index.get_level_values('sign') == sign]
+
+    def period_keys(self, period: str, days: pd.Index) -> Any:
+        """
+        Period of each day, as used for grouping transactions by period.
+
+        Args:
+            period: 'daily', 'weekly', 'monthly' or 'yearly'
+            days: Days to map
+
+        Returns:
+            Period keys; weeks are ISO week numbers
+        """
+        days = pd.DatetimeIndex(days)
+        if period == 'daily':
+            return pd.Index(days.date)
+        if period == 'weekly':
+            return pd.Index(days.isocalendar().week)
+        if period == 'monthly':
+            return days.to_period('M')
+        return days.year
+
+    def by_period(self, period: str = 'monthly', sign: Optional[str] = None,
+                  category: Optional[str] = None) -> pd.DataFrame:
+        """
+        Totals per period.
+
+        Args:
+            period: 'daily', 'weekly', 'monthly' or 'yearly'
+            sign: Only income, expense or zero amounts (default: all)
+            category: Only this category (default: all)
+
+        Returns:
+            DataFrame indexed by period with total, count, valued, min, max and average
+        """
+        def compute():
+            cells = self._select(sign)
+            if category is not None:
+                cells = cells[cells.index.get_level_values('category') == category]
+            cells = cells[cells.index.get_level_values('day').notna()]
+            keys = self.period_keys(period, cells.index.get_level_values('day'))
+            return self._sum(cells, keys)
+
+        return self._memoized(('period', period, sign, category), compute)
+
+    def by_category(self, sign: Optional[str] = None) -> pd.DataFrame:
+        """
+        Totals per category over all dates.
+
+        Args:
+            sign: Only income, expense or zero amounts (default: all)
+
+        Returns:
+            DataFrame indexed by category with total, count, valued, min, max and average
+        """
+        return self._memoized(('category', sign),
+                              lambda: self._sum(self._select(sign), self._select(sign).index.get_level_values('category')))
+
+    def by_sign(self) -> pd.DataFrame:
+        """Totals of income, expenses and zero amounts over all dates."""
+        return self._memoized(('sign',), lambda: self._sum(self.cells, self.cells.index.get_level_values('sign')))
+
+    def totals(self, sign: Optional[str] = None) -> Dict[str, float]:
+        """
+        Overall totals.
+
+        Args:
+            sign: Only income, expense or zero amounts (default: all)
+
+        Returns:
+            Dictionary with total, count, valued, min, max and average
+        """
+        cells = self._select(sign)
+        valued = cells['valued'].sum()
+        total = cells['total'].sum()
+        return {
+            'total': total,
+            'count': cells['count'].sum(),
+            'valued': valued,
+            'min': cells['min'].min(),
+            'max': cells['max'].max(),
+            'average': total / valued if valued else np.nan
+        }
+
+    def monthly_summary(self) -> pd.DataFrame:
+        """
+        Income, expenses, net and count per calendar month.
+
+        Returns:
+            DataFrame with month ('YYYY-MM'), income, expenses (negative),
+            net and count columns, sorted by month
+        """
+        income = self.by_period('monthly', SIGN_INCOME)['total']
+        expenses = self.by_period('monthly', SIGN_EXPENSE)['total']
+        overall = self.by_period('monthly')
+
+        monthly = pd.DataFrame({
+            'income': income.reindex(overall.index, fill_value=0.0),
+            'expenses': expenses.reindex(overall.index, fill_value=0.0),
+            'net': overall['total'],
+            'count': overall['valued']
+        })
+        monthly.index = monthly.index.strftime('%Y-%m')
+        return monthly.rename_axis('month').reset_index()
+
+
+_cache: 'OrderedDict[Any, SpendingCube]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _fingerprint(transactions: List[Dict[str, Any]]) -> Optional[int]:
+    """Hash of the fields the cube depends on, or None if they are unhashable."""
+    try:
+        return hash(tuple(
+            (t.get('date'), t.get('amount'), t.get('category')) for t in transactions
+        ))
+    except (TypeError, AttributeError):
+        return None
+
+
+def get_spending_cube(transactions: List[Dict[str, Any]]) -> SpendingCube:
+    """
+    Cube for a transaction list, shared by every analysis of the same transactions.
+
+    Cubes are cached by the dates, amounts and categories of the
+    transactions, so a list that changes gets a new cube.
+
+    Args:
+        transactions: List of transactions
+
+    Returns:
+        SpendingCube of the transactions
+    """
+    if isinstance(transactions, pd.DataFrame):
+        return SpendingCube(transactions)
+
+    key = _fingerprint(transactions)
+    if key is not None:
+        key = (len(transactions), key)
+        with _cache_lock:
+            cube = _cache.get(key)
+            if cube is not None:
+                _cache.move_to_end(key)
+                return cube
+
+    cube = SpendingCube(transactions)
+    if key is not None:
+        with _cache_lock:
+            _cache[key] = cube
+            while len(_cache) > CUBE_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return cube
@@ -0,0 +1,267 @@
+import os
+import re
+import sys
+import json
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ['app.py', 'streamlit_app.py', 'app.streamlit.py']
+
+# Cold start threshold per entry point, in seconds
+DEFAULT_STARTUP_BUDGET = 1.0
+
+# Backends that should only be loaded once a feature is used
+HEAVY_MODULES = ['google.generativeai', 'google.cloud.aiplatform', 'tabula', 'sklearn', 'mistralai', 'pandas']
+
+# Dummy keys so entry points get past their configuration checks
+PROFILE_ENV = {
+    'GOOGLE_APPLICATION_CREDENTIALS': 'profile',
+    'GEMINI_API_KEY': 'profile',
+    'MISTRAL_API_KEY': 'profile',
+}
+
+# One-time initialization costs, each measured in a fresh interpreter
+INIT_PROBES = {
+    'gemini_configure': (
+        "from utils.lazy_loader import get_backend\n"
+        "genai = get_backend('gemini')\n"
+        "genai.configure(api_key='profile')\n"
+        "genai.GenerativeModel('gemini-pro')"
+    ),
+    'securities_pdf_processor': (
+        "from utils.securities_pdf_processor import SecuritiesPDFProcessor\n"
+        "SecuritiesPDFProcessor()"
+    ),
+    'mistral_client': (
+        "from utils.mistral_extractor import MistralExtractor\n"
+        "MistralExtractor()"
+    ),
+    'categorization_model': (
+        "from utils.financial_analyzer import FinancialAnalyzer\n"
+        "FinancialAnalyzer().ml_pipeline"
+    ),
+    'financial_agents_tools': (
+        "import utils.financial_agents"
+    ),
+    'template_loading': (
+        "from utils.processors.enhanced_securities_processor import EnhancedSecuritiesProcessor\n"
+        "EnhancedSecuritiesProcessor('sqlite://', os.path.join(root, 'data', 'templates'), 'profile.pkl')"
+    ),
+    'tabula_jvm': (
+        "import tabula\n"
+        "tabula.read_pdf(os.path.join(root, 'samples', 'bank_statement.pdf'), pages=1)"
+    ),
+}
+
+_ENTRY_SCRIPT = """
+import sys, json, time, runpy
+sys.path.insert(0, {root!r})
+start_time = time.perf_counter()
+runpy.run_path({entry!r}, run_name='startup')
+elapsed = time.perf_counter() - start_time
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_PROBE_SCRIPT = """
+import os, sys, json, time
+root = {root!r}
+sys.path.insert(0, root)
+start_time = time.perf_counter()
+{code}
+print(json.dumps({{'elapsed': time.perf_counter() - start_time}}))
+"""
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)')
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Parse the output of `python -X importtime`.
+
+    Args:
+        stderr: Standard error of the profiled interpreter
+
+    Returns:
+        List of module dictionaries with self/cumulative times in milliseconds
+        and the nesting depth (0 for modules imported directly)
+    """
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append({
+            'module': name,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+            'depth': (len(indent) - 1) // 2
+        })
+    return modules
+
+
+def _run_python(script: str, work_dir: str, import_time: bool = False, timeout: int = 300) -> subprocess.CompletedProcess:
+    """Run a script in a fresh interpreter from a scratch directory."""
+    command = [sys.executable]
+    if import_time:
+        command += ['-X', 'importtime']
+    command += ['-c', script]
+    env = dict(os.environ, **PROFILE_ENV)
+    return subprocess.run(command, cwd=work_dir, env=env, capture_output=True, text=True, timeout=timeout)
+
+
+def _last_json_line(stdout: str) -> Dict[str, Any]:
+    """Read the JSON result printed as the last line of a profiled run."""
+    lines = stdout.strip().splitlines()
+    return json.loads(lines[-1]) if lines else {}
+
+
+def profile_entry_point(entry: str, top: int = 20, work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Measure the cold start of an entry point.
+
+    Args:
+        entry: Entry point path relative to the project root
+        top: Number of slowest modules to keep in the report
+        work_dir: Directory to run from (a scratch directory by default)
+
+    Returns:
+        Dictionary with wall time, import time, slowest modules and loaded heavy backends
+    """
+    scratch_dir = work_dir or tempfile.mkdtemp(prefix='startup_profile_')
+    # app.py logs to logs/app.log relative to the working directory
+    os.makedirs(os.path.join(scratch_dir, 'logs'), exist_ok=True)
+
+    try:
+        script = _ENTRY_SCRIPT.format(root=PROJECT_ROOT, entry=os.path.join(PROJECT_ROOT, entry), heavy=HEAVY_MODULES)
+        result = _run_python(script, scratch_dir, import_time=True)
+    finally:
+        if work_dir is None:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        logger.error(f"Error profiling {entry}: {error}")
+        return {'entry_point': entry, 'error': error}
+
+    summary = _last_json_line(result.stdout)
+    modules = parse_importtime(result.stderr)
+    slowest = sorted(modules, key=lambda m: m['self_ms'], reverse=True)[:top]
+
+    return {
+        'entry_point': entry,
+        'wall_seconds': round(summary['elapsed'], 4),
+        'import_seconds': round(sum(m['cumulative_ms'] for m in modules if m['depth'] == 0) / 1000, 4),
+        'module_count': len(modules),
+        'heavy_modules_loaded': summary['loaded'],
+        'slowest_modules': slowest
+    }
+
+
+def profile_init_costs(probes: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Measure one-time initialization costs, each in a fresh interpreter.
+
+    Args:
+        probes: Probe name to Python code (INIT_PROBES by default)
+
+    Returns:
+        Dictionary of probe name to {'seconds': ...} or {'error': ...}
+    """
+    costs = {}
+    scratch_dir = tempfile.mkdtemp(prefix='startup_profile_')
+    try:
+        for name, code in (probes or INIT_PROBES).items():
+            try:
+                result = _run_python(_PROBE_SCRIPT.format(root=PROJECT_ROOT, code=code), scratch_dir)
+                if result.returncode == 0:
+                    costs[name] = {'seconds': round(_last_json_line(result.stdout)['elapsed'], 4)}
+                else:
+                    costs[name] = {'error': result.stderr.strip().splitlines()[-1]}
+            except subprocess.TimeoutExpired:
+                costs[name] = {'error': 'timed out'}
+            logger.info(f"Init cost {name}: {costs[name]}")
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    return costs
+
+
+def build_report(entries: Optional[List[str]] = None, top: int = 20, include_init: bool = True,
+                 budget: float = DEFAULT_STARTUP_BUDGET) -> Dict[str, Any]:
+    """
+    Profile entry points and initialization costs.
+
+    Args:
+        entries: Entry points to profile (ENTRY_POINTS by default)
+        top: Number of slowest modules per entry point
+        include_init: Whether to measure one-time initialization costs
+        budget: Cold start threshold per entry point, in seconds
+
+    Returns:
+        Report dictionary
+    """
+    entry_reports = {}
+    for entry in entries or ENTRY_POINTS:
+        logger.info(f"Profiling {entry}...")
+        entry_reports[entry] = profile_entry_point(entry, top=top)
+
+    over_budget = [
+        entry for entry, report in entry_reports.items()
+        if 'error' in report or report['wall_seconds'] > budget
+    ]
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'budget_seconds': budget,
+        'entry_points': entry_reports,
+        'init_costs': profile_init_costs() if include_init else {},
+        'over_budget': over_budget
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line interface; exits non-zero when an entry point is over budget."""
+    parser = argparse.ArgumentParser(description='Profile import time and initialization costs of the entry points')
+    parser.add_argument('--entry', action='append', help='Entry point to profile (repeatable, default: all)')
+    parser.add_argument('--output', default='startup_profile.json', help='Path of the JSON report')
+    parser.add_argument('--top', type=int, default=20, help='Slowest modules to keep per entry point')
+    parser.add_argument('--budget', type=float, default=float(os.getenv('STARTUP_BUDGET_SECONDS', DEFAULT_STARTUP_BUDGET)),
+                        help='Cold start threshold per entry point, in seconds')
+    parser.add_argument('--skip-init', action='store_true', help='Do not measure initialization costs')
+    args = parser.parse_args(argv)
+
+    report = build_report(args.entry, top=args.top, include_init=not args.skip_init, budget=args.budget)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    for entry, entry_report in report['entry_points'].items():
+        if 'error' in entry_report:
+            print(f"{entry}: error: {entry_report['error']}")
+        else:
+            print(f"{entry}: {entry_report['wall_seconds']:.2f}s "
+                  f"({entry_report['module_count']} modules, heavy: {entry_report['heavy_modules_loaded'] or 'none'})")
+    for name, cost in report['init_costs'].items():
+        print(f"  init {name}: {cost.get('seconds', cost.get('error'))}")
+    print(f"Report written to {args.output}")
+
+    if report['over_budget']:
+        print(f"Over the {args.budget:.2f}s startup budget: {', '.join(report['over_budget'])}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
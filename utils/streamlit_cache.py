@@ -0,0 +1,233 @@
+import os
+import hashlib
+import logging
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Streamlit does not hash parameters whose names start with an underscore, so
+# the cached functions below take the raw file bytes as `_content` and are
+# keyed on the precomputed `file_hash` instead of hashing megabytes of PDF on
+# every rerun.
+
+
+def file_hash(content: bytes) -> str:
+    """
+    Compute the cache key for an uploaded file.
+
+    Args:
+        content: Raw file bytes
+
+    Returns:
+        Hex SHA-256 digest of the content
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_processor():
+    """Shared PDFProcessingIntegration instance."""
+    from utils.pdf_integration import PDFProcessingIntegration
+    return PDFProcessingIntegration()
+
+
+@st.cache_resource(show_spinner=False)
+def get_securities_processor():
+    """Shared SecuritiesPDFProcessor instance."""
+    from utils.securities_pdf_processor import SecuritiesPDFProcessor
+    return SecuritiesPDFProcessor()
+
+
+@st.cache_resource(show_spinner=False)
+def get_securities_analyzer():
+    """Shared SecuritiesAnalyzer instance."""
+    from utils.securities_analyzer import SecuritiesAnalyzer
+    return SecuritiesAnalyzer()
+
+
+@st.cache_resource(show_spinner=False)
+def get_financial_analyzer():
+    """Shared FinancialAnalyzer instance, including its categorization model."""
+    from utils.financial_analyzer import FinancialAnalyzer
+    return FinancialAnalyzer()
+
+
+@st.cache_resource(show_spinner=False)
+def get_mistral_extractor():
+    """Shared MistralExtractor instance."""
+    from utils.mistral_extractor import MistralExtractor
+    return MistralExtractor()
+
+
+@st.cache_resource(show_spinner=False)
+def get_agent_runner(api_key: str):
+    """Shared FinancialAgentRunner instance per API key."""
+    from utils.agent_runner import FinancialAgentRunner
+    return FinancialAgentRunner(api_key=api_key)
+
+
+@st.cache_data(show_spinner=False)
+def cached_detect_document_type(file_hash: str, _content: bytes, filename: Optional[str] = None) -> str:
+    """
+    Detect the document type of an uploaded file.
+
+    Args:
+        file_hash: Cache key from file_hash()
+        _content: Raw file bytes (not hashed)
+        filename: Original filename
+
+    Returns:
+        Detected document type
+    """
+    return get_pdf_processor().auto_detect_document_type(_content, filename=filename)
+
+
+@st.cache_data(show_spinner=False)
+def cached_process_document(file_hash: str, _content: bytes, document_type: Optional[str] = None,
+                            max_pages: Optional[int] = None,
+                            _callback: Optional[Callable[[int, int, str], None]] = None) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Extract data from an uploaded financial document.
+
+    Args:
+        file_hash: Cache key from file_hash()
+        _content: Raw file bytes (not hashed)
+        document_type: Type of document (statement, securities, etc.)
+        max_pages: Maximum number of pages to process
+        _callback: Progress callback, only called on a cache miss
+
+    Returns:
+        Tuple of (extracted data, result type)
+    """
+    return get_pdf_processor().process_financial_document(
+        _content,
+        document_type=document_type,
+        max_pages=max_pages,
+        callback=_callback
+    )
+
+
+@st.cache_data(show_spinner=False)
+def cached_process_document_in_chunks(file_hash: str, _content: bytes, chunk_size: int = 5,
+                                      document_type: Optional[str] = None,
+                                      _callback: Optional[Callable[[int, int, str], None]] = None) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Extract data from an uploaded financial document in page chunks.
+
+    Args:
+        file_hash: Cache key from file_hash()
+        _content: Raw file bytes (not hashed)
+        chunk_size: Number of pages per chunk
+        document_type: Type of document (statement, securities, etc.)
+        _callback: Progress callback, only called on a cache miss
+
+    Returns:
+        Tuple of (extracted data, result type)
+    """
+    return get_pdf_processor().process_document_in_chunks(
+        _content,
+        chunk_size=chunk_size,
+        document_type=document_type,
+        callback=_callback
+    )
+
+
+@st.cache_data(show_spinner=False)
+def cached_securities_pdf(file_hash: str, _content: bytes, bank_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Extract securities from an uploaded PDF.
+
+    Args:
+        file_hash: Cache key from file_hash()
+        _content: Raw file bytes (not hashed)
+        bank_name: Bank name hint for the processor
+
+    Returns:
+        List of securities dictionaries
+    """
+    temp_path = _write_temp_pdf(_content)
+    try:
+        return get_securities_processor().process_pdf(temp_path, bank_name)
+    finally:
+        _remove_temp_file(temp_path)
+
+
+@st.cache_data(show_spinner=False)
+def cached_mistral_extraction(file_hash: str, _content: bytes, filename: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    OCR an uploaded PDF with Mistral and extract the structured financial data.
+
+    Args:
+        file_hash: Cache key from file_hash()
+        _content: Raw file bytes (not hashed)
+        filename: Original filename
+
+    Returns:
+        Tuple of (OCR text, financial data)
+    """
+    temp_path = _write_temp_pdf(_content)
+    try:
+        extractor = get_mistral_extractor()
+        ocr_text = extractor.process_pdf_file(temp_path)
+        return ocr_text, extractor.extract_financial_data(ocr_text, filename)
+    finally:
+        _remove_temp_file(temp_path)
+
+
+@st.cache_data(show_spinner=False)
+def cached_analyze_securities_by_isin(securities_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Analyze securities by ISIN, reusing the result while the holdings are unchanged.
+
+    Args:
+        securities_list: List of securities dictionaries
+
+    Returns:
+        Analysis dictionary
+    """
+    return get_securities_analyzer().analyze_securities_by_isin(securities_list)
+
+
+@st.cache_data(show_spinner=False)
+def cached_analyze_performance(historical_data: List[Dict[str, Any]], grouping: str = 'monthly') -> Dict[str, Any]:
+    """
+    Analyze securities performance over time.
+
+    Args:
+        historical_data: Historical securities data
+        grouping: Time grouping (monthly, quarterly, yearly)
+
+    Returns:
+        Performance analysis dictionary
+    """
+    return get_securities_analyzer().analyze_performance_over_time(historical_data, grouping)
+
+
+def clear_data_caches():
+    """Drop all cached extraction and analysis results."""
+    st.cache_data.clear()
+    logger.info("Cleared Streamlit data caches")
+
+
+def clear_resource_caches():
+    """Drop the shared processor and model instances so they are rebuilt on next use."""
+    st.cache_resource.clear()
+    logger.info("Cleared Streamlit resource caches")
+
+
+def _write_temp_pdf(content: bytes) -> str:
+    """Write PDF bytes to a temporary file and return its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+        temp_file.write(content)
+        return temp_file.name
+
+
+def _remove_temp_file(path: str):
+    """Remove a temporary file, ignoring errors."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
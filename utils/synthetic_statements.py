@@ -0,0 +1,193 @@
+import os
+import random
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_TABULAR = 'tabular'
+LAYOUT_TEXT = 'text'
+
+TABLE_HEADERS = ['Date', 'Description', 'Amount', 'Balance']
+
+DESCRIPTIONS_EN = [
+    'Salary Deposit', 'Rent Payment', 'Grocery Store', 'Electricity Bill', 'Internet Bill',
+    'Restaurant', 'Gas Station', 'Pharmacy', 'Insurance Premium', 'ATM Withdrawal'
+]
+DESCRIPTIONS_HE = [
+    'משכורת', 'שכר דירה', 'סופרמרקט', 'חשבון חשמל', 'אינטרנט',
+    'מסעדה', 'תחנת דלק', 'בית מרקחת', 'ביטוח', 'משיכת מזומן'
+]
+
+# Fonts with Hebrew glyphs; without one, Hebrew text is drawn as placeholders
+HEBREW_FONT_CANDIDATES = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+    '/Library/Fonts/Arial Unicode.ttf',
+    'C:\\Windows\\Fonts\\arial.ttf',
+]
+
+# Letter page layout in points
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 50
+HEADER_HEIGHT = 70
+ROW_HEIGHT = 12
+TABLE_GAP = 18
+COLUMN_X = [MARGIN, MARGIN + 80, MARGIN + 330, MARGIN + 420, PAGE_WIDTH - MARGIN]
+FONT_SIZE = 8
+
+
+def find_hebrew_font(font_path: Optional[str] = None) -> Optional[str]:
+    """
+    Find a TrueType font that can render Hebrew.
+
+    Args:
+        font_path: Explicit font path (also read from BENCHMARK_HEBREW_FONT)
+
+    Returns:
+        Font path, or None if none is available
+    """
+    for candidate in [font_path, os.getenv('BENCHMARK_HEBREW_FONT')] + HEBREW_FONT_CANDIDATES:
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def max_rows_per_page(tables_per_page: int = 1) -> int:
+    """Number of table rows that fit on one page with the given number of tables."""
+    usable = PAGE_HEIGHT - 2 * MARGIN - HEADER_HEIGHT - (tables_per_page - 1) * TABLE_GAP
+    # Each table also needs a header row
+    return usable // ROW_HEIGHT - tables_per_page
+
+
+def generate_transactions(count: int, hebrew_ratio: float = 0.0, seed: int = 0,
+                          start_date: date = date(2023, 1, 1), opening_balance: float = 10000.0) -> List[Dict[str, Any]]:
+    """
+    Generate a deterministic list of transactions.
+
+    Args:
+        count: Number of transactions
+        hebrew_ratio: Share of transactions with a Hebrew description (0-1)
+        seed: Random seed
+        start_date: Date of the first transaction
+        opening_balance: Balance before the first transaction
+
+    Returns:
+        List of transaction dictionaries with date, description, amount and balance
+    """
+    rng = random.Random(seed)
+    balance = opening_balance
+    transactions = []
+    current = start_date
+
+    for i in range(count):
+        current += timedelta(days=rng.randint(0, 2))
+        index = rng.randrange(len(DESCRIPTIONS_EN))
+        description = DESCRIPTIONS_HE[index] if rng.random() < hebrew_ratio else DESCRIPTIONS_EN[index]
+        if index == 0:
+            amount = round(rng.uniform(5000, 12000), 2)
+        else:
+            amount = -round(rng.uniform(10, 2500), 2)
+        balance = round(balance + amount, 2)
+        transactions.append({
+            'date': current.strftime('%d/%m/%Y'),
+            'description': description,
+            'amount': amount,
+            'balance': balance
+        })
+
+    return transactions
+
+
+def _format_amount(value: float) -> str:
+    return f"{value:+,.2f}"
+
+
+def generate_statement(output_path: str, pages: int = 5, tables_per_page: int = 1, rows_per_table: int = 20,
+                       hebrew_ratio: float = 0.0, layout: str = LAYOUT_TABULAR, seed: int = 0,
+                       font_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write a synthetic bank statement PDF.
+
+    Args:
+        output_path: Path of the PDF to write
+        pages: Number of pages
+        tables_per_page: Transaction tables per page
+        rows_per_table: Transaction rows per table
+        hebrew_ratio: Share of rows with Hebrew descriptions (0-1)
+        layout: 'tabular' for ruled tables, 'text' for plain text lines
+        seed: Random seed; the same parameters always produce the same statement
+        font_path: TrueType font with Hebrew glyphs (looked up when not given)
+
+    Returns:
+        Manifest with the generation parameters, expected row count and transactions
+    """
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+
+    if layout not in (LAYOUT_TABULAR, LAYOUT_TEXT):
+        raise ValueError(f"Unknown layout: {layout}")
+    if tables_per_page * rows_per_table > max_rows_per_page(tables_per_page):
+        raise ValueError(f"{tables_per_page} tables of {rows_per_table} rows do not fit on a page "
+                         f"(at most {max_rows_per_page(tables_per_page)} rows)")
+
+    font_name = 'Helvetica'
+    hebrew_font = find_hebrew_font(font_path) if hebrew_ratio > 0 else None
+    if hebrew_font:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        pdfmetrics.registerFont(TTFont('StatementFont', hebrew_font))
+        font_name = 'StatementFont'
+    elif hebrew_ratio > 0:
+        logger.warning("No Hebrew font found; Hebrew descriptions will not be extractable as text")
+
+    transactions = generate_transactions(pages * tables_per_page * rows_per_table, hebrew_ratio, seed)
+    rows = iter(transactions)
+
+    c = canvas.Canvas(output_path, pagesize=letter)
+    for page_num in range(1, pages + 1):
+        top = PAGE_HEIGHT - MARGIN
+        c.setFont('Helvetica-Bold', 14)
+        c.drawString(MARGIN, top, f"Synthetic Bank - Account Statement - Page {page_num}")
+        c.setFont('Helvetica', 10)
+        c.drawString(MARGIN, top - 18, "Account: 1234-5678   Currency: ILS")
+        c.drawString(MARGIN, top - 32, f"Period: {transactions[0]['date']} - {transactions[-1]['date']}")
+
+        y = top - HEADER_HEIGHT
+        for _ in range(tables_per_page):
+            table_rows = [TABLE_HEADERS] + [
+                [row['date'], row['description'], _format_amount(row['amount']), f"{row['balance']:,.2f}"]
+                for row in (next(rows) for _ in range(rows_per_table))
+            ]
+
+            c.setFont(font_name, FONT_SIZE)
+            for i, cells in enumerate(table_rows):
+                baseline = y - (i + 1) * ROW_HEIGHT + 3
+                if layout == LAYOUT_TABULAR:
+                    for x, cell in zip(COLUMN_X, cells):
+                        c.drawString(x + 3, baseline, cell)
+                else:
+                    c.drawString(MARGIN, baseline, '   '.join(cells))
+
+            if layout == LAYOUT_TABULAR:
+                row_lines = [y - i * ROW_HEIGHT for i in range(len(table_rows) + 1)]
+                c.grid(COLUMN_X, row_lines)
+
+            y -= len(table_rows) * ROW_HEIGHT + TABLE_GAP
+
+        c.showPage()
+    c.save()
+
+    return {
+        'path': output_path,
+        'pages': pages,
+        'tables_per_page': tables_per_page if layout == LAYOUT_TABULAR else 0,
+        'rows_per_table': rows_per_table,
+        'hebrew_ratio': hebrew_ratio,
+        'layout': layout,
+        'seed': seed,
+        'hebrew_font': hebrew_font,
+        'expected_rows': len(transactions),
+        'transactions': transactions
+    }
@@ -0,0 +1,422 @@
+import os
+import json
+import bisect
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from utils.instrumentation import span, SPAN_TABLE_EXTRACTION
+
+logger = logging.getLogger(__name__)
+
+# Table layouts tell the extractor where an institution's transaction table is
+# on the page, so later statements from the same bank are cropped to that
+# region and split on known column boundaries instead of searching the whole
+# page for tables. Layouts come from the `table_layout` section of
+# data/templates/*.yaml, from the `table_layout` key of the templates DB
+# table's template_data JSON, or are learned from the first table found by a
+# full-page search:
+#
+#   table_layout:
+#     header_anchors: ["Date", "Description", "Amount"]   # text on the header row
+#     columns: [50, 130, 380, 470, 562]                    # column x-boundaries in points
+#     row_strategy: lines                                  # 'lines' (ruled) or 'text'
+#     end_anchors: ["Closing Balance"]                     # optional, ends the region
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TEMPLATES_DIR = os.path.join(_PROJECT_ROOT, 'data', 'templates')
+DEFAULT_DB_URL = f"sqlite:///{os.path.join(_PROJECT_ROOT, 'data', 'db', 'securities.db')}"
+
+ROW_STRATEGIES = ('lines', 'text')
+
+# Vertical tolerance in points for words on the same line
+LINE_TOLERANCE = 3
+
+
+def normalize_institution(name: str) -> str:
+    """Normalize an institution name for lookups."""
+    return ' '.join(name.lower().replace('_', ' ').split())
+
+
+class TableLayout:
+    """Known position and column structure of an institution's statement table."""
+
+    def __init__(self, institution: str, header_anchors: List[str], columns: List[float],
+                 row_strategy: str = 'lines', end_anchors: Optional[List[str]] = None, source: str = 'template'):
+        """
+        Initialize the layout.
+
+        Args:
+            institution: Institution name
+            header_anchors: Texts that all appear on the table's header row
+            columns: Column x-boundaries in points, left to right
+            row_strategy: How rows are separated: 'lines' (ruled) or 'text'
+            end_anchors: Texts whose line ends the table region
+            source: Where the layout came from ('template', 'db' or 'learned')
+        """
+        if row_strategy not in ROW_STRATEGIES:
+            raise ValueError(f"Unknown row strategy: {row_strategy}")
+        if not header_anchors or len(columns) < 2:
+            raise ValueError("A table layout needs header anchors and at least two column boundaries")
+
+        self.institution = institution
+        self.header_anchors = [anchor.lower() for anchor in header_anchors]
+        self.columns = sorted(float(x) for x in columns)
+        self.row_strategy = row_strategy
+        self.end_anchors = [anchor.lower() for anchor in end_anchors or []]
+        self.source = source
+
+    @classmethod
+    def from_dict(cls, institution: str, data: Dict[str, Any], source: str = 'template') -> 'TableLayout':
+        """Create a layout from a template's `table_layout` section."""
+        return cls(
+            institution,
+            header_anchors=data.get('header_anchors', []),
+            columns=data.get('columns', []),
+            row_strategy=data.get('row_strategy', 'lines'),
+            end_anchors=data.get('end_anchors'),
+            source=source
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Layout as a template `table_layout` section."""
+        return {
+            'header_anchors': self.header_anchors,
+            'columns': [round(x, 2) for x in self.columns],
+            'row_strategy': self.row_strategy,
+            'end_anchors': self.end_anchors
+        }
+
+    def find_regions(self, page, words: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        Find the table regions on a page.
+
+        Each header row starts a region, which runs to the next header row, an
+        end anchor or the bottom of the page.
+
+        Args:
+            page: pdfplumber page
+            words: Words of the page from extract_words()
+
+        Returns:
+            List of (top, bottom) vertical bounds
+        """
+        header_tops, end_tops = [], []
+        for line in _group_lines(words):
+            text = ' '.join(word['text'] for word in line).lower()
+            top = min(word['top'] for word in line)
+            if all(anchor in text for anchor in self.header_anchors):
+                header_tops.append(top)
+            elif any(anchor in text for anchor in self.end_anchors):
+                end_tops.append(top)
+
+        header_tops.sort()
+        regions = []
+        for i, top in enumerate(header_tops):
+            bottom = header_tops[i + 1] if i + 1 < len(header_tops) else page.height
+            bottom = min([bottom] + [end for end in end_tops if end > top])
+            regions.append((top, bottom))
+        return regions
+
+    def _row_bands(self, page, top: float, bottom: float, words: List[Dict[str, Any]]) -> List[tuple]:
+        """Vertical bounds of each row in a region."""
+        if self.row_strategy == 'lines':
+            left, right = self.columns[0], self.columns[-1]
+            rulings = sorted({
+                round(edge['top'], 1) for edge in page.edges
+                if edge['orientation'] == 'h' and top - LINE_TOLERANCE - 2 <= edge['top'] <= bottom
+                and edge['x0'] <= left + 1 and edge['x1'] >= right - 1
+            })
+            if len(rulings) >= 2:
+                return list(zip(rulings, rulings[1:]))
+        # Text rows: one band per line of words
+        return [(min(word['top'] for word in line) - 0.5, max(word['bottom'] for word in line) + 0.5)
+                for line in _group_lines(words)]
+
+    def extract(self, page) -> List[List[List[Optional[str]]]]:
+        """
+        Extract the tables of a page using the layout.
+
+        Words in each region are assigned to rows and to columns by their
+        position, so no table search is needed.
+
+        Args:
+            page: pdfplumber page
+
+        Returns:
+            Tables as lists of rows (header first); empty if the layout does not match
+        """
+        words = page.extract_words()
+        left, right = self.columns[0], self.columns[-1]
+        tables = []
+
+        for top, bottom in self.find_regions(page, words):
+            region_words = [
+                word for word in words
+                if top - LINE_TOLERANCE <= word['top'] < bottom and left <= (word['x0'] + word['x1']) / 2 <= right
+            ]
+            bands = self._row_bands(page, top, bottom, region_words)
+            band_tops = [band_top for band_top, _ in bands]
+            cells = [[[] for _ in range(len(self.columns) - 1)] for _ in bands]
+            for word in region_words:
+                middle = (word['top'] + word['bottom']) / 2
+                band = bisect.bisect_right(band_tops, middle) - 1
+                if band < 0 or middle >= bands[band][1]:
+                    continue
+                column = bisect.bisect_right(self.columns, (word['x0'] + word['x1']) / 2) - 1
+                cells[band][min(column, len(self.columns) - 2)].append(word)
+
+            rows = [
+                [' '.join(word['text'] for word in sorted(cell, key=lambda w: (round(w['top']), w['x0']))) or None
+                 for cell in row]
+                for row in cells if any(row)
+            ]
+            # Header row plus at least one data row
+            if len(rows) >= 2:
+                tables.append(rows)
+        return tables
+
+
+def _group_lines(words: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Group words into lines, top to bottom, each sorted left to right."""
+    lines = []
+    for word in sorted(words, key=lambda w: (w['top'], w['x0'])):
+        if lines and abs(word['top'] - lines[-1][0]['top']) <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda w: w['x0']) for line in lines]
+
+
+def learn_layout(institution: str, page, table) -> Optional[TableLayout]:
+    """
+    Derive a layout from a table found by a full-page search.
+
+    Args:
+        institution: Institution name
+        page: pdfplumber page the table was found on
+        table: pdfplumber Table object
+
+    Returns:
+        Learned layout, or None if the table has no usable header row
+    """
+    rows = table.extract()
+    if len(rows) < 2:
+        return None
+    header_anchors = [cell.strip() for cell in rows[0] if cell and cell.strip()]
+    if not header_anchors:
+        return None
+
+    columns = [column.bbox[0] for column in table.columns] + [table.bbox[2]]
+    # Ruled tables keep their row lines; otherwise rows follow the text
+    x0, top, x1, bottom = table.bbox
+    ruled = any(
+        edge['orientation'] == 'h' and top - 1 <= edge['top'] <= bottom + 1
+        for edge in page.edges
+    )
+    return TableLayout(institution, header_anchors, columns, row_strategy='lines' if ruled else 'text',
+                       source='learned')
+
+
+class TableLayoutCache:
+    """Per-institution table layouts from templates, the database and learned tables."""
+
+    def __init__(self, templates_dir: str = DEFAULT_TEMPLATES_DIR, db_url: Optional[str] = None,
+                 persist_learned: bool = False):
+        """
+        Initialize the cache. Templates and the database are read on first lookup.
+
+        Args:
+            templates_dir: Directory of template YAML files
+            db_url: Database with a `templates` table (optional)
+            persist_learned: Whether learned layouts are written to the database
+        """
+        self.templates_dir = templates_dir
+        self.db_url = db_url
+        self.persist_learned = persist_learned
+        self._layouts = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            self._load_templates()
+            if self.db_url:
+                self._load_db()
+
+    def _add_template(self, template: Dict[str, Any], source: str):
+        layout_data = template.get('table_layout')
+        institution = template.get('institution') or template.get('name')
+        if not layout_data or not institution:
+            return
+        try:
+            layout = TableLayout.from_dict(institution, layout_data, source=source)
+        except ValueError as e:
+            logger.error(f"Invalid table layout for {institution}: {str(e)}")
+            return
+        for name in (institution, template.get('name')):
+            if name:
+                self._layouts[normalize_institution(name)] = layout
+
+    def _load_templates(self):
+        """Read `table_layout` sections from the template YAML files."""
+        if not os.path.isdir(self.templates_dir):
+            return
+        import yaml
+
+        for filename in sorted(os.listdir(self.templates_dir)):
+            if not filename.endswith(('.yaml', '.yml')):
+                continue
+            try:
+                with open(os.path.join(self.templates_dir, filename), encoding='utf-8') as f:
+                    template = yaml.safe_load(f) or {}
+                self._add_template(template, 'template')
+            except Exception as e:
+                logger.error(f"Error loading table layout from {filename}: {str(e)}")
+
+    def _load_db(self):
+        """Read `table_layout` keys from the templates table."""
+        try:
+            from sqlalchemy import create_engine, text
+
+            engine = create_engine(self.db_url)
+            with engine.connect() as connection:
+                rows = connection.execute(text("SELECT name, institution, template_data FROM templates")).fetchall()
+            for name, institution, template_data in rows:
+                template = json.loads(template_data or '{}')
+                template.setdefault('name', name)
+                template.setdefault('institution', institution)
+                self._add_template(template, 'db')
+        except Exception as e:
+            logger.warning(f"Could not load table layouts from database: {str(e)}")
+
+    def get(self, institution: Optional[str]) -> Optional[TableLayout]:
+        """
+        Get the layout for an institution.
+
+        Args:
+            institution: Institution or template name
+
+        Returns:
+            Layout, or None if none is known
+        """
+        if not institution:
+            return None
+        self._ensure_loaded()
+        return self._layouts.get(normalize_institution(institution))
+
+    def add(self, layout: TableLayout):
+        """Register a layout for its institution."""
+        self._ensure_loaded()
+        with self._lock:
+            self._layouts[normalize_institution(layout.institution)] = layout
+
+    def learn(self, institution: str, page, table) -> Optional[TableLayout]:
+        """
+        Learn and cache a layout from a table found by a full-page search.
+
+        Args:
+            institution: Institution name
+            page: pdfplumber page
+            table: pdfplumber Table object
+
+        Returns:
+            Learned layout, or None if none could be derived
+        """
+        layout = learn_layout(institution, page, table)
+        if layout is None:
+            return None
+        self.add(layout)
+        logger.info(f"Learned table layout for {institution}: {layout.to_dict()}")
+        if self.persist_learned and self.db_url:
+            self.save(layout)
+        return layout
+
+    def save(self, layout: TableLayout):
+        """
+        Store a layout in the templates table.
+
+        The layout is merged into the institution's existing template, or
+        stored as a new `<institution>_layout` template.
+
+        Args:
+            layout: Layout to store
+        """
+        try:
+            from sqlalchemy import create_engine, text
+
+            engine = create_engine(self.db_url)
+            with engine.begin() as connection:
+                row = connection.execute(
+                    text("SELECT id, template_data FROM templates WHERE lower(institution) = :institution"),
+                    {'institution': layout.institution.lower()}
+                ).fetchone()
+                if row:
+                    template = json.loads(row[1] or '{}')
+                    template['table_layout'] = layout.to_dict()
+                    connection.execute(
+                        text("UPDATE templates SET template_data = :data WHERE id = :id"),
+                        {'data': json.dumps(template, ensure_ascii=False), 'id': row[0]}
+                    )
+                else:
+                    name = f"{normalize_institution(layout.institution).replace(' ', '_')}_layout"
+                    connection.execute(
+                        text("INSERT INTO templates (name, institution, document_type, template_data) "
+                             "VALUES (:name, :institution, 'table_layout', :data)"),
+                        {'name': name, 'institution': layout.institution,
+                         'data': json.dumps({'table_layout': layout.to_dict()}, ensure_ascii=False)}
+                    )
+        except Exception as e:
+            logger.error(f"Error saving table layout for {layout.institution}: {str(e)}")
+
+    def clear(self):
+        """Forget all layouts; templates are re-read on the next lookup."""
+        with self._lock:
+            self._layouts = {}
+            self._loaded = False
+
+
+def extract_page_tables(page, institution: Optional[str] = None,
+                        cache: Optional[TableLayoutCache] = None) -> List[List[List[Optional[str]]]]:
+    """
+    Extract a page's tables, using the institution's layout when one is known.
+
+    Without a layout, or when the layout does not match the page, the whole
+    page is searched for tables; the first table found teaches the cache a
+    layout for later statements of the same institution.
+
+    Args:
+        page: pdfplumber page
+        institution: Institution the statement comes from
+        cache: Layout cache (defaults to the shared table_layouts)
+
+    Returns:
+        Tables as lists of rows
+    """
+    cache = cache or table_layouts
+    layout = cache.get(institution)
+    page_num = page.page_number
+
+    if layout is not None:
+        with span(SPAN_TABLE_EXTRACTION, page=page_num, source='layout'):
+            tables = layout.extract(page)
+        if tables:
+            return tables
+
+    with span(SPAN_TABLE_EXTRACTION, page=page_num, source='pdfplumber'):
+        found = page.find_tables()
+        tables = [table.extract() for table in found]
+
+    if institution and layout is None and found:
+        cache.learn(institution, page, found[0])
+    return tables
+
+
+# Shared cache; learned layouts are stored only when DATABASE_URL is configured
+table_layouts = TableLayoutCache(
+    db_url=os.getenv('DATABASE_URL', DEFAULT_DB_URL),
+    persist_learned=bool(os.getenv('DATABASE_URL'))
+)
@@ -0,0 +1,227 @@
+import re
+import bisect
+import logging
+from typing import Any, Dict, Iterable, List, MutableMapping, Optional, Tuple
+
+import numpy as np
+
+from utils.lazy_loader import lazy_import
+from utils.numeric_parser import parse_amounts
+
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Days a posting date may move between two statements of the same transaction
+DEFAULT_DATE_WINDOW = 3
+# Share of description words two statements must have in common
+DEFAULT_SIMILARITY = 0.6
+
+# Reference numbers, card digits and punctuation differ between statements
+_NOISE = re.compile(r'[\d\W_]+')
+_BIDI_CONTROLS = re.compile('[\u200e\u200f\u202a-\u202e\u2066-\u2069]')
+
+
+def description_tokens(description: Any) -> frozenset:
+    """
+    Words of a description, without digits, punctuation or case.
+
+    Args:
+        description: Transaction description
+
+    Returns:
+        Set of words
+    """
+    if not isinstance(description, str):
+        return frozenset()
+    return frozenset(_NOISE.sub(' ', _BIDI_CONTROLS.sub('', description).lower()).split())
+
+
+def _similarity(first: frozenset, second: frozenset) -> float:
+    """Jaccard similarity of two word sets; two empty descriptions are alike."""
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def _days(dates: List[Any]) -> np.ndarray:
+    """Day numbers of transaction dates, -1 where a date cannot be read."""
+    values = pd.Series(dates, dtype=object)
+    # ISO dates first: read day-first they would swap day and month
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    missing = parsed.isna() & values.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(values[missing].astype(str), errors='coerce', dayfirst=True, format='mixed')
+    days = parsed.dt.normalize()
+    ordinals = (days - pd.Timestamp('1970-01-01')).dt.days
+    return ordinals.fillna(-1).to_numpy(dtype=np.int64)
+
+
+class TransactionIndex:
+    """
+    Index of ingested transactions that drops duplicates from overlapping statements.
+
+    Transactions are keyed by account, amount in cents, day and the words of
+    the description. A new transaction is a duplicate if an earlier ingest
+    holds one with the same key, or, failing that, one with the same account
+    and amount whose day is within date_window days and whose description
+    shares at least `similarity` of its words. Candidates are looked up by
+    hashed key and by (account, amount) bucket sorted by day, so ingesting n
+    transactions costs O(n log n) rather than O(n^2) comparisons.
+
+    Each earlier transaction absorbs at most one duplicate per ingest, and
+    transactions within the same ingest are never duplicates of each other:
+    a statement with two identical coffees keeps both, and uploading it
+    again adds neither.
+    """
+
+    def __init__(self, date_window: int = DEFAULT_DATE_WINDOW, similarity: float = DEFAULT_SIMILARITY):
+        """
+        Initialize an empty index.
+
+        Args:
+            date_window: Days a posting date may differ between duplicates
+            similarity: Minimum share of common description words for a fuzzy match
+        """
+        self.date_window = date_window
+        self.similarity = similarity
+        self.size = 0
+        self.duplicates = 0
+        self._exact: Dict[Tuple, List[int]] = {}
+        self._bucket_days: Dict[Tuple, List[int]] = {}
+        self._bucket_ids: Dict[Tuple, List[int]] = {}
+        self._tokens: List[frozenset] = []
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _keys(self, transactions: List[Dict[str, Any]], account: Optional[str]) -> List[Tuple]:
+        """Normalized (account, cents, day, words) of each transaction, computed in bulk."""
+        days = _days([t.get('date') for t in transactions])
+        amounts = parse_amounts([t.get('amount') for t in transactions])
+        cents = np.where(np.isnan(amounts), 0, np.round(amounts * 100)).astype(np.int64)
+        # Statements repeat the same merchants, so each description is tokenized once
+        tokens = {}
+        keys = []
+        for transaction, amount, day in zip(transactions, cents.tolist(), days.tolist()):
+            owner = account
+            if owner is None:
+                owner = transaction.get('account') or transaction.get('account_number')
+            description = transaction.get('description')
+            words = tokens.get(description) if isinstance(description, str) else None
+            if words is None:
+                words = description_tokens(description)
+                if isinstance(description, str):
+                    tokens[description] = words
+            keys.append((owner, amount, day, words))
+        return keys
+
+    def _match(self, key: Tuple, claimed: set) -> Optional[int]:
+        """Earlier transaction the key duplicates, if any."""
+        for entry in self._exact.get(key, ()):
+            if entry not in claimed:
+                return entry
+
+        owner, cents, day, tokens = key
+        if day < 0:
+            return None
+        bucket_days = self._bucket_days.get((owner, cents))
+        if not bucket_days:
+            return None
+        bucket_ids = self._bucket_ids[(owner, cents)]
+
+        # Most similar unclaimed transaction of the same account and amount within the window
+        best, best_score = None, 0.0
+        start = bisect.bisect_left(bucket_days, day - self.date_window)
+        end = bisect.bisect_right(bucket_days, day + self.date_window)
+        for position in range(start, end):
+            entry = bucket_ids[position]
+            if entry in claimed:
+                continue
+            score = _similarity(tokens, self._tokens[entry])
+            if score >= self.similarity and (best is None or score > best_score):
+                best, best_score = entry, score
+        return best
+
+    def _add(self, key: Tuple):
+        entry = len(self._tokens)
+        owner, cents, day, tokens = key
+        self._tokens.append(tokens)
+        self._exact.setdefault(key, []).append(entry)
+        if day >= 0:
+            bucket = (owner, cents)
+            days = self._bucket_days.setdefault(bucket, [])
+            position = bisect.bisect_right(days, day)
+            days.insert(position, day)
+            self._bucket_ids.setdefault(bucket, []).insert(position, entry)
+        self.size += 1
+
+    def ingest(self, transactions: Iterable[Dict[str, Any]], account: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Add a batch of transactions, e.g. one uploaded statement.
+
+        Args:
+            transactions: Transactions with date, amount and description
+            account: Account of the whole batch (default: each transaction's
+                'account' or 'account_number' field)
+
+        Returns:
+            Transactions of the batch that were not already in the index
+        """
+        transactions = list(transactions)
+        if not transactions:
+            return []
+
+        keys = self._keys(transactions, account)
+        claimed = set()
+        new, new_keys = [], []
+        for transaction, key in zip(transactions, keys):
+            entry = self._match(key, claimed)
+            if entry is None:
+                new.append(transaction)
+                new_keys.append(key)
+            else:
+                claimed.add(entry)
+
+        # Added after matching, so the batch is never compared with itself
+        for key in new_keys:
+            self._add(key)
+
+        duplicates = len(transactions) - len(new)
+        self.duplicates += duplicates
+        if duplicates:
+            logger.info(f"Skipped {duplicates} of {len(transactions)} transactions already ingested")
+        return new
+
+
+def add_transactions(state: MutableMapping, transactions: Iterable[Dict[str, Any]],
+                     key: str = 'transactions', account: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Append transactions to a stored list, e.g. Streamlit session state, without duplicates.
+
+    The index is kept next to the list under '<key>_index'. If the list was
+    cleared or changed in length elsewhere, the index is rebuilt from it first.
+
+    Args:
+        state: Mapping holding the list
+        transactions: Transactions to add
+        key: Key of the list in the mapping
+        account: Account of the transactions if known
+
+    Returns:
+        Transactions that were added
+    """
+    index_key = f"{key}_index"
+    stored = state.get(key)
+    if stored is None:
+        stored = state[key] = []
+
+    index = state.get(index_key)
+    if not isinstance(index, TransactionIndex) or len(index) != len(stored):
+        index = TransactionIndex()
+        index.ingest(stored)
+        state[index_key] = index
+
+    new = index.ingest(transactions, account)
+    stored.extend(new)
+    return new
@@ -0,0 +1,191 @@
+import re
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.numeric_parser import detect_document_decimal, normalize_number
+
+logger = logging.getLogger(__name__)
+
+# Dates: DD/MM/YYYY, DD.MM.YY, DD-MM-YYYY and ISO YYYY-MM-DD
+_DATE = r'(?P<date>\b(?:\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.\-]\d{1,2}[/.\-](?:\d{4}|\d{2}))\b)'
+
+# Amounts: thousands grouped with ',', '.', apostrophes or non-breaking spaces,
+# either decimal separator, currency symbols on either side, and negatives
+# written as -1.00, 1.00- (common in Hebrew statements) or (1.00)
+_CURRENCY = r'(?:[₪$€£]|ש"ח|ש״ח|NIS|ILS|USD|EUR)'
+_NUMBER = r"(?:\d{1,3}(?:[,.'\u00a0\u202f]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?)"
+_AMOUNT = (
+    r'(?<![\w.,])(?P<amount>(?P<open>\()?(?P<sign>[-+\u2212])?(?:' + _CURRENCY + r'\s?)?'
+    r'(?P<number>' + _NUMBER + r')(?![\d])'
+    r'(?:\s?' + _CURRENCY + r')?(?P<trailing>-(?!\d))?(?P<close>\))?)'
+)
+
+# Dates are tried first, so a date is never also read as numbers. The
+# lookahead lets the scan skip positions that cannot start a token without
+# trying either alternative.
+TOKEN_PATTERN = re.compile(r'(?=[\d(+\-\u2212₪$€£שNIUE])(?:' + _DATE + '|' + _AMOUNT + ')')
+
+# Bidirectional control characters inserted by PDF text extraction of RTL text
+_BIDI_CONTROLS = re.compile('[\u200e\u200f\u202a-\u202e\u2066-\u2069]')
+
+_SPACES = re.compile(r'\s{2,}')
+
+KIND_DATE = 'date'
+KIND_AMOUNT = 'amount'
+
+
+class Token:
+    """A date or amount found in a line of text."""
+
+    __slots__ = ('kind', 'text', 'value', 'start', 'end', 'decimals')
+
+    def __init__(self, kind: str, text: str, value: Any, start: int, end: int, decimals: int = 0):
+        self.kind = kind
+        self.text = text
+        self.value = value
+        self.start = start
+        self.end = end
+        self.decimals = decimals
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.text!r}, {self.value!r})"
+
+
+class TokenizedLine:
+    """Dates, amounts and remaining description of one line."""
+
+    __slots__ = ('line_number', 'text', 'dates', 'amounts', 'description')
+
+    def __init__(self, line_number: int, text: str, dates: List[Token], amounts: List[Token], description: str):
+        self.line_number = line_number
+        self.text = text
+        self.dates = dates
+        self.amounts = amounts
+        self.description = description
+
+    @property
+    def date(self) -> Optional[str]:
+        """First date on the line."""
+        return self.dates[0].value if self.dates else None
+
+    def money(self) -> List[Token]:
+        """Amounts written with decimals, i.e. likely money rather than references."""
+        return [token for token in self.amounts if token.decimals]
+
+
+class TransactionTokenizer:
+    """
+    Splits statement text into dates, amounts and descriptions.
+
+    Each line is scanned once by one precompiled pattern. Tokens cannot
+    overlap, so every number on a line is read exactly once, and each line
+    yields at most one transaction. Numbers in Hebrew (1,234.56) and European
+    (1.234,56) formats are read correctly. Ambiguous numbers such as '1,234'
+    follow the decimal separator given, or else the one detected for the
+    whole document.
+    """
+
+    def __init__(self, decimal: Optional[str] = None):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            decimal: Decimal separator of the documents if known ('.' or ',')
+        """
+        self.decimal = decimal
+
+    def tokenize_line(self, line: str, line_number: int = 0) -> TokenizedLine:
+        """
+        Tokenize a single line.
+
+        Args:
+            line: Line of text
+            line_number: Position of the line in its document
+
+        Returns:
+            TokenizedLine with its dates, amounts and description
+        """
+        return self._tokenize(_BIDI_CONTROLS.sub('', line), line_number, self.decimal)
+
+    def _tokenize(self, line: str, line_number: int, decimal: Optional[str]) -> TokenizedLine:
+        dates, amounts, pieces = [], [], []
+        position = 0
+        for match in TOKEN_PATTERN.finditer(line):
+            date, number, sign, trailing, opened, closed = match.group(
+                'date', 'number', 'sign', 'trailing', 'open', 'close')
+            start, end = match.span()
+            if date:
+                dates.append(Token(KIND_DATE, date, date, start, end))
+            else:
+                if ',' in number or (decimal == ',' and '.' in number) or number.count('.') > 1 or not number.isascii():
+                    number = normalize_number(number, decimal)
+                try:
+                    value = float(number)
+                except ValueError:
+                    continue
+                if sign in ('-', '\u2212') or trailing or (opened and closed):
+                    value = -value
+                dot = number.find('.')
+                amounts.append(Token(KIND_AMOUNT, match.group('amount').strip(), value, start, end,
+                                     len(number) - dot - 1 if dot >= 0 else 0))
+            if start > position:
+                pieces.append(line[position:start])
+            position = end
+        pieces.append(line[position:])
+
+        # Table cell separators are not part of the description
+        description = ' '.join(piece for piece in (piece.strip(' \t|') for piece in pieces) if piece)
+        if '  ' in description or '\t' in description:
+            description = _SPACES.sub(' ', description)
+        return TokenizedLine(line_number, line.strip(), dates, amounts, description)
+
+    def iter_lines(self, text: str) -> Iterator[TokenizedLine]:
+        """
+        Tokenize every non-empty line of a text.
+
+        Args:
+            text: Document text
+
+        Yields:
+            TokenizedLine for each line with at least one amount
+        """
+        text = _BIDI_CONTROLS.sub('', text)
+        # Ambiguous numbers such as '1.234' follow the rest of the document
+        decimal = self.decimal or detect_document_decimal(text)
+        for line_number, line in enumerate(text.splitlines()):
+            if not line.strip():
+                continue
+            tokenized = self._tokenize(line, line_number, decimal)
+            if tokenized.amounts:
+                yield tokenized
+
+    def extract_transactions(self, text: str, require_date: bool = True) -> List[Dict[str, Any]]:
+        """
+        Extract one transaction per line holding a date and an amount.
+
+        When a line has two or more money amounts, the last is the running
+        balance and the one before it the transaction amount.
+
+        Args:
+            text: Document text
+            require_date: Skip lines without a date
+
+        Returns:
+            List of transactions with date, description, amount and balance
+        """
+        transactions = []
+        for line in self.iter_lines(text):
+            if require_date and not line.dates:
+                continue
+            money = line.money() or line.amounts
+            transactions.append({
+                'date': line.date,
+                'description': line.description,
+                'amount': money[-2].value if len(money) > 1 else money[-1].value,
+                'balance': money[-1].value if len(money) > 1 else None
+            })
+        return transactions
+
+
+# Shared instance for documents without a known decimal convention
+tokenizer = TransactionTokenizer()
@@ -1,11 +1,15 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 import logging
+from utils.returns_engine import ReturnsEngine, returns_covariance, covariance_to_correlation
 
 logger = logging.getLogger(__name__)
 
+# Shared engine so repeated charts over the same date window hit its cache
+returns_engine = ReturnsEngine()
+
 class FinancialVisualizer:
     """Utility for creating financial visualizations."""
     
@@ -203,22 +207,20 @@ class FinancialVisualizer:
             return None
 
     @staticmethod
-    def create_correlation_heatmap(securities_data: Dict[str, Any]) -> go.Figure:
+    def create_correlation_heatmap(securities_data: Dict[str, Any],
+                                   historical_data: Optional[List[Dict[str, Any]]] = None,
+                                   start_date: Optional[str] = None,
+                                   end_date: Optional[str] = None,
+                                   shrinkage: Union[None, float, str] = None) -> go.Figure:
         """Create a correlation heatmap between securities."""
         try:
-            # Extract daily returns for each security (if available)
-            securities = {}
-            for isin, data in securities_data['securities'].items():
-                if 'returns' in data:  # This would need to be calculated elsewhere
-                    securities[data['security_name']] = data['returns']
+            corr_matrix = FinancialVisualizer._build_correlation_matrix(
+                securities_data['securities'], historical_data, start_date, end_date, shrinkage
+            )
             
-            if not securities:
+            if corr_matrix is None:
                 return None
             
-            # Create correlation matrix
-            df = pd.DataFrame(securities)
-            corr_matrix = df.corr()
-            
             # Create heatmap
             fig = px.imshow(
                 corr_matrix,
@@ -238,6 +240,56 @@ class FinancialVisualizer:
             logger.error(f"Error creating correlation heatmap: {str(e)}")
             return None
 
+    @staticmethod
+    def _build_correlation_matrix(securities: Dict[str, Any],
+                                  historical_data: Optional[List[Dict[str, Any]]] = None,
+                                  start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None,
+                                  shrinkage: Union[None, float, str] = None) -> Optional[pd.DataFrame]:
+        """
+        Build a correlation matrix labelled by security name.
+        
+        Uses the returns engine on historical snapshots when provided, and
+        falls back to precomputed 'returns' series stored per ISIN.
+        
+        Args:
+            securities: Dict of securities data keyed by ISIN
+            historical_data: Optional historical holdings snapshots
+            start_date: Optional start of the date window
+            end_date: Optional end of the date window
+            shrinkage: None, a shrinkage intensity in [0, 1], or 'ledoit_wolf'
+            
+        Returns:
+            Correlation matrix, or None if no returns are available
+        """
+        if historical_data:
+            corr_matrix = returns_engine.correlation_matrix(
+                historical_data, start_date=start_date, end_date=end_date, shrinkage=shrinkage
+            )
+        else:
+            returns_data = {
+                isin: data['returns']
+                for isin, data in securities.items()
+                if isinstance(data, dict) and 'returns' in data
+            }
+            if not returns_data:
+                return None
+            covariance = returns_covariance(pd.DataFrame(returns_data), shrinkage=shrinkage)
+            corr_matrix = covariance_to_correlation(covariance)
+        
+        if corr_matrix.empty:
+            return None
+        
+        names = {
+            isin: data.get('security_name') or f"Unknown ({isin})"
+            for isin, data in securities.items()
+            if isinstance(data, dict)
+        }
+        labels = [names.get(isin, isin) for isin in corr_matrix.columns]
+        corr_matrix.index = labels
+        corr_matrix.columns = labels
+        return corr_matrix
+
     def create_allocation_treemap(self, securities_data: Dict[str, Any]):
         """
         Create a treemap visualization of portfolio allocation.
@@ -310,24 +362,29 @@ class FinancialVisualizer:
         
         return figures
     
-    def create_correlation_matrix(self, securities_data: Dict[str, Any]):
+    def create_correlation_matrix(self, securities_data: Dict[str, Any],
+                                  historical_data: Optional[List[Dict[str, Any]]] = None,
+                                  start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None,
+                                  shrinkage: Union[None, float, str] = None):
         """
         Create a correlation matrix heatmap of security returns.
         
         Args:
             securities_data: Dict containing securities data with ISIN keys
+            historical_data: Optional historical holdings snapshots to derive returns from
+            start_date: Optional start of the date window
+            end_date: Optional end of the date window
+            shrinkage: None, a shrinkage intensity in [0, 1], or 'ledoit_wolf'
             
         Returns:
             Plotly figure object
         """
-        # Extract returns data if available
-        returns_data = {}
-        for isin, data in securities_data.items():
-            if 'returns' in data:
-                security_name = data.get('security_name', f"Unknown ({isin})")
-                returns_data[security_name] = data['returns']
+        corr_matrix = self._build_correlation_matrix(
+            securities_data, historical_data, start_date, end_date, shrinkage
+        )
         
-        if not returns_data:
+        if corr_matrix is None:
             fig = go.Figure()
             fig.add_annotation(
                 text="No returns data available for correlation analysis",
@@ -338,10 +395,6 @@ class FinancialVisualizer:
             )
             return fig
         
-        # Create correlation matrix
-        returns_df = pd.DataFrame(returns_data)
-        corr_matrix = returns_df.corr()
-        
         # Create heatmap
         fig = px.imshow(
             corr_matrix,
@@ -367,13 +420,15 @@ class SecurityVisualizer(FinancialVisualizer):
     def __init__(self):
         super().__init__()
         
-    def create_complete_analysis(self, securities_data: Dict[str, Any], performance_data: Dict[str, Any] = None):
+    def create_complete_analysis(self, securities_data: Dict[str, Any], performance_data: Dict[str, Any] = None,
+                                 historical_data: Optional[List[Dict[str, Any]]] = None):
         """
         Create a complete set of visualizations for security analysis.
         
         Args:
             securities_data: Dict containing securities data
             performance_data: Optional performance data
+            historical_data: Optional historical holdings snapshots for the correlation matrix
             
         Returns:
             Dict containing all visualization figures
@@ -381,7 +436,7 @@ class SecurityVisualizer(FinancialVisualizer):
         figures = self.create_dashboard(securities_data, performance_data)
         
         # Add correlation matrix if we have returns data
-        corr_matrix = self.create_correlation_matrix(securities_data)
+        corr_matrix = self.create_correlation_matrix(securities_data, historical_data)
         if corr_matrix:
             figures['correlation_matrix'] = corr_matrix
         